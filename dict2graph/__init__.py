@@ -1,4 +1,13 @@
 from .dict2graph import Dict2graph
-from .transformers import Transformer, NodeTrans, RelTrans, AnyLabel, AnyRelation
+from .pipeline import CompiledPipeline
+from .writer import UnwindWriter
+from .transformers import (
+    Transformer,
+    NodeTrans,
+    RelTrans,
+    AnyLabel,
+    AnyRelation,
+    TransformerAccess,
+)
 from .node import Node
 from .relation import Relation
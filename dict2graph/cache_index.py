@@ -0,0 +1,245 @@
+"""
+Indexes over the node and relation cache of `Dict2graph`, used to dispatch transformers only to the objects they can match.
+"""
+import heapq
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    from dict2graph.node import Node
+    from dict2graph.relation import Relation
+
+
+class _SequencedIndex:
+    """Index of cached objects by one or more keys per object.
+
+    Every object gets a sequence number in the order it was added, which is the order of the cache list.
+    Candidates are visited in this order, so transformers see the objects in the same order as with a full scan of the cache.
+    The objects notify the index when their keys change (`_rekey()`).
+    """
+
+    def __init__(self):
+        self._objects: Dict[int, Any] = {}
+        self._objects_by_key: Dict[str, Dict[int, Any]] = {}
+        self._next_seq: int = 0
+        # deleted objects, that are still part of the index
+        self.tombstones: int = 0
+        # deleted objects, that were removed from the index. they are still part of the cache until it is compacted
+        self.removed_tombstones: int = 0
+        # sequence numbers of re-keyed objects, that must be checked by the running pass
+        self._pending: Optional[List[int]] = None
+        self._position: int = -1
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def _get_keys(self, obj: Any) -> Iterable[str]:
+        raise NotImplementedError
+
+    def _set_entry(self, obj: Any, seq: Optional[int]):
+        """Store the index and the sequence number on the object, so it can notify the index"""
+        raise NotImplementedError
+
+    def _get_seq(self, obj: Any) -> int:
+        raise NotImplementedError
+
+    def add(self, obj: Any):
+        seq = self._next_seq
+        self._next_seq += 1
+        self._set_entry(obj, seq)
+        self._objects[seq] = obj
+        if obj.deleted:
+            self.tombstones += 1
+        for key in self._get_keys(obj):
+            bucket = self._objects_by_key.get(key)
+            if bucket is None:
+                bucket = self._objects_by_key[key] = {}
+            bucket[seq] = obj
+
+    def remove(self, obj: Any):
+        seq = self._get_seq(obj)
+        if self._objects.get(seq) is not obj:
+            return
+        del self._objects[seq]
+        if obj.deleted:
+            self.tombstones -= 1
+            self.removed_tombstones += 1
+        for key in self._get_keys(obj):
+            bucket = self._objects_by_key.get(key)
+            if bucket is not None:
+                bucket.pop(seq, None)
+        self._set_entry(obj, None)
+
+    def close(self):
+        """Drop all entries. Objects that still point to the index are ignored from now on."""
+        self._objects = {}
+        self._objects_by_key = {}
+        self._pending = None
+        self.tombstones = 0
+        self.removed_tombstones = 0
+
+    def compact(self):
+        """Remove all deleted objects"""
+        for obj in [obj for obj in self._objects.values() if obj.deleted]:
+            self.remove(obj)
+
+    def _set_deleted(self, obj: Any, deleted: bool):
+        if self._objects.get(self._get_seq(obj)) is not obj:
+            return
+        self.tombstones += 1 if deleted else -1
+
+    def _rekey(self, obj: Any, old_keys: Iterable[str]):
+        seq = self._get_seq(obj)
+        if self._objects.get(seq) is not obj:
+            return
+        new_keys = self._get_keys(obj)
+        # labels are mostly added or removed one at a time. only touch the buckets of changed keys
+        for key in old_keys:
+            if key not in new_keys:
+                bucket = self._objects_by_key.get(key)
+                if bucket is not None:
+                    bucket.pop(seq, None)
+        for key in new_keys:
+            if key not in old_keys:
+                bucket = self._objects_by_key.get(key)
+                if bucket is None:
+                    bucket = self._objects_by_key[key] = {}
+                bucket[seq] = obj
+        if self._pending is not None and seq > self._position:
+            # the running pass did not reach the object yet. it may match now
+            heapq.heappush(self._pending, seq)
+
+    def _iter_buckets(self, buckets: List[Dict[int, Any]]) -> Iterator[Any]:
+        buckets = [bucket for bucket in buckets if bucket]
+        if not buckets:
+            # nothing to visit. without any visited object there is no transformer that could re-key objects in this pass
+            return iter(())
+        if len(buckets) == 1:
+            seqs = sorted(buckets[0])
+        else:
+            seqs = sorted(set().union(*buckets))
+        return self._iter_pass(seqs)
+
+    def _iter_pass(self, seqs: List[int]) -> Iterator[Any]:
+        self._pending = seqs
+        self._position = -1
+        try:
+            while self._pending:
+                seq = heapq.heappop(self._pending)
+                if seq <= self._position:
+                    continue
+                self._position = seq
+                obj = self._objects.get(seq)
+                if obj is not None:
+                    yield obj
+        finally:
+            self._pending = None
+            self._position = -1
+
+
+class LabelIndex(_SequencedIndex):
+    """Index of the cached nodes by label. The nodes notify the index when their labels change (see `Node.labels`)."""
+
+    def _get_keys(self, node: "Node") -> Iterable[str]:
+        return node.labels
+
+    def _set_entry(self, node: "Node", seq: Optional[int]):
+        node._label_index = self if seq is not None else None
+        node._label_index_seq = seq
+
+    def _get_seq(self, node: "Node") -> int:
+        return node._label_index_seq
+
+    def iter_candidates(
+        self, any_of: Optional[List[str]], all_of: Optional[List[str]]
+    ) -> Iterator["Node"]:
+        """Iterate over every node, that has at least one label of `any_of` or all labels of `all_of`, in the order of the cache.
+        Nodes that are relabeled while iterating are visited as well, if the iteration did not pass them yet.
+        The candidates are a superset of the matching nodes; the caller has to check the labels again when visiting a node.
+
+        Args:
+            any_of (Optional[List[str]]): Labels of which a candidate has at least one
+            all_of (Optional[List[str]]): Labels a candidate has all of. Only the smallest bucket is looked up.
+
+        Returns:
+            Iterator[Node]: Candidate nodes
+        """
+        if not any_of and all_of and len(all_of) == 1:
+            # the common case `Transformer.match_nodes("label")`
+            return self._iter_buckets([self._objects_by_key.get(all_of[0])])
+        return self._iter_buckets(self._get_candidate_buckets(any_of, all_of))
+
+    def iter_candidates_of_any(
+        self, candidate_labels: List[Tuple[Optional[List[str]], Optional[List[str]]]]
+    ) -> Iterator["Node"]:
+        """Like `iter_candidates()`, for the union of multiple `(any_of, all_of)` pairs. Every candidate is visited once.
+
+        Args:
+            candidate_labels (List[Tuple[Optional[List[str]], Optional[List[str]]]]): `any_of` and `all_of` pairs
+
+        Returns:
+            Iterator[Node]: Candidate nodes
+        """
+        buckets = []
+        for any_of, all_of in candidate_labels:
+            buckets.extend(self._get_candidate_buckets(any_of, all_of))
+        return self._iter_buckets(buckets)
+
+    def _get_candidate_buckets(
+        self, any_of: Optional[List[str]], all_of: Optional[List[str]]
+    ) -> List[Optional[Dict[int, "Node"]]]:
+        buckets = [self._objects_by_key.get(label) for label in any_of or ()]
+        if all_of:
+            buckets.append(
+                min(
+                    (self._objects_by_key.get(label, {}) for label in all_of),
+                    key=len,
+                )
+            )
+        return buckets
+
+
+class RelationTypeIndex(_SequencedIndex):
+    """Index of the cached relations by relation type.
+    The relations notify the index when their type changes, including a changed default type after a node was relabeled (see `Relation.relation_type`).
+    """
+
+    def _get_keys(self, rel: "Relation") -> Iterable[str]:
+        return (rel.relation_type,)
+
+    def _set_entry(self, rel: "Relation", seq: Optional[int]):
+        rel._type_index = self if seq is not None else None
+        rel._type_index_seq = seq
+
+    def _get_seq(self, rel: "Relation") -> int:
+        return rel._type_index_seq
+
+    def iter_candidates(
+        self, match_type: Callable[[str], bool]
+    ) -> Iterator["Relation"]:
+        """Iterate over every relation with a type accepted by `match_type`, in the order of the cache.
+        Relations that change their type while iterating are visited as well, if the iteration did not pass them yet.
+        The caller has to check the type again when visiting a relation.
+
+        Args:
+            match_type (Callable[[str], bool]): Predicate on the relation type
+
+        Returns:
+            Iterator[Relation]: Candidate relations
+        """
+        return self._iter_buckets(
+            [
+                bucket
+                for relation_type, bucket in self._objects_by_key.items()
+                if bucket and match_type(relation_type)
+            ]
+        )
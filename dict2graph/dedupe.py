@@ -0,0 +1,73 @@
+"""
+In-memory deduplication of the buffered nodes of `Dict2graph`, by node set and merge key values. See `Dict2graph(deduplicate_nodes=...)`.
+
+The same entity (e.g. an author of many articles, or a list hub with the same hash id) is manifested once per occurrence.
+Without deduplication every occurrence is a row of its `NodeSet` and is sent to the database, where it costs a lock per row.
+"""
+import json
+from typing import Dict, Hashable, List, Literal, Tuple
+
+from graphio import NodeSet
+
+DedupePolicy = Literal["first", "last", "union"]
+DEDUPE_POLICIES: Tuple[str, ...] = ("first", "last", "union")
+
+
+def get_merge_values_key(row: Dict, merge_keys: List[str]) -> Hashable:
+    """The values of the merge keys of a node row, as a hashable key.
+    The key includes the value types, as `1`, `1.0` and `True` are equal in python but distinct property values.
+    """
+    values = tuple(row.get(key) for key in merge_keys)
+    try:
+        hash(values)
+    except TypeError:
+        # list properties can be merge keys as well. json keeps the types apart (`1`, `1.0`, `true`)
+        return json.dumps(values, sort_keys=True, default=str)
+    return tuple((type(value), value) for value in values)
+
+
+class NodeDeduplicator:
+    """Index of the rows of the buffered `NodeSet`s by `(NodeSet fingerprint, merge key values)`.
+
+    A row with the merge key values of an already buffered row is not added to its node set; the properties of both are combined by the policy:
+
+    * `"first"`: the first row is kept as it is.
+    * `"last"`: the first row is replaced by the new row.
+    * `"union"`: the first row is replaced by a row with the properties of both. Properties of the new row win.
+    """
+
+    def __init__(self, policy: DedupePolicy = "first"):
+        if policy not in DEDUPE_POLICIES:
+            raise ValueError(
+                f"Expected deduplication policy to be one of {DEDUPE_POLICIES}, got '{policy}'"
+            )
+        self.policy = policy
+        # position of the row in `NodeSet.nodes` by node set fingerprint and merge key values
+        self._rows: Dict[Hashable, Dict[Hashable, int]] = {}
+
+    def add(self, fingerprint: Hashable, node_set: NodeSet, row: Dict) -> bool:
+        """Add a row to the node set, unless it duplicates a buffered row.
+
+        Returns:
+            bool: False if the row was combined with a buffered row
+        """
+        rows = self._rows.get(fingerprint)
+        if rows is None:
+            rows = self._rows[fingerprint] = {}
+        key = get_merge_values_key(row, node_set.merge_keys)
+        position = rows.get(key)
+        if position is None:
+            rows[key] = len(node_set.nodes)
+            node_set.add_node(row)
+            return True
+        if self.policy == "last":
+            node_set.nodes[position] = row
+        elif self.policy == "union":
+            # a plain copy, the buffered row may be a `Node` that is still referenced elsewhere
+            combined = dict(node_set.nodes[position])
+            combined.update(row)
+            node_set.nodes[position] = combined
+        return False
+
+    def clear(self):
+        self._rows = {}
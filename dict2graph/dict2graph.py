@@ -14,24 +14,67 @@ The above copyright notice and this permission notice shall be included in all c
 THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
+import os
 import json
+import time
+import hashlib
+import logging
+from itertools import accumulate
 from typing import Union
-from typing import List, Dict, Tuple, Type
+from typing import (
+    List,
+    Dict,
+    Tuple,
+    Type,
+    Iterable,
+    Literal,
+    Any,
+    Callable,
+    IO,
+    FrozenSet,
+    Optional,
+)
 from py2neo import Graph
 from neo4j import Driver
 
 from graphio import NodeSet, RelationshipSet
 from dict2graph.node import Node
 from dict2graph.relation import Relation
+from dict2graph.readers import iter_json_array, iter_jsonl, ReadStats
+from dict2graph.cache_index import LabelIndex, RelationTypeIndex
+from dict2graph.profiling import (
+    Profiler,
+    ProfileStats,
+    CountingIterable,
+    DeletionCounter,
+    DELETION_COUNTER,
+)
+from dict2graph.explain import PipelineExplanation, explain_containers
+from dict2graph.writer import UnwindWriter
+from dict2graph.dedupe import NodeDeduplicator, DedupePolicy, DEDUPE_POLICIES
+from dict2graph.pipeline import CompiledPipeline
+from dict2graph.parallel import iter_parallel_partials, ParsePartial
 from dict2graph.transformers._base import (
     _NodeTransformerBase,
     _RelationTransformerBase,
+    _RUNNING_DICT2GRAPH,
 )
 from dict2graph.transformers import Transformer
 from dict2graph.matcher_transformators_container import (
     MatcherTransformersContainer,
     MatcherTransformersContainerStack,
 )
+from dict2graph.traversal import (
+    TASK_DICT,
+    TASK_LIST,
+    TASK_BASIC,
+    ParseTask,
+    ParseFrame,
+    _DictFragmentFrame,
+    _ListFragmentFrame,
+)
+
+log = logging.getLogger(__name__)
 
 
 class Dict2graph:
@@ -76,6 +119,16 @@ class Dict2graph:
         empty_node_default_id_property_name: To prevent all empty nodes to merging together when doing
             `Dict2Graph.merge()`, they get an hash id by default.
             This is name/key for this property. Defaults to `id`.
+
+        parse_plan_cache_max_size: Maximum number of dict shapes that are cached when `cache_parse_plans` is enabled.
+            Dicts of further shapes will be parsed without a plan. Defaults to `1024`.
+
+        parse_plan_min_keys: Only dicts with at least this number of keys are parsed with a plan when `cache_parse_plans` is enabled.
+            For smaller dicts the plan lookup costs more than it saves. Defaults to `4`.
+
+        tombstone_compaction_threshold: Nodes and relationships deleted by transformers stay in the cache until it is flushed.
+            When their share of the cache exceeds this threshold, they are dropped between two transformer passes, so the following transformers do not visit them anymore.
+            Set to `None` to never compact. Defaults to `0.25`.
     """
 
     # Replacement strings {ITEM_PRIMARY_LABEL} and {ITEM_LABELs} are available
@@ -90,10 +143,21 @@ class Dict2graph:
 
     empty_node_default_id_property_name: str = "id"
 
+    parse_plan_cache_max_size: int = 1024
+    parse_plan_min_keys: int = 4
+    tombstone_compaction_threshold: Optional[float] = 0.25
+
     def __init__(
         self,
         create_ids_for_empty_nodes: bool = True,
         interpret_single_props_as_labels: bool = True,
+        iterative_traversal: bool = True,
+        merkle_hash_ids: bool = False,
+        cache_parse_plans: bool = False,
+        release_source_data: bool = False,
+        schedule_transformers: bool = True,
+        transformer_rounds: int = 1,
+        deduplicate_nodes: Optional[DedupePolicy] = None,
     ):
         """
         Usage:
@@ -106,21 +170,174 @@ class Dict2graph:
         Args:
             create_ids_for_empty_nodes (bool, optional): When input dicts results in empty 'hub' nodes, this will create artificially key properties based on the child data. The key will be deterministic . Defaults to True.
             interpret_single_props_as_labels (bool, optional): When having objects with a single property like `{"animal":{"name":"dog"}}` `animal` will be interpreted as label. If set to false "animal" will result in an extra Node. Defaults to True.
+            iterative_traversal (bool, optional): Walk through the input data with an explicit stack instead of recursive function calls.
+                The result is the same, but deeply nested data will not hit the python recursion limit. Defaults to True.
+            merkle_hash_ids (bool, optional): Generate the hash ids of list hubs, root nodes and empty nodes from a digest of the child data, that is computed once per node while parsing (Merkle tree style).
+                Much faster for large or nested lists than the legacy ids, which serialize the whole child tree for every hub. The ids are deterministic but differ from the legacy ids,
+                so do not switch this on when merging into a database that was filled with the legacy ids. Defaults to False.
+            cache_parse_plans (bool, optional): Remember how dicts of a certain shape (keys and value types) are parsed and re-use this plan for all following dicts of the same shape.
+                Speeds up parsing of homogeneous records. Up to `Dict2graph.parse_plan_cache_max_size` shapes are cached. Defaults to False.
+            release_source_data (bool, optional): Memory-lean mode. After a parsed dict is transformed and hashed, the buffered NodeSets/RelationshipSets only hold plain copies of the properties;
+                the source data of the nodes is released and the links between nodes and relationships are cut. The parsed input data can be garbage collected before the data is written to the database. Defaults to False.
+            schedule_transformers (bool, optional): Reorder independent transformers and run them in a shared pass over the cached nodes/relations,
+                based on what the transformers declare to read and write (see `TransformerAccess`). The result is the same as running them one by one.
+                Set to False to run every transformer matcher in its own pass, in the order the transformers were added. Defaults to True.
+            transformer_rounds (int, optional): Maximum number of rounds over all node transformers (and then all relation transformers) per flush.
+                A further round only runs, if the last round created new nodes or relations, so transformers can match the results of later transformers,
+                until nothing new is created (fixed point). Matchers created with `Transformer.match_nodes(incremental=True)` only visit the nodes
+                that were added since their last run, all other matchers visit the whole cache again. Defaults to 1.
+            deduplicate_nodes (Optional[Literal["first", "last", "union"]], optional): Buffer only one row per node set and merge key values, instead of one row per occurrence of a node.
+                The properties of the duplicates are combined by the given policy: "first" keeps the first occurrence, "last" keeps the last occurrence
+                and "union" keeps the properties of all occurrences (later occurrences win on conflicting properties).
+                The number of removed rows is available via `Dict2graph.removed_duplicate_nodes`. None to buffer every occurrence. Defaults to None.
+
+        Raises:
+            ValueError: When `deduplicate_nodes` is not a known policy.
         """
         self.create_ids_for_empty_nodes = create_ids_for_empty_nodes
 
         # Todo: "interpret_single_props_as_labels" should be a regualr NodeTransformer instead of a class param
         self.interpret_single_props_as_labels = interpret_single_props_as_labels
+        self.iterative_traversal = iterative_traversal
+        self.merkle_hash_ids = merkle_hash_ids
+        self.cache_parse_plans = cache_parse_plans
+        self.release_source_data = release_source_data
+        self.schedule_transformers = schedule_transformers
+        self.transformer_rounds = transformer_rounds
+        if deduplicate_nodes is not None and deduplicate_nodes not in DEDUPE_POLICIES:
+            raise ValueError(
+                f"Expected `deduplicate_nodes` to be None or one of {DEDUPE_POLICIES}, got '{deduplicate_nodes}'"
+            )
+        self.deduplicate_nodes = deduplicate_nodes
+        self._parse_plan_cache: Dict[Tuple, Tuple[Tuple, Tuple]] = {}
+        # label sets of root nodes, that can or can not be matched by any node transformer
+        self._transformable_label_sets: Dict[FrozenSet[str], bool] = {}
 
         self._node_cache: List[Node] = []
         self._node_cache_feeder: List[Node] = []
 
         self._rel_cache: List[Relation] = []
         self._rel_cache_feeder: List[Node] = []
+        # deleted nodes/relations that were compacted out of the cache. only kept to be released in memory-lean mode
+        self._compacted_tombstones: List[Union[Node, Relation]] = []
         self._nodeSets: Dict[Tuple, NodeSet] = {}
         self._relSets: Dict[Tuple, RelationshipSet] = {}
+        self._buffered_objects_count: int = 0
+        # only set while buffering with `deduplicate_nodes`. reset with the buffer
+        self._node_deduplicator: Optional[NodeDeduplicator] = None
+        self._removed_duplicate_nodes: int = 0
+        self.last_read_stats: ReadStats = None
         self.matcher_and_node_transformers_stack = MatcherTransformersContainerStack([])
         self.matcher_and_rel_transformers_stack = MatcherTransformersContainerStack([])
+        # only set while profiling is enabled; the flush checks for it once per step
+        self._profiler: Optional[Profiler] = None
+        self._profile_stats: Optional[ProfileStats] = None
+        # created on the first write with `writer="unwind"`, to keep its prepared statements for the following writes
+        self._unwind_writer: Optional[UnwindWriter] = None
+
+    def enable_profiling(
+        self, callback: Optional[Callable[[ProfileStats], None]] = None
+    ):
+        """Measure every flush of the cache: the time, visited candidates, matches, created and deleted nodes/relations
+        of every transformer matcher and the time to manifest the nodes and relations.
+        Enabling profiling again starts with fresh numbers.
+
+        **usage**:
+        ```python
+        d2g = Dict2graph()
+        d2g.enable_profiling(callback=lambda flush_stats: print(flush_stats))
+        d2g.parse(data)
+        print(d2g.stats())
+        ```
+
+        Args:
+            callback (Optional[Callable[[ProfileStats], None]], optional): Will be called with the `ProfileStats` of every single flush. Defaults to None.
+        """
+        self._profiler = Profiler(callback=callback)
+        self._profile_stats = self._profiler.totals
+
+    def disable_profiling(self):
+        """Stop measuring. The numbers collected so far stay available via `Dict2graph.stats()`."""
+        self._profiler = None
+
+    def stats(self) -> ProfileStats:
+        """The profiling numbers of all flushes since `Dict2graph.enable_profiling()` was called.
+
+        Returns:
+            ProfileStats: The summed up numbers, with one `ContainerStats` per transformer matcher
+        """
+        if self._profile_stats is None:
+            raise ValueError(
+                "Profiling is not enabled. Call `Dict2graph.enable_profiling()` first"
+            )
+        return self._profile_stats
+
+    def explain(
+        self,
+        sample_records: Iterable[Any],
+        total_records: Optional[int] = None,
+        root_node_labels: Union[str, List[str]] = None,
+    ) -> PipelineExplanation:
+        """Show the transformer pipeline: the matcher containers in the order they run, the labels/relation types each one matches and,
+        measured on a sample of records, the selectivity and cost per visited node/relation.
+        The sample is parsed by a scratch copy of this instance; this instance and its buffer stay untouched.
+
+        **usage**:
+        ```python
+        d2g = Dict2graph()
+        d2g.add_transformation(...)
+        print(d2g.explain(records[:1000], total_records=len(records)))
+        ```
+
+        Args:
+            sample_records (Iterable[Any]): Records as passed to `Dict2graph.parse()`
+            total_records (Optional[int], optional): Number of records of a full run. If given, the time of the full run is extrapolated from the sample. Defaults to None.
+            root_node_labels (Union[str, List[str]], optional): See `Dict2graph.parse()`. Defaults to None.
+
+        Returns:
+            PipelineExplanation: The explanation. `str()` it for a readable report
+        """
+        scratch = self.compile().create_worker()
+        scratch.enable_profiling()
+        sample_count = 0
+        start = time.perf_counter()
+        for record in sample_records:
+            scratch.parse(record, root_node_labels=root_node_labels)
+            sample_count += 1
+        # parsing, transforming and manifesting. writing to the database is not part of the estimate
+        sample_seconds = time.perf_counter() - start
+        stats = scratch.stats()
+        sample_manifest_seconds = (
+            stats.manifest_node_seconds + stats.manifest_relation_seconds
+        )
+        scale = (
+            total_records / sample_count
+            if total_records is not None and sample_count
+            else None
+        )
+        explanation = PipelineExplanation(
+            sample_records=sample_count,
+            total_records=total_records,
+            sample_seconds=sample_seconds,
+            sample_transformation_seconds=stats.transformation_seconds,
+            sample_manifest_seconds=sample_manifest_seconds,
+            estimated_seconds=sample_seconds * scale if scale is not None else None,
+            stats=stats,
+        )
+        for kind, stack in (
+            ("node", self.matcher_and_node_transformers_stack),
+            ("relation", self.matcher_and_rel_transformers_stack),
+        ):
+            explanation.containers.extend(
+                explain_containers(
+                    kind,
+                    stack.containers,
+                    self._get_transformer_passes(stack),
+                    stats,
+                    scale,
+                )
+            )
+        return explanation
 
     def add_transformation(
         self,
@@ -197,7 +414,9 @@ class Dict2graph:
             )
         else:
             transformer.d2g = self
+            transformer.matcher._compile()
             self.matcher_and_node_transformers_stack.add_container(transformer)
+            self._transformable_label_sets = {}
 
     def add_relation_transformation(
         self,
@@ -216,6 +435,7 @@ class Dict2graph:
                 f"Expected transformer matcher of class '{Transformer.RelTransformerMatcher}', got '{transformer.matcher.__class__}'.\nMaybe you accidentally added a node matcher instead of a relationship matcher (`match_rels()` vs. `match_nodes()`) while using `Dict2graph.add_relation_transformation()`?"
             )
         else:
+            transformer.matcher._compile()
             self.matcher_and_rel_transformers_stack.add_container(transformer)
 
     def parse(
@@ -267,7 +487,15 @@ class Dict2graph:
                     type(data_obj).__name__
                 )
             )
-        if isinstance(data_obj, dict):
+        if isinstance(data_obj, dict) and self._parse_flat_record(
+            labels=root_node_labels, data=data_obj
+        ):
+            return self
+        if self.iterative_traversal:
+            root_node = self._parse_traverse_iterative(
+                labels=root_node_labels, data=data_obj
+            )
+        elif isinstance(data_obj, dict):
 
             root_node = self._parse_traverse_dict_fragment(
                 labels=root_node_labels, data=data_obj, parent_node=None
@@ -282,11 +510,467 @@ class Dict2graph:
         self._flush_cache()
         return self
 
+    def parse_iter(
+        self,
+        records: Iterable[Dict],
+        root_node_labels: Union[str, List[str]] = None,
+        graph: Union[Graph, Driver] = None,
+        flush_every: int = 1000,
+        flush_every_objects: int = None,
+        database: str = None,
+        write_mode: Literal["merge", "create"] = "merge",
+        create_merge_indexes: bool = True,
+        writer: Union[Literal["graphio", "unwind"], UnwindWriter] = "graphio",
+    ) -> "Dict2graph":
+        """Parse any iterable/iterator of records (e.g. a generator reading a file or a database cursor) with bounded memory.
+        Every `flush_every` records (or every `flush_every_objects` buffered nodes and relations, whatever comes first)
+        the buffered data is written to `graph` and the internal buffer is cleared.
+        The peak memory is determined by the flush threshold and not by the size of the whole dataset.
+
+        **usage**
+        ```python
+        from dict2graph import Dict2graph
+        from neo4j import GraphDatabase
+
+        def read_records():
+            for i in range(1000000):
+                yield {"person": {"id": i}}
+
+        d2g = Dict2graph()
+        d2g.parse_iter(read_records(), graph=GraphDatabase.driver("neo4j://localhost"), flush_every=10000)
+        ```
+
+        Args:
+            records (Iterable[Dict]): An iterable of records. Every record will be handled like a single `Dict2graph.parse()` call.
+            root_node_labels (Union[str, List[str]], optional): Same as in `Dict2graph.parse()`; applied to every record. Defaults to None.
+            graph (Union[Graph, Driver], optional): The Neo4j database to write the buffered data to.
+                If None, nothing will be written and all records land in the dict2graph internal cache like with `Dict2graph.parse()`. Defaults to None.
+            flush_every (int, optional): Write and clear the buffer every n records. Defaults to 1000.
+            flush_every_objects (int, optional): Write and clear the buffer when more than n nodes and relations are buffered. Defaults to None.
+            database (str, optional): Name of the Neo4j database. Defaults to None which will be the default "neo4j" db.
+            write_mode (Literal["merge", "create"], optional): Write the data with `Dict2graph.merge()` or `Dict2graph.create()`. Defaults to "merge".
+            create_merge_indexes (bool, optional): When merging, create indexes for the merge keys of new node types. Defaults to True.
+            writer (Union[Literal["graphio", "unwind"], UnwindWriter], optional): See `Dict2graph.merge()`. Defaults to "graphio".
+
+        Raises:
+            ValueError: When `write_mode` or `writer` is unknown or a record is not parsable.
+
+        Returns:
+            Dict2graph: Returns itself to be able to chain commands
+        """
+        if write_mode not in ["merge", "create"]:
+            raise ValueError(
+                f"Expected `write_mode` to be 'merge' or 'create', got '{write_mode}'"
+            )
+        self._get_unwind_writer(writer)
+        indexed_node_types = set()
+        records_since_flush: int = 0
+        for record in records:
+            self.parse(record, root_node_labels=root_node_labels)
+            records_since_flush += 1
+            if graph is None:
+                continue
+            if (flush_every and records_since_flush >= flush_every) or (
+                flush_every_objects
+                and self._buffered_objects_count >= flush_every_objects
+            ):
+                self._write_and_clear_buffer(
+                    graph,
+                    database,
+                    write_mode,
+                    create_merge_indexes,
+                    indexed_node_types,
+                    writer,
+                )
+                records_since_flush = 0
+        if graph is not None:
+            self._write_and_clear_buffer(
+                graph,
+                database,
+                write_mode,
+                create_merge_indexes,
+                indexed_node_types,
+                writer,
+            )
+        return self
+
+    def parse_json_file(
+        self,
+        file: Union[str, os.PathLike, IO],
+        root_node_labels: Union[str, List[str]] = None,
+        json_path: Union[str, List[str]] = None,
+        graph: Union[Graph, Driver] = None,
+        flush_every: int = 1000,
+        flush_every_objects: int = None,
+        database: str = None,
+        write_mode: Literal["merge", "create"] = "merge",
+        create_merge_indexes: bool = True,
+        writer: Union[Literal["graphio", "unwind"], UnwindWriter] = "graphio",
+    ) -> "Dict2graph":
+        """Parse a json file that contains a (possibly huge) array of records, without loading the whole file into memory.
+        The array elements are read incrementally and passed to `Dict2graph.parse_iter()`.
+        If the optional package `ijson` is installed, it will be used for faster reading.
+
+        **usage**
+        ```python
+        from dict2graph import Dict2graph
+        from neo4j import GraphDatabase
+
+        # file content: {"meta": {"version": 2}, "results": {"items": [{"person": {"id": 1}}, {"person": {"id": 2}}]}}
+        d2g = Dict2graph()
+        d2g.parse_json_file("export.json", json_path="results.items", graph=GraphDatabase.driver("neo4j://localhost"))
+        ```
+
+        Args:
+            file (Union[str, os.PathLike, IO]): A path to a json file or an opened file object.
+            root_node_labels (Union[str, List[str]], optional): Same as in `Dict2graph.parse()`; applied to every record. Defaults to None.
+            json_path (Union[str, List[str]], optional): Path of object keys to the array of records, as list or dot separated string (e.g. "results.items").
+                If None, the top-level value of the file must be the array. Defaults to None.
+            graph (Union[Graph, Driver], optional): See `Dict2graph.parse_iter()`. Defaults to None.
+            flush_every (int, optional): See `Dict2graph.parse_iter()`. Defaults to 1000.
+            flush_every_objects (int, optional): See `Dict2graph.parse_iter()`. Defaults to None.
+            database (str, optional): See `Dict2graph.parse_iter()`. Defaults to None.
+            write_mode (Literal["merge", "create"], optional): See `Dict2graph.parse_iter()`. Defaults to "merge".
+            create_merge_indexes (bool, optional): See `Dict2graph.parse_iter()`. Defaults to True.
+            writer (Union[Literal["graphio", "unwind"], UnwindWriter], optional): See `Dict2graph.merge()`. Defaults to "graphio".
+
+        Raises:
+            ValueError: When the file is not valid json or `json_path` does not point to an array.
+
+        Returns:
+            Dict2graph: Returns itself to be able to chain commands
+        """
+        return self.parse_iter(
+            iter_json_array(file, json_path=json_path),
+            root_node_labels=root_node_labels,
+            graph=graph,
+            flush_every=flush_every,
+            flush_every_objects=flush_every_objects,
+            database=database,
+            write_mode=write_mode,
+            create_merge_indexes=create_merge_indexes,
+            writer=writer,
+        )
+
+    def parse_jsonl(
+        self,
+        file: Union[str, os.PathLike],
+        root_node_labels: Union[str, List[str]] = None,
+        graph: Union[Graph, Driver] = None,
+        flush_every: int = 1000,
+        flush_every_objects: int = None,
+        database: str = None,
+        write_mode: Literal["merge", "create"] = "merge",
+        create_merge_indexes: bool = True,
+        writer: Union[Literal["graphio", "unwind"], UnwindWriter] = "graphio",
+    ) -> "Dict2graph":
+        """Parse a json lines (NDJSON) file with one record per line, without loading the whole file into memory.
+        The file is memory-mapped and read in newline-bounded chunks; gzip compressed files are decompressed as a stream.
+        The records are passed to `Dict2graph.parse_iter()`.
+        The read throughput (bytes/s and records/s) is logged and available afterwards in `Dict2graph.last_read_stats`.
+
+        **usage**
+        ```python
+        from dict2graph import Dict2graph
+        from neo4j import GraphDatabase
+
+        # file content (one record per line):
+        # {"person": {"id": 1}}
+        # {"person": {"id": 2}}
+        d2g = Dict2graph()
+        d2g.parse_jsonl("export.jsonl.gz", graph=GraphDatabase.driver("neo4j://localhost"))
+        print(d2g.last_read_stats)
+        ```
+
+        Args:
+            file (Union[str, os.PathLike]): Path to a json lines file. Can be gzip compressed.
+            root_node_labels (Union[str, List[str]], optional): Same as in `Dict2graph.parse()`; applied to every record. Defaults to None.
+            graph (Union[Graph, Driver], optional): See `Dict2graph.parse_iter()`. Defaults to None.
+            flush_every (int, optional): See `Dict2graph.parse_iter()`. Defaults to 1000.
+            flush_every_objects (int, optional): See `Dict2graph.parse_iter()`. Defaults to None.
+            database (str, optional): See `Dict2graph.parse_iter()`. Defaults to None.
+            write_mode (Literal["merge", "create"], optional): See `Dict2graph.parse_iter()`. Defaults to "merge".
+            create_merge_indexes (bool, optional): See `Dict2graph.parse_iter()`. Defaults to True.
+            writer (Union[Literal["graphio", "unwind"], UnwindWriter], optional): See `Dict2graph.merge()`. Defaults to "graphio".
+
+        Raises:
+            ValueError: When a line is not valid json.
+
+        Returns:
+            Dict2graph: Returns itself to be able to chain commands
+        """
+        self.last_read_stats = ReadStats()
+        self.parse_iter(
+            iter_jsonl(file, stats=self.last_read_stats),
+            root_node_labels=root_node_labels,
+            graph=graph,
+            flush_every=flush_every,
+            flush_every_objects=flush_every_objects,
+            database=database,
+            write_mode=write_mode,
+            create_merge_indexes=create_merge_indexes,
+            writer=writer,
+        )
+        log.info(f"Ingested '{file}': {self.last_read_stats}")
+        return self
+
+    def parse_parallel(
+        self,
+        records: Iterable[Dict],
+        root_node_labels: Union[str, List[str]] = None,
+        workers: int = None,
+        records_per_shard: int = 1000,
+        graph: Union[Graph, Driver] = None,
+        flush_every: int = 10000,
+        flush_every_objects: int = None,
+        database: str = None,
+        write_mode: Literal["merge", "create"] = "merge",
+        create_merge_indexes: bool = True,
+        writer: Union[Literal["graphio", "unwind"], UnwindWriter] = "graphio",
+    ) -> "Dict2graph":
+        """Parse records in multiple processes to use more than one CPU core.
+        The configuration of this Dict2graph instance (options and transformers) is sent once to every worker process.
+        The workers parse shards of `records_per_shard` records and send back the resulting node and relationship sets,
+        which are merged into this instance in the order of the records.
+
+        Every record is parsed independently like with `Dict2graph.parse_iter()`.
+        Your transformers must be picklable (e.g. no lambdas or classes defined in a function) and must not depend on state shared between records.
+
+        **usage**
+        ```python
+        from dict2graph import Dict2graph
+        from neo4j import GraphDatabase
+
+        def read_records():
+            for i in range(1000000):
+                yield {"person": {"id": i}}
+
+        d2g = Dict2graph()
+        d2g.parse_parallel(read_records(), workers=8, graph=GraphDatabase.driver("neo4j://localhost"))
+        ```
+
+        Args:
+            records (Iterable[Dict]): An iterable of records. Every record will be handled like a single `Dict2graph.parse()` call.
+            root_node_labels (Union[str, List[str]], optional): Same as in `Dict2graph.parse()`; applied to every record. Defaults to None.
+            workers (int, optional): Number of worker processes. If 1, the records are parsed in this process with `Dict2graph.parse_iter()`.
+                Defaults to None, which is the number of CPUs.
+            records_per_shard (int, optional): Number of records sent to a worker at once. Defaults to 1000.
+            graph (Union[Graph, Driver], optional): See `Dict2graph.parse_iter()`. Defaults to None.
+            flush_every (int, optional): See `Dict2graph.parse_iter()`. Checked after each merged shard. Defaults to 10000.
+            flush_every_objects (int, optional): See `Dict2graph.parse_iter()`. Checked after each merged shard. Defaults to None.
+            database (str, optional): See `Dict2graph.parse_iter()`. Defaults to None.
+            write_mode (Literal["merge", "create"], optional): See `Dict2graph.parse_iter()`. Defaults to "merge".
+            create_merge_indexes (bool, optional): See `Dict2graph.parse_iter()`. Defaults to True.
+            writer (Union[Literal["graphio", "unwind"], UnwindWriter], optional): See `Dict2graph.merge()`. Defaults to "graphio".
+
+        Raises:
+            ValueError: When `write_mode` or `writer` is unknown or a record is not parsable.
+
+        Returns:
+            Dict2graph: Returns itself to be able to chain commands
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1:
+            return self.parse_iter(
+                records,
+                root_node_labels=root_node_labels,
+                graph=graph,
+                flush_every=flush_every,
+                flush_every_objects=flush_every_objects,
+                database=database,
+                write_mode=write_mode,
+                create_merge_indexes=create_merge_indexes,
+                writer=writer,
+            )
+        if write_mode not in ["merge", "create"]:
+            raise ValueError(
+                f"Expected `write_mode` to be 'merge' or 'create', got '{write_mode}'"
+            )
+        self._get_unwind_writer(writer)
+        indexed_node_types = set()
+        records_since_flush: int = 0
+        for partial, record_count in iter_parallel_partials(
+            self, records, root_node_labels, workers, records_per_shard
+        ):
+            self._import_buffer(partial)
+            records_since_flush += record_count
+            if graph is None:
+                continue
+            if (flush_every and records_since_flush >= flush_every) or (
+                flush_every_objects
+                and self._buffered_objects_count >= flush_every_objects
+            ):
+                self._write_and_clear_buffer(
+                    graph,
+                    database,
+                    write_mode,
+                    create_merge_indexes,
+                    indexed_node_types,
+                    writer,
+                )
+                records_since_flush = 0
+        if graph is not None:
+            self._write_and_clear_buffer(
+                graph,
+                database,
+                write_mode,
+                create_merge_indexes,
+                indexed_node_types,
+                writer,
+            )
+        return self
+
+    def compile(self) -> CompiledPipeline:
+        """Freeze the options and transformers of this instance into an immutable, picklable `CompiledPipeline`.
+        The pipeline creates any number of `Dict2graph` workers, that share the transformers and can run concurrently in threads or processes.
+        Later changes to this instance do not affect the pipeline.
+
+        **usage**:
+        ```python
+        d2g = Dict2graph()
+        d2g.add_transformation(...)
+        pipeline = d2g.compile()
+        worker = pipeline.create_worker()
+        worker.parse(data)
+        ```
+
+        Returns:
+            CompiledPipeline: The pipeline
+        """
+        return CompiledPipeline.from_dict2graph(self)
+
+    def _export_buffer(self) -> ParsePartial:
+        """Export the content of `_nodeSets` and `_relSets` as plain picklable data.
+        Start and end nodes of relationships are reduced to their merge properties.
+
+        Returns:
+            ParsePartial: node set partials and relationship set partials, keyed by their fingerprints
+        """
+        node_partials = {
+            fingerprint: (
+                node_set.labels,
+                node_set.merge_keys,
+                [dict(node) for node in node_set.nodes],
+            )
+            for fingerprint, node_set in self._nodeSets.items()
+        }
+        rel_partials = {}
+        for fingerprint, rel_set in self._relSets.items():
+            rows = [
+                (
+                    self._get_key_subset(start, rel_set.start_node_properties),
+                    self._get_key_subset(end, rel_set.end_node_properties),
+                    dict(props),
+                )
+                for start, end, props in rel_set.relationships
+            ]
+            rel_partials[fingerprint] = (
+                rel_set.rel_type,
+                rel_set.start_node_labels,
+                rel_set.end_node_labels,
+                rel_set.start_node_properties,
+                rel_set.end_node_properties,
+                rows,
+            )
+        return node_partials, rel_partials
+
+    def _get_key_subset(self, props: Dict, keys: List[str]) -> Dict:
+        return {key: props[key] for key in keys if key in props}
+
+    def _import_buffer(self, partial: ParsePartial):
+        """Merge a partial, created by `Dict2graph._export_buffer()` (e.g. in another process), into `_nodeSets` and `_relSets`."""
+        node_partials, rel_partials = partial
+        for fingerprint, (labels, merge_keys, rows) in node_partials.items():
+            if fingerprint not in self._nodeSets:
+                self._nodeSets[fingerprint] = NodeSet(
+                    labels=labels, merge_keys=merge_keys
+                )
+            if self.deduplicate_nodes is not None:
+                for row in rows:
+                    self._add_node_row(fingerprint, self._nodeSets[fingerprint], row)
+                continue
+            # the node sets are created by dict2graph without default props or deduplication,
+            # so the rows can be appended without going through `NodeSet.add_node()`
+            self._nodeSets[fingerprint].nodes.extend(rows)
+            self._buffered_objects_count += len(rows)
+        for fingerprint, (
+            rel_type,
+            start_node_labels,
+            end_node_labels,
+            start_node_properties,
+            end_node_properties,
+            rows,
+        ) in rel_partials.items():
+            if fingerprint not in self._relSets:
+                self._relSets[fingerprint] = RelationshipSet(
+                    rel_type=rel_type,
+                    start_node_labels=start_node_labels,
+                    end_node_labels=end_node_labels,
+                    start_node_properties=start_node_properties,
+                    end_node_properties=end_node_properties,
+                )
+            self._relSets[fingerprint].relationships.extend(rows)
+            self._buffered_objects_count += len(rows)
+
+    def _write_and_clear_buffer(
+        self,
+        graph: Union[Graph, Driver],
+        database: str,
+        write_mode: Literal["merge", "create"],
+        create_merge_indexes: bool,
+        indexed_node_types: set,
+        writer: Union[Literal["graphio", "unwind"], UnwindWriter],
+    ):
+        if write_mode == "merge":
+            if create_merge_indexes:
+                # only create indexes for node types we did not see in a previous flush
+                for node_type_fingerprint, nodes in self._nodeSets.items():
+                    if node_type_fingerprint not in indexed_node_types:
+                        nodes.create_index(graph)
+                        indexed_node_types.add(node_type_fingerprint)
+            self.merge(
+                graph, database=database, create_merge_indexes=False, writer=writer
+            )
+        else:
+            self.create(graph, database=database, writer=writer)
+        self._clear_buffer()
+
+    def _clear_buffer(self):
+        self._nodeSets = {}
+        self._relSets = {}
+        self._buffered_objects_count = 0
+        self._node_deduplicator = None
+
+    @property
+    def removed_duplicate_nodes(self) -> int:
+        """Number of node rows that were combined with a buffered row of the same merge key values, since the instance was created.
+        Always 0 without `Dict2graph(deduplicate_nodes=...)`. Rows removed by the worker processes of `Dict2graph.parse_parallel()` are not counted."""
+        return self._removed_duplicate_nodes
+
+    def _add_node_row(self, fingerprint: Tuple, node_set: NodeSet, row: Dict) -> bool:
+        """Add a row to a buffered node set, or combine it with a buffered row of the same merge key values when deduplicating.
+
+        Returns:
+            bool: False if the row was a duplicate
+        """
+        if self.deduplicate_nodes is None:
+            node_set.add_node(row)
+        else:
+            if self._node_deduplicator is None:
+                self._node_deduplicator = NodeDeduplicator(self.deduplicate_nodes)
+            if not self._node_deduplicator.add(fingerprint, node_set, row):
+                self._removed_duplicate_nodes += 1
+                return False
+        self._buffered_objects_count += 1
+        return True
+
     def merge(
         self,
         graph: Union[Graph, Driver],
         database: str = None,
         create_merge_indexes: bool = True,
+        writer: Union[Literal["graphio", "unwind"], UnwindWriter] = "graphio",
     ):
         """Push the data to a Neo4h database, with a merge operation.
 
@@ -310,10 +994,19 @@ class Dict2graph:
                 or a [`py2neo.Graph` instance](https://py2neo.org/2021.1/workflow.html#graph-objects)
             database (str, optional): Name of the Neo4j [database](https://neo4j.com/docs/cypher-manual/current/databases/). Defaults to None which will eb the default "neo4j" db.
             create_merge_indexes (bool, optional): _description_. Defaults to True.
-        """
+            writer (Union[Literal["graphio", "unwind"], UnwindWriter], optional): "graphio" writes every NodeSet/RelationshipSet with graphio.
+                "unwind" or an `UnwindWriter` instance (e.g. with another number of rows per transaction) writes them with one prepared `UNWIND` statement per set,
+                directly with the neo4j driver. The writer needs a `neo4j.GraphDatabase` driver. Defaults to "graphio".
 
+        Raises:
+            ValueError: When `writer` is unknown.
+        """
+        unwind_writer = self._get_unwind_writer(writer)
         if create_merge_indexes:
             self.create_indexes_for_merge_keys(graph)
+        if unwind_writer is not None:
+            unwind_writer.merge(graph, self._nodeSets, self._relSets, database=database)
+            return
         for nodes in self._nodeSets.values():
             nodes.merge(graph, database=database)
         for rels in self._relSets.values():
@@ -323,6 +1016,7 @@ class Dict2graph:
         self,
         graph: Union[Graph, Driver],
         database: str = None,
+        writer: Union[Literal["graphio", "unwind"], UnwindWriter] = "graphio",
     ):
         """Push the data to a Neo4h database, with a create operation.
 
@@ -345,79 +1039,365 @@ class Dict2graph:
             graph (Union[Graph, Driver]): A [Neo4j python driver instance](https://neo4j.com/docs/api/python-driver/current/)
                 or a [`py2neo.Graph` instance](https://py2neo.org/2021.1/workflow.html#graph-objects)
             database (str, optional): Name of the Neo4j [database](https://neo4j.com/docs/cypher-manual/current/databases/). Defaults to None which will eb the default "neo4j" db.
+            writer (Union[Literal["graphio", "unwind"], UnwindWriter], optional): See `Dict2graph.merge()`. Defaults to "graphio".
+
+        Raises:
+            ValueError: When `writer` is unknown.
         """
+        unwind_writer = self._get_unwind_writer(writer)
+        if unwind_writer is not None:
+            unwind_writer.create(
+                graph, self._nodeSets, self._relSets, database=database
+            )
+            return
         for nodes in self._nodeSets.values():
             nodes.create(graph, database=database)
         for rels in self._relSets.values():
             rels.create(graph, database=database)
 
+    def _get_unwind_writer(
+        self, writer: Union[Literal["graphio", "unwind"], UnwindWriter]
+    ) -> Optional[UnwindWriter]:
+        """The `UnwindWriter` to write with instead of graphio. None to write with graphio"""
+        if isinstance(writer, UnwindWriter):
+            return writer
+        if writer == "graphio":
+            return None
+        if writer == "unwind":
+            if self._unwind_writer is None:
+                self._unwind_writer = UnwindWriter()
+            return self._unwind_writer
+        raise ValueError(
+            f"Expected `writer` to be 'graphio', 'unwind' or an `UnwindWriter`, got '{writer}'"
+        )
+
     def create_indexes_for_merge_keys(self, graph: Union[Graph, Driver]):
         for nodes in self._nodeSets.values():
 
             nodes.create_index(graph)
 
+    def _parse_flat_record(self, labels: List[str], data: Dict) -> bool:
+        """Fast path for records that only consist of basic typed values and that no node transformer can match.
+        Such a record results in exactly one node; its properties are added to the matching NodeSet directly,
+        without creating a `Node` and without running through the transformation machinery.
+
+        Returns:
+            bool: False if the record is not flat or could be matched by a transformer and must be parsed the regular way.
+        """
+        start = time.perf_counter() if self._profiler is not None else 0.0
+        labels_key = frozenset(labels)
+        transformable = self._transformable_label_sets.get(labels_key)
+        if transformable is None:
+            transformable = any(
+                container.matcher._match_labels(labels)
+                for container in self.matcher_and_node_transformers_stack.containers
+            )
+            self._transformable_label_sets[labels_key] = transformable
+        if transformable:
+            return False
+        props: Dict = {}
+        for key, val in data.items():
+            if self._is_basic_attribute_type(val):
+                props[key] = val
+            elif val is not None:
+                return False
+        if not props:
+            # an empty node gets a hash id as root node. leave it to the regular way.
+            return False
+        node_type_fingerprint = (labels_key, frozenset(props))
+        node_set = self._nodeSets.get(node_type_fingerprint)
+        if node_set is None:
+            node_set = self._nodeSets[node_type_fingerprint] = NodeSet(
+                labels=list(labels), merge_keys=list(props)
+            )
+        added = self._add_node_row(node_type_fingerprint, node_set, props)
+        if self._profiler is not None:
+            self._profiler.add_flat_record_node(
+                time.perf_counter() - start, deduplicated=not added
+            )
+        return True
+
     def _prepare_root_node(self, node: Node):
         node.is_root_node = True
         if len(node.keys()) == 0:
-            node[self.root_node_default_id_property_name] = node.get_hash(
-                include_children_data=True
-            )
+            node[
+                self.root_node_default_id_property_name
+            ] = self._get_children_data_hash(node)
 
             node.merge_property_keys = [self.root_node_default_id_property_name]
 
     def _parse_traverse_dict_fragment(
         self, data: Dict, parent_node: Node, labels: List[str] = None
     ) -> Node:
+        new_node, child_tasks = self._create_dict_fragment_node(
+            labels=labels, data=data, parent_node=parent_node
+        )
+        new_child_nodes: List[Tuple[Node, str]] = []
+        for kind, child_labels, child_data, relation_type in child_tasks:
+            if kind == TASK_DICT:
+                n = self._parse_traverse_dict_fragment(
+                    labels=child_labels, data=child_data, parent_node=new_node
+                )
+            else:
+                n = self._parse_traverse_list_fragment(
+                    labels=child_labels, data=child_data, parent_node=new_node
+                )
+            new_child_nodes.append((n, relation_type))
+        return self._finish_dict_fragment(new_node, new_child_nodes)
+
+    def _parse_traverse_list_fragment(
+        self, labels: List[str], parent_node: Node, data: Dict
+    ) -> Node:
+        list_root_hub_node = self._create_list_fragment_hub_node(
+            labels=labels, data=data, parent_node=parent_node
+        )
+        # parse nodes
+        new_list_item_nodes: List[Node] = []
+        for obj in data:
+            task = self._get_list_item_task(labels, obj)
+            if task is None:
+                continue
+            kind, item_labels, item_data, _ = task
+            if kind == TASK_BASIC:
+                new_list_item_nodes.append(
+                    self._create_basic_list_item_node(
+                        labels=item_labels, data=item_data, hub_node=list_root_hub_node
+                    )
+                )
+            elif kind == TASK_DICT:
+                new_list_item_nodes.append(
+                    self._parse_traverse_dict_fragment(
+                        labels=item_labels,
+                        data=item_data,
+                        parent_node=list_root_hub_node,
+                    )
+                )
+            else:
+                new_list_item_nodes.append(
+                    self._parse_traverse_list_fragment(
+                        labels=item_labels,
+                        data=item_data,
+                        parent_node=list_root_hub_node,
+                    )
+                )
+        return self._finish_list_fragment(list_root_hub_node, new_list_item_nodes)
+
+    def _parse_traverse_iterative(self, labels: List[str], data: Union[Dict, List]):
+        """Explicit-stack variant of `_parse_traverse_dict_fragment`/`_parse_traverse_list_fragment`.
+        Builds exactly the same nodes and relations in the same order, but is not limited by the python recursion limit.
+        """
+        # bind the hot helpers locally; this loop runs once per dict/list fragment
+        open_parse_frame = self._open_parse_frame
+        get_list_item_task = self._get_list_item_task
+        create_basic_list_item_node = self._create_basic_list_item_node
+        finish_dict_fragment = self._finish_dict_fragment
+        finish_list_fragment = self._finish_list_fragment
+        DictFrame = _DictFragmentFrame
+
+        stack: List[ParseFrame] = [
+            open_parse_frame(
+                TASK_DICT if isinstance(data, dict) else TASK_LIST,
+                labels,
+                data,
+                None,
+            )
+        ]
+        while True:
+            frame = stack[-1]
+            is_dict_frame = frame.__class__ is DictFrame
+            next_task: ParseTask = None
+            if is_dict_frame:
+                if frame.index < len(frame.tasks):
+                    next_task = frame.tasks[frame.index]
+                    frame.index += 1
+                    frame.pending_relation_type = next_task[3]
+            else:
+                items = frame.data
+                index = frame.index
+                while index < len(items):
+                    task = get_list_item_task(frame.labels, items[index])
+                    index += 1
+                    if task is None:
+                        continue
+                    if task[0] == TASK_BASIC:
+                        frame.children.append(
+                            create_basic_list_item_node(task[1], task[2], frame.node)
+                        )
+                        continue
+                    next_task = task
+                    break
+                frame.index = index
+            if next_task is not None:
+                stack.append(
+                    open_parse_frame(
+                        next_task[0], next_task[1], next_task[2], frame.node
+                    )
+                )
+                continue
+            # the fragment is complete. hand over the result to the parent fragment
+            stack.pop()
+            if is_dict_frame:
+                finished_node = finish_dict_fragment(frame.node, frame.children)
+            else:
+                finished_node = finish_list_fragment(frame.node, frame.children)
+            if not stack:
+                return finished_node
+            parent_frame = stack[-1]
+            if parent_frame.__class__ is DictFrame:
+                parent_frame.children.append(
+                    (finished_node, parent_frame.pending_relation_type)
+                )
+            else:
+                parent_frame.children.append(finished_node)
+
+    def _open_parse_frame(
+        self, kind: int, labels: List[str], data: Union[Dict, List], parent_node: Node
+    ) -> ParseFrame:
+        if kind == TASK_DICT:
+            node, child_tasks = self._create_dict_fragment_node(
+                labels=labels, data=data, parent_node=parent_node
+            )
+            return _DictFragmentFrame(node, child_tasks)
+        return _ListFragmentFrame(
+            self._create_list_fragment_hub_node(
+                labels=labels, data=data, parent_node=parent_node
+            ),
+            labels,
+            data,
+        )
+
+    def _create_dict_fragment_node(
+        self, labels: List[str], data: Dict, parent_node: Node
+    ) -> Tuple[Node, List[ParseTask]]:
+        """Create the node for a dict fragment and attach all basic typed values as properties.
+
+        Returns:
+            Tuple[Node, List[ParseTask]]: The new node and the nested values (dicts and lists) that will become child nodes, in their original order.
+        """
+        # for small dicts, looking up the plan costs more than it saves
+        use_plan = self.cache_parse_plans and len(data) >= self.parse_plan_min_keys
+        if use_plan:
+            # the structural shape of the dict: its keys and the types of its values
+            shape = (tuple(data), tuple(map(type, data.values())))
+            plan = self._parse_plan_cache.get(shape)
+            if plan is not None:
+                return self._create_dict_fragment_node_from_plan(
+                    labels, data, parent_node, plan
+                )
         new_node = Node(labels=labels, source_data=data, parent_node=parent_node)
-        new_child_nodes: List[Node] = []
-        new_rels: List[Relation] = []
+        child_tasks: List[ParseTask] = []
         for key, val in data.items():
             if self._is_basic_attribute_type(val):
                 # value is a simple type. attach as property to node
                 new_node[key] = val
+            # value is dict or list in itself and therefore one or multiple child nodes
+            elif isinstance(val, dict):
+                if self._is_named_obj(val):
+                    obj_label = list(val.keys())[0]
+                    child_tasks.append((TASK_DICT, [obj_label], val[obj_label], key))
+                else:
+                    child_tasks.append((TASK_DICT, [key], val, None))
+            elif isinstance(val, list):
+                child_tasks.append((TASK_LIST, [key], val, None))
+            elif val is not None:
+                raise ValueError(
+                    f"Expected dict val to be a None, basic type, a list or a dict. Got `{type(val)}` for key '{key}' value '{val}'"
+                )
+        if use_plan and len(self._parse_plan_cache) < self.parse_plan_cache_max_size:
+            self._parse_plan_cache[shape] = self._get_dict_fragment_plan(data)
+        return new_node, child_tasks
+
+    def _get_dict_fragment_plan(self, data: Dict) -> Tuple[Tuple, Tuple]:
+        """Create a parse plan for all dicts with the same shape (keys and value types) as `data`.
+        `data` must already have passed the generic `Dict2graph._create_dict_fragment_node()`.
+
+        Returns:
+            Tuple[Tuple, Tuple]: The keys of all values that are not basic typed (nested values and None)
+                and the keys of the nested values, with a flag if the nested value is a list, in their original order.
+        """
+        non_basic_keys = tuple(
+            key for key, val in data.items() if not self._is_basic_attribute_type(val)
+        )
+        nested_keys = tuple(
+            (key, isinstance(val, list))
+            for key, val in data.items()
+            if isinstance(val, (dict, list))
+        )
+        return non_basic_keys, nested_keys
+
+    def _create_dict_fragment_node_from_plan(
+        self,
+        labels: List[str],
+        data: Dict,
+        parent_node: Node,
+        plan: Tuple[Tuple, Tuple],
+    ) -> Tuple[Node, List[ParseTask]]:
+        """Same as `Dict2graph._create_dict_fragment_node()` but with the decisions for every key taken from a cached plan."""
+        non_basic_keys, nested_keys = plan
+        new_node = Node(labels=labels, source_data=data, parent_node=parent_node)
+        # copy all values at once and remove the non basic ones. keeps the original order of the properties
+        dict.update(new_node, data)
+        for key in non_basic_keys:
+            del new_node[key]
+        child_tasks: List[ParseTask] = []
+        for key, is_list in nested_keys:
+            val = data[key]
+            if is_list:
+                child_tasks.append((TASK_LIST, [key], val, None))
+            elif self._is_named_obj(val):
+                obj_label = next(iter(val))
+                child_tasks.append((TASK_DICT, [obj_label], val[obj_label], key))
             else:
-                # value is dict or list in itself and therefore one or multiple child nodes
-                r = None
-                n = None
-                if isinstance(val, dict):
-                    if self._is_named_obj(val):
-                        n = self._parse_traverse_dict_fragment(
-                            labels=list(val.keys()),
-                            data=val[list(val.keys())[0]],
-                            parent_node=new_node,
-                        )
-                        r = Relation(start_node=new_node, end_node=n, relation_type=key)
-                    else:
-                        n = self._parse_traverse_dict_fragment(
-                            labels=[key], data=val, parent_node=new_node
-                        )
-                elif isinstance(val, list):
-                    n = self._parse_traverse_list_fragment(
-                        labels=[key], data=val, parent_node=new_node
-                    )
-                elif val is not None:
-                    raise ValueError(
-                        f"Expected dict val to be a None, basic type, a list or a dict. Got `{type(val)}` for key '{key}' value '{val}'"
-                    )
-                if n is not None:
-                    new_child_nodes.append(n)
-                    if r is None:
-                        r = Relation(
-                            start_node=new_node,
-                            end_node=n,
-                        )
-                    new_rels.append(r)
+                child_tasks.append((TASK_DICT, [key], val, None))
+        return new_node, child_tasks
+
+    def _finish_dict_fragment(
+        self, new_node: Node, new_child_nodes: List[Tuple[Node, str]]
+    ) -> Node:
+        new_rels: List[Relation] = []
+        for child_node, relation_type in new_child_nodes:
+            new_rels.append(
+                Relation(
+                    start_node=new_node,
+                    end_node=child_node,
+                    relation_type=relation_type,
+                )
+            )
+        if self.merkle_hash_ids:
+            new_node.source_data_digest = self._get_dict_fragment_digest(
+                new_node.source_data, new_child_nodes
+            )
         self._node_cache.append(new_node)
         self._rel_cache.extend(new_rels)
         return new_node
 
-    def _parse_traverse_list_fragment(
-        self, labels: List[str], parent_node: Node, data: Dict
-    ) -> Node:
+    def _get_dict_fragment_digest(
+        self, data: Dict, new_child_nodes: List[Tuple[Node, str]]
+    ) -> str:
+        # nested values are represented by the digests of their nodes instead of their content
+        child_nodes = iter(new_child_nodes)
+        digest_source: Dict = {}
+        for key, val in data.items():
+            if isinstance(val, (dict, list)):
+                child_node, relation_type = next(child_nodes)
+                if relation_type is None:
+                    digest_source[key] = ["#", child_node.source_data_digest]
+                else:
+                    # named object. the label is not part of the child nodes source data
+                    digest_source[key] = [
+                        "#",
+                        child_node.source_data_digest,
+                        next(iter(val)),
+                    ]
+            else:
+                digest_source[key] = val
+        return hashlib.md5(bytes(json.dumps(digest_source), "utf-8")).hexdigest()
 
+    def _create_list_fragment_hub_node(
+        self, labels: List[str], data: List, parent_node: Node
+    ) -> Node:
         # create/set list root node. this is the node on which the list items will attach to
         # the parent_node is the default root
-
         list_root_hub_node: Node = Node(
             labels=labels,
             source_data=data,
@@ -426,45 +1406,35 @@ class Dict2graph:
         self._set_list_root_hub_node_labels(list_root_hub_node)
         list_root_hub_node.is_list_list_hub = True
         self._node_cache.append(list_root_hub_node)
-        # parse nodes
-        new_list_item_nodes: List[Node] = []
-        for index, obj in enumerate(data):
-            if self._is_basic_attribute_type(obj):
-                n = Node(labels, source_data=obj, parent_node=list_root_hub_node)
-
-                n[self.simple_list_item_data_property_name] = obj
-                self._node_cache.append(n)
-                new_list_item_nodes.append(n)
-            elif self._is_named_obj(obj):
-                obj_label = list(obj.keys())[0]
-                obj_data = obj[obj_label]
-                new_list_item_nodes.append(
-                    self._parse_traverse_dict_fragment(
-                        labels=obj_label, data=obj_data, parent_node=list_root_hub_node
-                    )
-                )
-            elif isinstance(obj, dict):
-                new_list_item_nodes.append(
-                    self._parse_traverse_dict_fragment(
-                        labels=labels, data=obj, parent_node=list_root_hub_node
-                    )
-                )
-            elif isinstance(obj, list):
-                new_list_item_nodes.append(
-                    self._parse_traverse_list_fragment(
-                        labels=labels, data=obj, parent_node=list_root_hub_node
-                    )
-                )
+        return list_root_hub_node
 
-        # create relations to list root node
-        child_ids: List[str] = []
+    def _get_list_item_task(self, labels: List[str], obj: Any) -> ParseTask:
+        if self._is_basic_attribute_type(obj):
+            return (TASK_BASIC, labels, obj, None)
+        elif self._is_named_obj(obj):
+            obj_label = list(obj.keys())[0]
+            return (TASK_DICT, [obj_label], obj[obj_label], None)
+        elif isinstance(obj, dict):
+            return (TASK_DICT, labels, obj, None)
+        elif isinstance(obj, list):
+            return (TASK_LIST, labels, obj, None)
+        return None
+
+    def _create_basic_list_item_node(
+        self, labels: List[str], data: Union[str, int, float, bool], hub_node: Node
+    ) -> Node:
+        n = Node(labels, source_data=data, parent_node=hub_node)
+        n[self.simple_list_item_data_property_name] = data
+        self._node_cache.append(n)
+        return n
 
+    def _finish_list_fragment(
+        self, list_root_hub_node: Node, new_list_item_nodes: List[Node]
+    ) -> Node:
+        # create relations to list root node
         for index, node in enumerate(new_list_item_nodes):
-            if node is None:
-                continue
             self._set_list_item_node_labels(node)
             node.is_list_list_item = True
-            child_ids.append(node.id)
             r = Relation(
                 start_node=list_root_hub_node,
                 end_node=node,
@@ -473,15 +1443,45 @@ class Dict2graph:
             r[self.list_item_relation_index_property_name] = index
             node.parent_node = list_root_hub_node
             self._rel_cache.append(r)
-            #
 
+        if self.merkle_hash_ids:
+            list_root_hub_node.source_data_digest = self._get_list_fragment_digest(
+                list_root_hub_node.source_data, new_list_item_nodes
+            )
         list_root_hub_node[
             self.list_hub_id_property_name
-        ] = list_root_hub_node.get_hash(include_children_data=True)
+        ] = self._get_children_data_hash(list_root_hub_node)
         list_root_hub_node.merge_property_keys = [self.list_hub_id_property_name]
 
         return list_root_hub_node
 
+    def _get_list_fragment_digest(
+        self, data: List, new_list_item_nodes: List[Node]
+    ) -> str:
+        item_nodes = iter(new_list_item_nodes)
+        digest_source: List = []
+        for obj in data:
+            if isinstance(obj, (dict, list)):
+                item_node = next(item_nodes)
+                if self._is_named_obj(obj):
+                    digest_source.append(
+                        ["#", item_node.source_data_digest, next(iter(obj))]
+                    )
+                else:
+                    digest_source.append(["#", item_node.source_data_digest])
+            elif self._is_basic_attribute_type(obj):
+                # basic values got their own node. we only need to skip it
+                next(item_nodes)
+                digest_source.append(obj)
+            else:
+                digest_source.append(None)
+        return hashlib.md5(bytes(json.dumps(digest_source), "utf-8")).hexdigest()
+
+    def _get_children_data_hash(self, node: Node) -> str:
+        return node.get_hash(
+            include_children_data=True, use_source_data_digests=self.merkle_hash_ids
+        )
+
     def _is_empty(self, val):
         if not val:
             return True
@@ -533,51 +1533,85 @@ class Dict2graph:
     def _set_list_item_node_labels(self, node: Node) -> str:
         node.labels = node.labels + self.list_item_additional_labels
 
-    def _manifest_node_from_cache(self, cached_node: Node):
-        node_set: NodeSet = self._get_or_create_nodeSet(cached_node)
+    def _manifest_node_from_cache(self, cached_node: Node) -> bool:
+        """Add a cached node to its NodeSet.
+
+        Returns:
+            bool: False if the node was combined with a buffered duplicate (see `Dict2graph(deduplicate_nodes)`)
+        """
+        if self.deduplicate_nodes is None:
+            # the node set of an empty node is looked up with the merge keys it had before it got its id
+            node_type_fingerprint = self._get_node_type_fingerprint(cached_node)
+            node_set: NodeSet = self._get_or_create_nodeSet(
+                cached_node, node_type_fingerprint
+            )
         if self.create_ids_for_empty_nodes and cached_node.id is None:
             cached_node[
                 self.empty_node_default_id_property_name
-            ] = cached_node.get_hash(include_children_data=True)
+            ] = self._get_children_data_hash(cached_node)
             cached_node.merge_property_keys = [self.empty_node_default_id_property_name]
-        node_set.add_node(cached_node)
+        if self.deduplicate_nodes is not None:
+            # duplicates are found by their merge key values. empty nodes have to be deduplicated by their generated id
+            node_type_fingerprint = self._get_node_type_fingerprint(cached_node)
+            node_set: NodeSet = self._get_or_create_nodeSet(
+                cached_node, node_type_fingerprint
+            )
+        if self.release_source_data:
+            return self._add_node_row(
+                node_type_fingerprint, node_set, dict(cached_node)
+            )
+        return self._add_node_row(node_type_fingerprint, node_set, cached_node)
 
-    def _get_or_create_nodeSet(self, node: Node) -> NodeSet:
-        node_type_fingerprint = (
+    def _get_node_type_fingerprint(self, node: Node) -> Tuple:
+        return (
             frozenset(node.labels),
-            frozenset(node.merge_property_keys),
+            node._merge_key_set,
         )
+
+    def _get_or_create_nodeSet(
+        self, node: Node, node_type_fingerprint: Tuple
+    ) -> NodeSet:
         if node_type_fingerprint not in self._nodeSets:
             self._nodeSets[node_type_fingerprint] = NodeSet(
-                labels=node.labels,
-                merge_keys=node.merge_property_keys
-                if node.merge_property_keys
-                else list(node.keys()),
+                labels=list(node.labels),
+                merge_keys=node.merge_property_keys,
             )
         return self._nodeSets[node_type_fingerprint]
 
     def _manifest_rel_from_cache(self, cached_relation: Relation):
         rel_set: RelationshipSet = self._get_or_create_relSet(cached_relation)
-        rel_set.add_relationship(
-            start_node_properties=cached_relation.start_node,
-            end_node_properties=cached_relation.end_node,
-            properties=cached_relation,
-        )
+        if self.release_source_data:
+            rel_set.add_relationship(
+                start_node_properties=self._get_key_subset(
+                    cached_relation.start_node, rel_set.start_node_properties
+                ),
+                end_node_properties=self._get_key_subset(
+                    cached_relation.end_node, rel_set.end_node_properties
+                ),
+                properties=dict(cached_relation),
+            )
+        else:
+            rel_set.add_relationship(
+                start_node_properties=cached_relation.start_node,
+                end_node_properties=cached_relation.end_node,
+                properties=cached_relation,
+            )
+        self._buffered_objects_count += 1
 
     def _get_or_create_relSet(self, relation: Relation) -> RelationshipSet:
         rel_id = (
             frozenset(relation.start_node.labels),
-            frozenset(relation.start_node.merge_property_keys),
+            relation.start_node._merge_key_set,
             relation.relation_type,
             frozenset(relation.end_node.labels),
-            frozenset(relation.end_node.merge_property_keys),
+            relation.end_node._merge_key_set,
         )
 
         if rel_id not in self._relSets:
             self._relSets[rel_id] = RelationshipSet(
                 rel_type=relation.relation_type,
-                start_node_labels=relation.start_node.labels,
-                end_node_labels=relation.end_node.labels,
+                start_node_labels=list(relation.start_node.labels),
+                end_node_labels=list(relation.end_node.labels),
                 start_node_properties=relation.start_node.merge_property_keys,
                 end_node_properties=relation.end_node.merge_property_keys,
             )
@@ -606,6 +1640,9 @@ class Dict2graph:
         self._rel_cache_feeder.append(rel)
 
     def _flush_cache(self):
+        if self._profiler is not None:
+            self._flush_cache_profiled(self._profiler)
+            return
         self._feed_cache_with_new_nodes_and_rels()
         self._run_transformations()
         for node in self._node_cache:
@@ -614,31 +1651,461 @@ class Dict2graph:
         for rel in self._rel_cache:
             if not rel.deleted:
                 self._manifest_rel_from_cache(rel)
+        self._finish_flush()
+
+    def _flush_cache_profiled(self, profiler: Profiler):
+        profiler.start_flush()
+        flush = profiler.flush
+        self._feed_cache_with_new_nodes_and_rels()
+        start = time.perf_counter()
+        self._run_transformations()
+        flush.transformation_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        for node in self._node_cache:
+            if not node.deleted:
+                if not self._manifest_node_from_cache(node):
+                    flush.deduplicated_nodes += 1
+                flush.manifested_nodes += 1
+        flush.manifest_node_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        for rel in self._rel_cache:
+            if not rel.deleted:
+                self._manifest_rel_from_cache(rel)
+                flush.manifested_relations += 1
+        flush.manifest_relation_seconds = time.perf_counter() - start
+        self._finish_flush()
+        profiler.end_flush()
+
+    def _finish_flush(self):
+        if self.release_source_data:
+            self._release_cached_graph_objects()
         self._node_cache = []
         self._rel_cache = []
+        self._compacted_tombstones = []
+
+    def _release_cached_graph_objects(self):
+        """Cut all references between the cached nodes and relationships and from the nodes to the parsed input data.
+        In memory-lean mode the NodeSets/RelationshipSets do not reference the nodes and relationships,
+        so they can be freed instantly without waiting for the cyclic garbage collector."""
+        for node in self._node_cache:
+            self._release_node(node)
+        for rel in self._rel_cache:
+            rel._transformer_meta_data = None
+        for obj in self._compacted_tombstones:
+            if isinstance(obj, Node):
+                self._release_node(obj)
+            else:
+                obj._transformer_meta_data = None
+
+    def _release_node(self, node: Node):
+        if self.merkle_hash_ids:
+            # make sure the digest is computed, it replaces the source data
+            node.source_data_digest
+        node.source_data = None
+        node.parent_node = None
+        node.relations = []
+        node._transformer_meta_data = None
 
     def _run_transformations(self):
-        for (
-            matcher_trans_node_container
-        ) in self.matcher_and_node_transformers_stack.containers:
+        # transformers look up the running instance via `_NodeTransformerBase.d2g`
+        token = _RUNNING_DICT2GRAPH.set(self)
+        try:
+            self._run_node_transformations()
+            self._run_rel_transformations()
+        finally:
+            _RUNNING_DICT2GRAPH.reset(token)
+
+    def _run_node_transformations(self):
+        stack = self.matcher_and_node_transformers_stack
+        # a single container visits every node once anyway; building the index would not pay off
+        label_index = LabelIndex() if len(stack.containers) > 1 else None
+        if label_index is not None:
             for node in self._node_cache:
-                if (
-                    matcher_trans_node_container.matcher._match(node)
-                    and not node.deleted
+                label_index.add(node)
+        # cache position up to which the incremental containers visited the nodes, by id of the container
+        watermarks: Dict[int, int] = {}
+        for round_number in range(self.transformer_rounds):
+            fed = 0
+            for containers in self._get_transformer_passes(stack):
+                if round_number and any(
+                    container.matcher.incremental for container in containers
                 ):
-                    for trans in matcher_trans_node_container.transformers:
-                        trans._run_custom_node_match_and_transform(node)
-            self._feed_cache_with_new_nodes_and_rels()
+                    # incremental containers visit other nodes than the rest of the pass. one pass per container gives the same result
+                    for container in containers:
+                        fed += self._run_node_pass(
+                            stack, [container], label_index, watermarks
+                        )
+                else:
+                    fed += self._run_node_pass(
+                        stack, containers, label_index, watermarks
+                    )
+            if not fed:
+                # fixed point. another round would not see any new nodes or relations
+                break
+        if label_index is not None:
+            label_index.close()
 
-        for (
-            matcher_trans_rel_container
-        ) in self.matcher_and_rel_transformers_stack.containers:
+    def _run_node_pass(
+        self,
+        stack: MatcherTransformersContainerStack,
+        containers: List[MatcherTransformersContainer],
+        label_index: Optional[LabelIndex],
+        watermarks: Dict[int, int],
+    ) -> int:
+        """Run the node containers of one pass and feed the cache with the nodes and relations they created.
+
+        Returns:
+            int: The number of fed nodes and relations
+        """
+        if len(containers) == 1 and id(containers[0]) in watermarks:
+            # only the nodes fed since the last run of the incremental container
+            candidates = self._node_cache[watermarks[id(containers[0])] :]
+        else:
+            # only visit the nodes that can match. the labels are checked again, as earlier transformers may have changed them
+            candidates = self._get_node_candidates(containers, label_index)
+        for container in containers:
+            if container.matcher.incremental:
+                watermarks[id(container)] = len(self._node_cache)
+        if self._profiler is not None:
+            self._run_profiled_pass(
+                self._profiler, "node", stack, containers, candidates, label_index
+            )
+        elif len(containers) == 1:
+            self._run_node_container(containers[0], candidates, label_index)
+        else:
+            # the containers of a pass only change the node they are given (see `dict2graph.transformer_dependencies`).
+            # running all of them on one node, before going to the next node, gives the same result as one pass per container
+            for node in candidates:
+                for container in containers:
+                    if container.matcher._match(node) and not node.deleted:
+                        for trans in container.transformers:
+                            trans._run_custom_node_match_and_transform(node)
+                if node.deleted and label_index is not None:
+                    label_index.remove(node)
+        new_nodes_start = len(self._node_cache)
+        new_rels_start = len(self._rel_cache)
+        self._feed_cache_with_new_nodes_and_rels()
+        fed = (
+            len(self._node_cache)
+            - new_nodes_start
+            + len(self._rel_cache)
+            - new_rels_start
+        )
+        if label_index is not None:
+            for node in self._node_cache[new_nodes_start:]:
+                label_index.add(node)
+            self._node_cache = self._compact_cache(
+                self._node_cache, label_index, watermarks
+            )
+        return fed
+
+    def _compact_cache(
+        self,
+        cache: List[Union[Node, Relation]],
+        index: Union[LabelIndex, RelationTypeIndex],
+        watermarks: Dict[int, int],
+    ) -> List[Union[Node, Relation]]:
+        """Drop the deleted objects from the cache and its index, if their share exceeds `Dict2graph.tombstone_compaction_threshold`.
+        The order of the remaining objects is kept. The watermarks (cache positions) of incremental containers are moved along.
+
+        Returns:
+            List[Union[Node, Relation]]: The compacted cache or the unchanged cache
+        """
+        threshold = self.tombstone_compaction_threshold
+        # the index knows every deleted object of the cache. the ones visited by a pass were removed from the index already
+        tombstones = index.tombstones + index.removed_tombstones
+        if threshold is None or not tombstones or tombstones <= len(cache) * threshold:
+            return cache
+        index.compact()
+        index.removed_tombstones = 0
+        compacted = [obj for obj in cache if not obj.deleted]
+        if watermarks:
+            alive_before = [0, *accumulate(not obj.deleted for obj in cache)]
+            for container_id, position in watermarks.items():
+                watermarks[container_id] = alive_before[position]
+        if self.release_source_data:
+            self._compacted_tombstones.extend(obj for obj in cache if obj.deleted)
+        return compacted
+
+    def _get_transformer_passes(
+        self, stack: MatcherTransformersContainerStack
+    ) -> List[List[MatcherTransformersContainer]]:
+        if self.schedule_transformers:
+            return stack.get_passes()
+        return [[container] for container in stack.containers]
+
+    def _get_node_candidates(
+        self,
+        containers: List[MatcherTransformersContainer],
+        label_index: Optional[LabelIndex],
+    ) -> Iterable[Node]:
+        if label_index is None:
+            return self._node_cache
+        candidate_labels = [
+            container.matcher._get_candidate_labels() for container in containers
+        ]
+        if None in candidate_labels:
+            return self._node_cache
+        if len(candidate_labels) == 1:
+            return label_index.iter_candidates(*candidate_labels[0])
+        return label_index.iter_candidates_of_any(candidate_labels)
+
+    def _run_node_container(
+        self,
+        container: MatcherTransformersContainer,
+        candidates: Iterable[Node],
+        label_index: Optional[LabelIndex],
+    ) -> int:
+        """Returns the number of matched nodes"""
+        matcher = container.matcher
+        if all(trans._implements_transform_nodes() for trans in container.transformers):
+            # batch transformers only change the nodes they are given. all matches can be collected upfront
+            nodes = []
+            for node in candidates:
+                if matcher._match(node) and not node.deleted:
+                    nodes.append(node)
+                elif node.deleted and label_index is not None:
+                    label_index.remove(node)
+            if nodes:
+                for trans in container.transformers:
+                    trans._run_custom_nodes_match_and_transform(nodes)
+            return len(nodes)
+        matches = 0
+        for node in candidates:
+            if matcher._match(node) and not node.deleted:
+                matches += 1
+                for trans in container.transformers:
+                    trans._run_custom_node_match_and_transform(node)
+            elif node.deleted and label_index is not None:
+                label_index.remove(node)
+        return matches
+
+    def _run_rel_transformations(self):
+        stack = self.matcher_and_rel_transformers_stack
+        type_index = RelationTypeIndex() if len(stack.containers) > 1 else None
+        if type_index is not None:
             for rel in self._rel_cache:
-                if matcher_trans_rel_container.matcher._match(rel) and not rel.deleted:
-                    for trans in matcher_trans_rel_container.transformers:
-                        trans._run_custom_rel_match_and_transform(rel)
+                type_index.add(rel)
+        watermarks: Dict[int, int] = {}
+        for round_number in range(self.transformer_rounds):
+            fed = 0
+            for containers in self._get_transformer_passes(stack):
+                if round_number and any(
+                    container.matcher.incremental for container in containers
+                ):
+                    for container in containers:
+                        fed += self._run_rel_pass(
+                            stack, [container], type_index, watermarks
+                        )
+                else:
+                    fed += self._run_rel_pass(stack, containers, type_index, watermarks)
+            if not fed:
+                break
+        if type_index is not None:
+            type_index.close()
+
+    def _run_rel_pass(
+        self,
+        stack: MatcherTransformersContainerStack,
+        containers: List[MatcherTransformersContainer],
+        type_index: Optional[RelationTypeIndex],
+        watermarks: Dict[int, int],
+    ) -> int:
+        """Run the relation containers of one pass and feed the cache with the nodes and relations they created.
 
-            self._feed_cache_with_new_nodes_and_rels()
+        Returns:
+            int: The number of fed nodes and relations
+        """
+        if len(containers) == 1 and id(containers[0]) in watermarks:
+            candidates = self._rel_cache[watermarks[id(containers[0])] :]
+        else:
+            # only visit the relations of matching types. the type is checked again, as earlier transformers may have changed it
+            candidates = self._get_rel_candidates(containers, type_index)
+        for container in containers:
+            if container.matcher.incremental:
+                watermarks[id(container)] = len(self._rel_cache)
+        if self._profiler is not None:
+            self._run_profiled_pass(
+                self._profiler,
+                "relation",
+                stack,
+                containers,
+                candidates,
+                type_index,
+            )
+        elif len(containers) == 1:
+            self._run_rel_container(containers[0], candidates, type_index)
+        else:
+            for rel in candidates:
+                for container in containers:
+                    if container.matcher._match(rel) and not rel.deleted:
+                        for trans in container.transformers:
+                            trans._run_custom_rel_match_and_transform(rel)
+                if rel.deleted and type_index is not None:
+                    type_index.remove(rel)
+        new_nodes_start = len(self._node_cache)
+        new_rels_start = len(self._rel_cache)
+        self._feed_cache_with_new_nodes_and_rels()
+        fed = (
+            len(self._node_cache)
+            - new_nodes_start
+            + len(self._rel_cache)
+            - new_rels_start
+        )
+        if type_index is not None:
+            for rel in self._rel_cache[new_rels_start:]:
+                type_index.add(rel)
+            self._rel_cache = self._compact_cache(
+                self._rel_cache, type_index, watermarks
+            )
+        return fed
+
+    def _get_rel_candidates(
+        self,
+        containers: List[MatcherTransformersContainer],
+        type_index: Optional[RelationTypeIndex],
+    ) -> Iterable[Relation]:
+        matchers = [container.matcher for container in containers]
+        if type_index is None or any(
+            matcher._matches_any_relation() for matcher in matchers
+        ):
+            return self._rel_cache
+        if len(matchers) == 1:
+            return type_index.iter_candidates(matchers[0]._match_type)
+        return type_index.iter_candidates(
+            lambda relation_type: any(
+                matcher._match_type(relation_type) for matcher in matchers
+            )
+        )
+
+    def _run_rel_container(
+        self,
+        container: MatcherTransformersContainer,
+        candidates: Iterable[Relation],
+        type_index: Optional[RelationTypeIndex],
+    ) -> int:
+        """Returns the number of matched relations"""
+        matcher = container.matcher
+        if all(trans._implements_transform_rels() for trans in container.transformers):
+            rels = []
+            for rel in candidates:
+                if matcher._match(rel) and not rel.deleted:
+                    rels.append(rel)
+                elif rel.deleted and type_index is not None:
+                    type_index.remove(rel)
+            if rels:
+                for trans in container.transformers:
+                    trans._run_custom_rels_match_and_transform(rels)
+            return len(rels)
+        matches = 0
+        for rel in candidates:
+            if matcher._match(rel) and not rel.deleted:
+                matches += 1
+                for trans in container.transformers:
+                    trans._run_custom_rel_match_and_transform(rel)
+            elif rel.deleted and type_index is not None:
+                type_index.remove(rel)
+        return matches
+
+    def _run_profiled_pass(
+        self,
+        profiler: Profiler,
+        kind: Literal["node", "relation"],
+        stack: MatcherTransformersContainerStack,
+        containers: List[MatcherTransformersContainer],
+        candidates: Iterable[Union[Node, Relation]],
+        index: Optional[Union[LabelIndex, RelationTypeIndex]],
+    ):
+        """Same as the unprofiled pass in `_run_node_transformations()`/`_run_rel_transformations()`, while filling the `ContainerStats` of the containers"""
+        container_stats = [
+            profiler.get_container_stats(
+                kind, stack.containers.index(container), container
+            )
+            for container in containers
+        ]
+        for stats in container_stats:
+            stats.passes += 1
+        # deletions are counted by the `deleted` setters of the nodes and relations, instead of scanning the cache
+        deletions = DeletionCounter()
+        token = DELETION_COUNTER.set(deletions)
+        try:
+            if len(containers) == 1:
+                stats = container_stats[0]
+                candidates = CountingIterable(candidates)
+                nodes_before = len(self._node_cache_feeder)
+                rels_before = len(self._rel_cache_feeder)
+                start = time.perf_counter()
+                if kind == "node":
+                    matches = self._run_node_container(containers[0], candidates, index)
+                else:
+                    matches = self._run_rel_container(containers[0], candidates, index)
+                stats.seconds += time.perf_counter() - start
+                stats.matches += matches
+                stats.candidates += candidates.count
+                stats.nodes_created += len(self._node_cache_feeder) - nodes_before
+                stats.relations_created += len(self._rel_cache_feeder) - rels_before
+                stats.nodes_deleted += deletions.nodes
+                stats.relations_deleted += deletions.relations
+                return
+            # the pass visits the union of the candidates of its containers. count the ones each container would visit in a pass of its own
+            candidate_filters = [
+                self._get_candidate_filter(kind, container, index)
+                for container in containers
+            ]
+            for obj in candidates:
+                for container, stats, is_candidate in zip(
+                    containers, container_stats, candidate_filters
+                ):
+                    start = time.perf_counter()
+                    if is_candidate is None or is_candidate(obj):
+                        stats.candidates += 1
+                    if container.matcher._match(obj) and not obj.deleted:
+                        nodes_before = len(self._node_cache_feeder)
+                        rels_before = len(self._rel_cache_feeder)
+                        deleted_nodes = deletions.nodes
+                        deleted_rels = deletions.relations
+                        for trans in container.transformers:
+                            if kind == "node":
+                                trans._run_custom_node_match_and_transform(obj)
+                            else:
+                                trans._run_custom_rel_match_and_transform(obj)
+                        stats.matches += 1
+                        stats.nodes_created += (
+                            len(self._node_cache_feeder) - nodes_before
+                        )
+                        stats.relations_created += (
+                            len(self._rel_cache_feeder) - rels_before
+                        )
+                        stats.nodes_deleted += deletions.nodes - deleted_nodes
+                        stats.relations_deleted += deletions.relations - deleted_rels
+                    stats.seconds += time.perf_counter() - start
+                if obj.deleted and index is not None:
+                    index.remove(obj)
+        finally:
+            DELETION_COUNTER.reset(token)
+
+    def _get_candidate_filter(
+        self,
+        kind: Literal["node", "relation"],
+        container: MatcherTransformersContainer,
+        index: Optional[Union[LabelIndex, RelationTypeIndex]],
+    ) -> Optional[Callable[[Union[Node, Relation]], bool]]:
+        """Tells if an object has the labels or the relation type, that make it a candidate of the container in the index.
+        None if every object of the cache is a candidate."""
+        if index is None:
+            return None
+        matcher = container.matcher
+        if kind == "relation":
+            if matcher._matches_any_relation():
+                return None
+            return lambda rel: matcher._match_type(rel.relation_type)
+        candidate_labels = matcher._get_candidate_labels()
+        if candidate_labels is None:
+            return None
+        any_of, all_of = candidate_labels
+        return lambda node: any(label in node.labels for label in any_of or ()) or (
+            bool(all_of) and all(label in node.labels for label in all_of)
+        )
 
     def _feed_cache_with_new_nodes_and_rels(self):
         self._node_cache.extend(self._node_cache_feeder)
@@ -0,0 +1,176 @@
+"""
+Cost estimates for the transformer pipeline of a `Dict2graph` instance, measured on a sample of records.
+See `Dict2graph.explain()`.
+"""
+from dataclasses import dataclass, field, asdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from dict2graph.transformers._base import AnyLabel, AnyRelation, Transformer
+from dict2graph.profiling import ContainerStats, ProfileStats
+
+if TYPE_CHECKING:
+    from dict2graph.matcher_transformators_container import (
+        MatcherTransformersContainer,
+    )
+
+
+@dataclass
+class ContainerExplanation:
+    """One matcher container (a matcher and the transformers bound to it) of the pipeline, with the numbers measured on the sample"""
+
+    # "node" or "relation"
+    kind: str
+    # position of the container in its `MatcherTransformersContainerStack`
+    index: int
+    # the containers of one pass run together on every node/relation (see `Dict2graph(schedule_transformers)`)
+    pass_number: int
+    matcher: str
+    # human readable description of the labels/relation types the matcher accepts
+    matches_labels: str
+    transformers: List[str]
+    reads: List[str]
+    writes: List[str]
+    sample_candidates: int = 0
+    sample_matches: int = 0
+    sample_seconds: float = 0.0
+    # None if no total number of records was given
+    estimated_seconds: Optional[float] = None
+
+    @property
+    def selectivity(self) -> float:
+        """Share of the visited candidates that matched"""
+        return (
+            self.sample_matches / self.sample_candidates
+            if self.sample_candidates
+            else 0.0
+        )
+
+    @property
+    def seconds_per_candidate(self) -> float:
+        return (
+            self.sample_seconds / self.sample_candidates
+            if self.sample_candidates
+            else 0.0
+        )
+
+    def __str__(self):
+        estimate = (
+            f", ~{self.estimated_seconds:.2f}s on all records"
+            if self.estimated_seconds is not None
+            else ""
+        )
+        return (
+            f"pass {self.pass_number}: {self.kind} #{self.index} {self.matcher} -> {', '.join(self.transformers)}\n"
+            f"    matches {self.matches_labels}; selectivity {self.selectivity:.1%} "
+            f"({self.sample_matches}/{self.sample_candidates}), {self.seconds_per_candidate * 1e6:.2f}µs per candidate{estimate}"
+        )
+
+
+@dataclass
+class PipelineExplanation:
+    """The transformer containers of a `Dict2graph` instance in the order they run, with cost estimates from a sample of records.
+    The estimates scale the time measured on the sample linearly with the number of records."""
+
+    sample_records: int
+    total_records: Optional[int]
+    # parsing, transforming and manifesting the sample
+    sample_seconds: float
+    sample_transformation_seconds: float
+    sample_manifest_seconds: float
+    estimated_seconds: Optional[float]
+    containers: List[ContainerExplanation] = field(default_factory=list)
+    # the raw numbers of the sample run
+    stats: Optional[ProfileStats] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def __str__(self):
+        lines = [
+            f"{self.sample_records} sample records in {self.sample_seconds:.4f}s "
+            f"(transformations {self.sample_transformation_seconds:.4f}s, manifestation {self.sample_manifest_seconds:.4f}s)"
+        ]
+        if self.estimated_seconds is not None:
+            lines.append(
+                f"estimated for {self.total_records} records: {self.estimated_seconds:.2f}s"
+            )
+        lines.extend(str(container) for container in self.containers)
+        return "\n".join(lines)
+
+
+def describe_matcher(matcher: Any) -> str:
+    """Describe the labels or relation types a matcher of `Transformer.match_nodes()`/`Transformer.match_rels()` accepts"""
+    if isinstance(matcher, Transformer.NodeTransformerMatcher):
+        accepted = []
+        if matcher.label_match == AnyLabel or matcher.label_match == []:
+            accepted.append("any node")
+        elif matcher.label_match:
+            accepted.append(f"all labels of {list(matcher.label_match)}")
+        if matcher.has_one_label_of:
+            accepted.append(f"one label of {list(matcher.has_one_label_of)}")
+        description = " or ".join(accepted) if accepted else "no node"
+        if matcher.has_none_label_of:
+            description += f", but none of {list(matcher.has_none_label_of)}"
+        return description
+    if matcher.relation_type_match in [None, AnyRelation]:
+        description = "any relation"
+    elif isinstance(matcher.relation_type_match, str):
+        description = f"relation type {matcher.relation_type_match!r}"
+    else:
+        description = f"relation types {list(matcher.relation_type_match)}"
+    if matcher.relation_type_is_not_in:
+        description += f", but not {matcher.relation_type_is_not_in!r}"
+    return description
+
+
+def explain_containers(
+    kind: str,
+    containers: List["MatcherTransformersContainer"],
+    passes: List[List["MatcherTransformersContainer"]],
+    stats: ProfileStats,
+    scale: Optional[float],
+) -> List[ContainerExplanation]:
+    """Explain the containers of one stack in the order of their passes.
+
+    Args:
+        kind (str): "node" or "relation"
+        containers (List[MatcherTransformersContainer]): The containers of the stack, in the order they were added
+        passes (List[List[MatcherTransformersContainer]]): The containers of every pass, in the order they run
+        stats (ProfileStats): The numbers measured on the sample
+        scale (Optional[float]): Factor from the sample to the full run. None if there is no estimate
+
+    Returns:
+        List[ContainerExplanation]: One explanation per container
+    """
+    stats_by_index: Dict[int, ContainerStats] = {
+        container_stats.index: container_stats
+        for container_stats in stats.containers
+        if container_stats.kind == kind
+    }
+    explanations = []
+    for pass_number, pass_containers in enumerate(passes):
+        for container in pass_containers:
+            index = containers.index(container)
+            # containers that never ran on the sample have no stats
+            container_stats = stats_by_index.get(index)
+            explanation = ContainerExplanation(
+                kind=kind,
+                index=index,
+                pass_number=pass_number,
+                matcher=repr(container.matcher),
+                matches_labels=describe_matcher(container.matcher),
+                transformers=[
+                    transformer.__class__.__name__
+                    for transformer in container.transformers
+                ],
+                reads=sorted(container.reads),
+                writes=sorted(container.writes),
+            )
+            if container_stats is not None:
+                explanation.sample_candidates = container_stats.candidates
+                explanation.sample_matches = container_stats.matches
+                explanation.sample_seconds = container_stats.seconds
+            if scale is not None:
+                explanation.estimated_seconds = explanation.sample_seconds * scale
+            explanations.append(explanation)
+    return explanations
@@ -9,8 +9,11 @@ class NoDefault:
 
 
 class TransformerMetaDataMixin:
+    # the slot `_transformer_meta_data` is declared by the subclasses. the meta data dict is only created when needed
+    __slots__ = ()
+
     def __init__(self):
-        self._transformer_meta_data = {}
+        self._transformer_meta_data = None
 
     def set_transformer_meta_data(
         self, transformer: "_NodeTransformerBase", key: str, val: Any
@@ -22,6 +25,8 @@ class TransformerMetaDataMixin:
             key (str): _description_
             val (Any): _description_
         """
+        if self._transformer_meta_data is None:
+            self._transformer_meta_data = {}
         if not transformer in self._transformer_meta_data:
             self._transformer_meta_data[transformer] = {}
         self._transformer_meta_data[transformer][key] = val
@@ -43,7 +48,10 @@ class TransformerMetaDataMixin:
         Returns:
             _type_: _description_
         """
-        if not transformer in self._transformer_meta_data:
+        if (
+            self._transformer_meta_data is None
+            or not transformer in self._transformer_meta_data
+        ):
             if default != NoDefault:
                 return default
             else:
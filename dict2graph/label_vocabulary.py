@@ -0,0 +1,65 @@
+"""
+Interned vocabulary of the labels node matchers test for. Every interned label gets one bit,
+so a set of labels can be represented as an integer bitmask and matched with a few integer operations.
+
+Only labels used by matchers are interned. Labels of the parsed data, that no matcher asks for, are irrelevant for matching
+and are left out of the masks. This keeps the vocabulary small, no matter how many different keys the input data has.
+"""
+import threading
+from typing import Dict, Iterable
+
+
+class LabelVocabulary:
+    """Assigns a bit to every interned label.
+    Labels are never removed and bits never re-assigned, so existing masks of matchers stay valid while the vocabulary grows.
+    Masks of label sets (e.g. `Node.label_mask`) only cover the labels interned at the time they were computed;
+    compare the `size` of the vocabulary to find out if a mask must be recomputed.
+    """
+
+    def __init__(self):
+        self._bits: Dict[str, int] = {}
+        # number of interned labels. a plain attribute, as it is read for every match
+        self.size: int = 0
+        # matchers of a shared pipeline may be compiled by multiple threads
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def intern(self, labels: Iterable[str]) -> int:
+        """Add labels to the vocabulary.
+
+        Args:
+            labels (Iterable[str]): Labels to intern
+
+        Returns:
+            int: The bitmask of `labels`
+        """
+        mask = 0
+        with self._lock:
+            for label in labels:
+                bit = self._bits.get(label)
+                if bit is None:
+                    bit = self._bits[label] = 1 << self.size
+                    self.size += 1
+                mask |= bit
+        return mask
+
+    def mask(self, labels: Iterable[str]) -> int:
+        """The bitmask of `labels`. Labels that are not in the vocabulary are ignored.
+
+        Args:
+            labels (Iterable[str]): Labels
+
+        Returns:
+            int: The bitmask
+        """
+        bits = self._bits
+        mask = 0
+        for label in labels:
+            mask |= bits.get(label, 0)
+        return mask
+
+
+# shared by all matchers of the process, so a matcher can be used by multiple Dict2graph instances
+LABEL_VOCABULARY = LabelVocabulary()
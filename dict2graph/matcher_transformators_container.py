@@ -1,10 +1,12 @@
-from typing import Union, List
-from dataclasses import dataclass
+from typing import Union, List, Optional, FrozenSet
+from dataclasses import dataclass, field
 from dict2graph.transformers._base import (
     Transformer,
+    TransformerAccess,
     _NodeTransformerBase,
     _RelationTransformerBase,
 )
+from dict2graph.transformer_dependencies import schedule_passes
 
 
 @dataclass
@@ -14,10 +16,31 @@ class MatcherTransformersContainer:
     ]
     transformers: Union[List[_NodeTransformerBase], List[_RelationTransformerBase]]
 
+    @property
+    def reads(self) -> FrozenSet[str]:
+        """What the matcher and the transformers of the container read, as `TransformerAccess` values"""
+        return self.matcher._get_reads().union(
+            *(transformer.get_reads() for transformer in self.transformers)
+        )
+
+    @property
+    def writes(self) -> FrozenSet[str]:
+        """What the transformers of the container write, as `TransformerAccess` values"""
+        return frozenset().union(
+            *(transformer.get_writes() for transformer in self.transformers)
+        )
+
+    @property
+    def topology_neutral(self) -> bool:
+        return TransformerAccess.TOPOLOGY not in self.reads | self.writes
+
 
 @dataclass
 class MatcherTransformersContainerStack:
     containers: List[MatcherTransformersContainer]
+    _passes: Optional[List[List[MatcherTransformersContainer]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def add_container(
         self,
@@ -46,3 +69,16 @@ class MatcherTransformersContainerStack:
                         matcher=transformer.matcher, transformers=[transformer]
                     )
                 )
+        self._passes = None
+
+    def get_passes(self) -> List[List[MatcherTransformersContainer]]:
+        """Group the containers into passes over the cached nodes/relations. Independent containers are reordered and fused into one pass,
+        based on what their transformers declare to read and write (see `dict2graph.transformer_dependencies`).
+        Containers that create, delete or rewire nodes and relations get a pass of their own.
+
+        Returns:
+            List[List[MatcherTransformersContainer]]: The containers of every pass, in the order to run them
+        """
+        if self._passes is None:
+            self._passes = schedule_passes(self.containers)
+        return self._passes
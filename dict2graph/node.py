@@ -1,20 +1,152 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING, List, Dict, Tuple, Union, FrozenSet, Any
-import json
+from types import MappingProxyType
 import uuid
 import hashlib
 
 if TYPE_CHECKING:
     from dict2graph import Dict2graph
     from dict2graph.relation import Relation
+    from dict2graph.cache_index import LabelIndex
 from dict2graph.graph_object_transformer_meta_data import (
     TransformerMetaDataMixin,
 )
+from dict2graph.label_vocabulary import LABEL_VOCABULARY
+from dict2graph.serialization import dumps
+from dict2graph.profiling import DELETION_COUNTER
+
+# Shared placeholder for nodes without relations in one direction. Replaced by a dict on the first attached relation.
+_NO_RELATIONS: Dict[int, Relation] = MappingProxyType({})
+# Marks an empty id cache. `None` is a valid id
+_NOT_CACHED = object()
+
+
+class LabelList(list):
+    """The labels of a `Node`. Changing the list in place (e.g. `node.labels.append("Extra")`) has the same effect
+    as assigning new labels via `Node.labels`: the label index, the label mask and the default relation types follow the change.
+    """
+
+    __slots__ = ("_node",)
+
+    def __init__(self, node: Node, labels: List[str]):
+        list.__init__(self, labels)
+        self._node = node
+
+    def __reduce__(self):
+        return LabelList, (self._node, list(self))
+
+
+def _notifying_label_list_method(name: str):
+    method = getattr(list, name)
+
+    def mutate(self: LabelList, *args, **kwargs):
+        old_labels = list(self)
+        result = method(self, *args, **kwargs)
+        self._node._labels_changed(old_labels)
+        return result
+
+    mutate.__name__ = name
+    mutate.__doc__ = method.__doc__
+    return mutate
+
+
+for _name in (
+    "append",
+    "extend",
+    "insert",
+    "remove",
+    "pop",
+    "clear",
+    "sort",
+    "reverse",
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+):
+    setattr(LabelList, _name, _notifying_label_list_method(_name))
+del _name
+
+
+class RelationList(list):
+    """The relationships of a `Node`. Changing the list in place (e.g. `node.relations.remove(rel)`) has the same effect
+    as assigning the changed list to `Node.relations`.
+    """
+
+    __slots__ = ("_node",)
+
+    def __init__(self, node: Node, relations: List[Relation]):
+        list.__init__(self, relations)
+        self._node = node
+
+    def __reduce__(self):
+        return RelationList, (self._node, list(self))
+
+    def remove(self, rel: Relation):
+        # relationships are dicts. equal content does not make them the same relationship
+        for index, listed_rel in enumerate(self):
+            if listed_rel is rel:
+                del self[index]
+                return
+        raise ValueError("RelationList.remove(x): x not in list")
+
+
+def _notifying_relation_list_method(name: str):
+    method = getattr(list, name)
+
+    def mutate(self: RelationList, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._node._relations_changed(self)
+        return result
+
+    mutate.__name__ = name
+    mutate.__doc__ = method.__doc__
+    return mutate
+
+
+for _name in (
+    "append",
+    "extend",
+    "insert",
+    "pop",
+    "clear",
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+):
+    setattr(RelationList, _name, _notifying_relation_list_method(_name))
+del _name
 
 
 class Node(dict, TransformerMetaDataMixin):
     """Represantation of a property-graph node"""
 
+    # no instance `__dict__`. saves a lot of memory with millions of nodes
+    __slots__ = (
+        "_labels",
+        "_label_index",
+        "_label_index_seq",
+        "_label_mask",
+        "_label_mask_vocabulary_size",
+        "parent_node",
+        "source_data",
+        "_source_data_digest",
+        "_merge_property_keys",
+        "_merge_keys_cache",
+        "_merge_key_set_cache",
+        "_id_cache",
+        "_outgoing_relations",
+        "_incoming_relations",
+        "_deleted_incoming_relations",
+        "is_list_list_hub",
+        "is_list_list_item",
+        "is_root_node",
+        "_deleted",
+        "_transformer_meta_data",
+        "__weakref__",
+    )
+
     def __init__(
         self,
         labels: List[str],
@@ -24,17 +156,29 @@ class Node(dict, TransformerMetaDataMixin):
     ):
         if isinstance(labels, str):
             labels = [labels]
-        self._labels: List[str] = labels
+        self._labels: LabelList = LabelList(self, labels)
+        # set while the node is part of the label index of a running transformation
+        self._label_index: LabelIndex = None
+        self._label_index_seq: int = None
+        self._label_mask: int = 0
+        self._label_mask_vocabulary_size: int = -1
         self.parent_node: Node = parent_node
         self.source_data: Dict = source_data
+        self._source_data_digest: str = None
         self._merge_property_keys: List[str] = None
-        self.update(**kwargs)
-        self._relations: List[Relation] = []
+        self._invalidate_merge_cache()
+        if kwargs:
+            dict.update(self, kwargs)
+        # adjacency per direction. insertion ordered and keyed by `id(relation)` for O(1) removal
+        self._outgoing_relations: Dict[int, Relation] = _NO_RELATIONS
+        self._incoming_relations: Dict[int, Relation] = _NO_RELATIONS
+        # deleted relations are detached from the adjacency above. the legacy hash ids still count the incoming ones
+        self._deleted_incoming_relations: Dict[int, Relation] = _NO_RELATIONS
         self.is_list_list_hub: bool = False
         self.is_list_list_item: bool = False
         self.is_root_node: bool = False
-        self.deleted = False
-        self._transformer_meta_data: Dict = {}
+        self._deleted: bool = False
+        self._transformer_meta_data: Dict = None
 
     @property
     def id(self) -> str:
@@ -45,24 +189,49 @@ class Node(dict, TransformerMetaDataMixin):
         Returns:
             str: The id. A hex number string
         """
-        if self.merge_property_keys and len(self.merge_property_keys) == 1:
-            if self.merge_property_keys[0] in self:
-                return self[self.merge_property_keys[0]]
-            else:
-                return None
-        elif len(self.keys()) == 0:
-            return None
+        if self._id_cache is not _NOT_CACHED:
+            return self._id_cache
+        merge_keys = self._merge_keys
+        if len(merge_keys) == 1:
+            node_id = self.get(merge_keys[0], None)
+        elif len(self) == 0:
+            node_id = None
         else:
-            return hashlib.md5(
+            node_id = hashlib.md5(
                 bytes(
-                    json.dumps([self[key] for key in self.merge_property_keys]),
+                    dumps([self[key] for key in merge_keys]),
                     "utf-8",
                 ),
             ).hexdigest()
+        self._id_cache = node_id
+        return node_id
+
+    @property
+    def deleted(self) -> bool:
+        """A deleted node will not be written to the database.
+        Transformers are not applied to deleted nodes.
+
+        Returns:
+            bool: True if the node was deleted by a transformer
+        """
+        return self._deleted
+
+    @deleted.setter
+    def deleted(self, value: bool):
+        value = bool(value)
+        if value == self._deleted:
+            return
+        self._deleted = value
+        if self._label_index is not None:
+            self._label_index._set_deleted(self, value)
+        counter = DELETION_COUNTER.get()
+        if counter is not None:
+            counter.nodes += 1 if value else -1
 
     @property
     def labels(self) -> List[str]:
-        """All labels of the node as a list
+        """All labels of the node as a list.
+        The list can be changed in place or replaced by assigning a new list.
 
         Returns:
             List[str]: Labels
@@ -72,10 +241,36 @@ class Node(dict, TransformerMetaDataMixin):
     @labels.setter
     def labels(self, val: List[str]):
         if isinstance(val, list):
-            self._labels = val
+            old_labels = self._labels
+            self._labels = LabelList(self, val)
+            self._labels_changed(old_labels)
         else:
             raise ValueError(f"Labels must be provided as list, got {val}")
 
+    def _labels_changed(self, old_labels: List[str]):
+        self._label_mask_vocabulary_size = -1
+        self._invalidate_merge_cache()
+        if self._label_index is not None:
+            self._label_index._rekey(self, old_labels)
+        # the default relation types are derived from the primary labels
+        for rel in self._outgoing_relations.values():
+            rel._invalidate_relation_type()
+        for rel in self._incoming_relations.values():
+            rel._invalidate_relation_type()
+
+    @property
+    def label_mask(self) -> int:
+        """Bitmask of the labels of the node, in the vocabulary of labels the node matchers test for (see `dict2graph.label_vocabulary`).
+        Cached until the labels change or the vocabulary grows.
+
+        Returns:
+            int: The bitmask
+        """
+        if self._label_mask_vocabulary_size != LABEL_VOCABULARY.size:
+            self._label_mask = LABEL_VOCABULARY.mask(self._labels)
+            self._label_mask_vocabulary_size = LABEL_VOCABULARY.size
+        return self._label_mask
+
     @property
     def primary_label(self) -> str:
         """The label to visually represent the node.
@@ -87,10 +282,12 @@ class Node(dict, TransformerMetaDataMixin):
 
     @primary_label.setter
     def primary_label(self, val: str):
-        if val in self._labels:
-            self._labels.insert(0, self._labels.pop(self._labels.index(val)))
+        labels = list(self._labels)
+        if val in labels:
+            labels.insert(0, labels.pop(labels.index(val)))
         else:
-            self._labels.insert(0, val)
+            labels.insert(0, val)
+        self.labels = labels
 
     @property
     def merge_property_keys(self) -> List[str]:
@@ -98,19 +295,95 @@ class Node(dict, TransformerMetaDataMixin):
         Similar to primary keys in the SQL World.
 
         Defaults include all properties of the node.
+        The returned list is a copy. Assign a new list to change the merge properties.
 
         Returns:
-            List[str]: The
+            List[str]: The merge property keys
         """
-        return (
-            self._merge_property_keys
-            if self._merge_property_keys
-            else list(self.keys())
-        )
+        return list(self._merge_keys)
 
     @merge_property_keys.setter
     def merge_property_keys(self, primary_props: List[str]):
         self._merge_property_keys = primary_props
+        self._invalidate_merge_cache()
+
+    @property
+    def _merge_keys(self) -> Tuple[str, ...]:
+        if self._merge_keys_cache is None:
+            self._merge_keys_cache = tuple(
+                self._merge_property_keys if self._merge_property_keys else self
+            )
+        return self._merge_keys_cache
+
+    @property
+    def _merge_key_set(self) -> FrozenSet[str]:
+        """The merge property keys as part of the node type fingerprints"""
+        if self._merge_key_set_cache is None:
+            self._merge_key_set_cache = frozenset(self._merge_keys)
+        return self._merge_key_set_cache
+
+    def _invalidate_merge_cache(self):
+        self._merge_keys_cache = None
+        self._merge_key_set_cache = None
+        self._id_cache = _NOT_CACHED
+
+    # The `id` and the merge keys are cached. Every mutation of the properties invalidates them.
+    # In place changes of property values (e.g. appending to a list value) are not detected.
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self._invalidate_merge_cache()
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._invalidate_merge_cache()
+
+    def __ior__(self, other):
+        dict.update(self, other)
+        self._invalidate_merge_cache()
+        return self
+
+    def pop(self, *args):
+        self._invalidate_merge_cache()
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self._invalidate_merge_cache()
+        return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        self._invalidate_merge_cache()
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self._invalidate_merge_cache()
+
+    def clear(self):
+        dict.clear(self)
+        self._invalidate_merge_cache()
+
+    @property
+    def source_data_digest(self) -> str:
+        """A deterministic digest of the data the node was parsed from, including all nested data.
+        While parsing, dict2graph computes it bottom-up from the digests of the child nodes,
+        so the source data of a subtree only needs to be serialized once.
+
+        Returns:
+            str: A hex number string
+        """
+        if self._source_data_digest is None:
+            self._source_data_digest = hashlib.md5(
+                bytes(
+                    dumps(self.source_data),
+                    "utf-8",
+                ),
+            ).hexdigest()
+        return self._source_data_digest
+
+    @source_data_digest.setter
+    def source_data_digest(self, digest: str):
+        self._source_data_digest = digest
 
     def get_hash(
         self,
@@ -120,6 +393,7 @@ class Node(dict, TransformerMetaDataMixin):
         include_parent_properties: bool = False,
         include_children_properties: bool = False,
         include_children_data: bool = False,
+        use_source_data_digests: bool = False,
     ) -> str:
         """Generate a deterministic hash of the node.
         Optionaly this hahs can include data from child or parents to distinguish from nodes with equal properties.
@@ -131,6 +405,8 @@ class Node(dict, TransformerMetaDataMixin):
             include_parent_properties (bool, optional): Set True to also include merge properties of parent nodes. Defaults to False.
             include_children_properties (bool, optional): Set True to also include merge properties of direct child nodes. Defaults to False.
             include_children_data (bool, optional): Set True to also include all properties of the child tree. Defaults to False.
+            use_source_data_digests (bool, optional): Set True to represent the child tree by the `source_data_digest` of the direct child nodes
+                instead of serializing the whole child tree. Results in different hashes. Defaults to False.
 
         Returns:
             str: A hex number string
@@ -148,7 +424,7 @@ class Node(dict, TransformerMetaDataMixin):
                 [
                     {key: val}
                     for key, val in self.items()
-                    if key in self.merge_property_keys + include_properties
+                    if key in self._merge_keys or key in include_properties
                 ]
             )
         if include_other_properties:
@@ -156,7 +432,7 @@ class Node(dict, TransformerMetaDataMixin):
                 [
                     {key: val}
                     for key, val in self.items()
-                    if key not in self.merge_property_keys + include_properties
+                    if key not in self._merge_keys and key not in include_properties
                 ]
             )
         if include_parent_properties and self.parent_node is not None:
@@ -164,42 +440,108 @@ class Node(dict, TransformerMetaDataMixin):
                 [
                     {key: val}
                     for key, val in self.parent_node.items()
-                    if key not in self.parent_node.merge_property_keys
+                    if key not in self.parent_node._merge_keys
                 ]
             )
+        if include_children_properties or include_children_data:
+            child_nodes = (
+                self.child_nodes
+                if use_source_data_digests
+                else self._get_legacy_hash_child_nodes()
+            )
         if include_children_properties:
-            for child in self.child_nodes:
+            for child in child_nodes:
                 hash_source_values.extend(
                     [
                         {key: val}
                         for key, val in child.items()
-                        if key not in child.merge_property_keys
+                        if key not in child._merge_keys
                     ]
                 )
         if include_children_data:
-            for child in self.child_nodes:
-                hash_source_values.append(child.source_data)
+            for child in child_nodes:
+                hash_source_values.append(
+                    child.source_data_digest
+                    if use_source_data_digests
+                    else child.source_data
+                )
 
         return hashlib.md5(
             bytes(
-                json.dumps(hash_source_values),
+                dumps(hash_source_values),
                 "utf-8",
             ),
         ).hexdigest()
 
     @property
     def relations(self) -> List[Relation]:
-        """All relationships a node is connected with
+        """All relationships a node is connected with. Outgoing relationships first, then incoming relationships.
+        The list can be changed in place or replaced by assigning a new list.
 
         Returns:
             List[Relation]: A list of relations
         """
-        return self._relations
+        return RelationList(
+            self,
+            list(self._outgoing_relations.values())
+            + [
+                rel
+                for rel in self._incoming_relations.values()
+                # self referencing relationships are already listed as outgoing
+                if rel._start_node is not self
+            ],
+        )
 
     @relations.setter
     def relations(self, relations: List[Relation]):
+        self._outgoing_relations = _NO_RELATIONS
+        self._incoming_relations = _NO_RELATIONS
+        self._deleted_incoming_relations = _NO_RELATIONS
+        for rel in relations:
+            if rel.deleted:
+                if rel._end_node is self:
+                    self._attach_deleted_incoming_relation(rel)
+                continue
+            if rel._start_node is self:
+                self._attach_relation(rel, outgoing=True)
+            if rel._end_node is self:
+                self._attach_relation(rel, outgoing=False)
+
+    def _relations_changed(self, relations: List[Relation]):
+        """Called by `RelationList` after an in-place change"""
+        # deleted relationships are not part of the list. the legacy hash ids still need the incoming ones
+        deleted_incoming_relations = self._deleted_incoming_relations
+        self.relations = relations
+        for rel in deleted_incoming_relations.values():
+            if rel.deleted and rel._end_node is self:
+                self._attach_deleted_incoming_relation(rel)
+
+    def _attach_relation(self, rel: Relation, outgoing: bool):
+        if outgoing:
+            if self._outgoing_relations is _NO_RELATIONS:
+                self._outgoing_relations = {}
+            self._outgoing_relations[id(rel)] = rel
+        else:
+            if self._incoming_relations is _NO_RELATIONS:
+                self._incoming_relations = {}
+            self._incoming_relations[id(rel)] = rel
+
+    def _detach_relation(self, rel: Relation, outgoing: bool):
+        if outgoing:
+            if self._outgoing_relations is not _NO_RELATIONS:
+                self._outgoing_relations.pop(id(rel), None)
+        else:
+            if self._incoming_relations is not _NO_RELATIONS:
+                self._incoming_relations.pop(id(rel), None)
 
-        self._relations = [rel for rel in relations if not rel.deleted]
+    def _attach_deleted_incoming_relation(self, rel: Relation):
+        if self._deleted_incoming_relations is _NO_RELATIONS:
+            self._deleted_incoming_relations = {}
+        self._deleted_incoming_relations[id(rel)] = rel
+
+    def _detach_deleted_incoming_relation(self, rel: Relation):
+        if self._deleted_incoming_relations is not _NO_RELATIONS:
+            self._deleted_incoming_relations.pop(id(rel), None)
 
     @property
     def outgoing_relations(self) -> List[Relation]:
@@ -210,8 +552,8 @@ class Node(dict, TransformerMetaDataMixin):
         """
         return [
             rel
-            for rel in self.relations
-            if rel.start_node == self and not rel.end_node.deleted
+            for rel in self._outgoing_relations.values()
+            if not rel._end_node.deleted
         ]
 
     @property
@@ -223,10 +565,37 @@ class Node(dict, TransformerMetaDataMixin):
         """
         return [
             rel
-            for rel in self.relations
-            if rel.end_node == self and not rel.start_node.deleted
+            for rel in self._incoming_relations.values()
+            if not rel._start_node.deleted
         ]
 
+    def _get_legacy_hash_child_nodes(self) -> List[Node]:
+        """The child nodes as the legacy hash ids see them.
+        Relationships used to be assigned to a direction by comparing the content of the nodes instead of their identity,
+        so an incoming relationship from a node with equal properties (e.g. two still empty nodes) counted as outgoing.
+        Kept to produce stable ids for existing databases.
+
+        Returns:
+            List[Node]: A list of Nodes
+        """
+        child_nodes = [
+            rel._end_node
+            for rel in self._outgoing_relations.values()
+            if not rel._end_node.deleted
+        ]
+        child_nodes.extend(
+            rel._end_node
+            for relations in (
+                self._incoming_relations,
+                self._deleted_incoming_relations,
+            )
+            for rel in relations.values()
+            if rel._start_node is not self
+            and rel._start_node == self
+            and not rel._end_node.deleted
+        )
+        return child_nodes
+
     @property
     def child_nodes(self) -> List[Node]:
         """All nodes of outgoing relationshipsets
@@ -0,0 +1,73 @@
+"""
+Process pool helpers for `Dict2graph.parse_parallel()`.
+
+The configured Dict2graph instance is compiled (options and transformers, without any parsed data, see `Dict2graph.compile()`),
+pickled once and sent to every worker process with the pool initializer.
+The workers parse shards of records and return the content of their `_nodeSets`/`_relSets` as plain, picklable
+partials keyed by the node/relationship type fingerprints. The parent process merges these partials.
+"""
+import pickle
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterable, Iterator, List, Tuple
+
+if TYPE_CHECKING:
+    from dict2graph import Dict2graph
+    from dict2graph.pipeline import CompiledPipeline
+
+# (labels, merge_keys, node rows)
+NodeSetPartial = Tuple[List[str], List[str], List[Dict]]
+# (rel_type, start_node_labels, end_node_labels, start_node_properties, end_node_properties, (start, end, props) rows)
+RelSetPartial = Tuple[
+    str, List[str], List[str], List[str], List[str], List[Tuple[Dict, Dict, Dict]]
+]
+# (node set partials, relationship set partials)
+ParsePartial = Tuple[Dict[Tuple, NodeSetPartial], Dict[Tuple, RelSetPartial]]
+
+_worker_d2g: "Dict2graph" = None
+
+
+def _init_worker(pickled_pipeline: bytes):
+    global _worker_d2g
+    pipeline: "CompiledPipeline" = pickle.loads(pickled_pipeline)
+    _worker_d2g = pipeline.create_worker()
+
+
+def _parse_shard(
+    records: List[Any], root_node_labels: List[str]
+) -> Tuple[ParsePartial, int]:
+    for record in records:
+        _worker_d2g.parse(record, root_node_labels=root_node_labels)
+    partial = _worker_d2g._export_buffer()
+    _worker_d2g._clear_buffer()
+    return partial, len(records)
+
+
+def iter_parallel_partials(
+    d2g: "Dict2graph",
+    records: Iterable[Any],
+    root_node_labels: List[str],
+    workers: int,
+    records_per_shard: int,
+) -> Iterator[Tuple[ParsePartial, int]]:
+    """Parse `records` in shards of `records_per_shard` in a pool of `workers` processes.
+    The partials and the number of records they were parsed from are yielded in the order of the records.
+    Only a bounded number of shards is in flight at a time, so `records` can be a lazy iterator over a huge dataset.
+    """
+    records = iter(records)
+    max_in_flight = workers * 2
+    in_flight: Deque[Future] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(pickle.dumps(d2g.compile()),),
+    ) as executor:
+        while True:
+            shard = list(itertools.islice(records, records_per_shard))
+            if shard:
+                in_flight.append(executor.submit(_parse_shard, shard, root_node_labels))
+            if in_flight and (len(in_flight) >= max_in_flight or not shard):
+                yield in_flight.popleft().result()
+            elif not shard:
+                return
@@ -0,0 +1,141 @@
+"""
+Immutable, picklable configuration of a `Dict2graph` instance: its options and transformers. See `Dict2graph.compile()`.
+
+The transformers do not keep any state of a run on themselves; the `Dict2graph` instance running them is context-local
+(see `_NodeTransformerBase.d2g`). So the workers created from one `CompiledPipeline` share the transformer instances
+and can parse concurrently, in threads or (after pickling the pipeline) in other processes.
+"""
+import copy
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Tuple, Type
+
+from dict2graph.matcher_transformators_container import (
+    MatcherTransformersContainer,
+    MatcherTransformersContainerStack,
+)
+
+if TYPE_CHECKING:
+    from dict2graph import Dict2graph
+
+# attributes of a Dict2graph instance, that are not options. all underscored attributes are state as well
+_STATE_ATTRIBUTES = frozenset(
+    {
+        "matcher_and_node_transformers_stack",
+        "matcher_and_rel_transformers_stack",
+        "last_read_stats",
+    }
+)
+
+
+@dataclass(frozen=True)
+class CompiledStack:
+    """The containers of a `MatcherTransformersContainerStack` and their passes, as indexes of the containers"""
+
+    containers: Tuple[MatcherTransformersContainer, ...]
+    passes: Tuple[Tuple[int, ...], ...]
+
+    @classmethod
+    def from_stack(cls, stack: MatcherTransformersContainerStack) -> "CompiledStack":
+        # copy all containers at once, so transformers still share their matcher with the container.
+        # changes to the transformers of the original instance do not reach the pipeline
+        containers = tuple(copy.deepcopy(stack.containers))
+        for container in containers:
+            container.matcher._compile()
+        return cls(
+            containers=containers,
+            passes=tuple(
+                tuple(
+                    stack.containers.index(container) for container in pass_containers
+                )
+                for pass_containers in stack.get_passes()
+            ),
+        )
+
+    def create_stack(self) -> MatcherTransformersContainerStack:
+        # every worker gets its own containers, so adding transformers to a worker does not change the pipeline.
+        # the matchers and transformers are shared
+        containers = [
+            MatcherTransformersContainer(
+                matcher=container.matcher, transformers=list(container.transformers)
+            )
+            for container in self.containers
+        ]
+        stack = MatcherTransformersContainerStack(containers)
+        stack._passes = [
+            [containers[index] for index in indexes] for indexes in self.passes
+        ]
+        return stack
+
+    def __setstate__(self, state: Dict[str, Any]):
+        # the label bitmasks of the matchers depend on the process. compile them once after unpickling, instead of on every worker start
+        for container in state["containers"]:
+            container.matcher._compile()
+        for key, val in state.items():
+            object.__setattr__(self, key, val)
+
+
+@dataclass(frozen=True)
+class CompiledPipeline:
+    """The options and transformers of a `Dict2graph` instance, validated and scheduled once.
+    Create any number of `Dict2graph` workers from it with `create_worker()`. Changes to the original instance do not affect the pipeline.
+
+    **usage**:
+    ```python
+    from concurrent.futures import ThreadPoolExecutor
+
+    d2g = Dict2graph()
+    d2g.add_transformation(...)
+    pipeline = d2g.compile()
+
+    def parse_shard(records):
+        worker = pipeline.create_worker()
+        for record in records:
+            worker.parse(record)
+        worker.merge(NEO4J_DRIVER)
+
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(parse_shard, shards))
+    ```
+    """
+
+    dict2graph_class: Type["Dict2graph"]
+    # the options of the instance, including overridden class attributes like `list_hub_additional_labels`
+    options: Tuple[Tuple[str, Any], ...]
+    node_stack: CompiledStack
+    rel_stack: CompiledStack
+
+    @classmethod
+    def from_dict2graph(cls, d2g: "Dict2graph") -> "CompiledPipeline":
+        return cls(
+            dict2graph_class=type(d2g),
+            options=tuple(
+                (key, copy.deepcopy(val))
+                for key, val in vars(d2g).items()
+                if not key.startswith("_") and key not in _STATE_ATTRIBUTES
+            ),
+            node_stack=CompiledStack.from_stack(
+                d2g.matcher_and_node_transformers_stack
+            ),
+            rel_stack=CompiledStack.from_stack(d2g.matcher_and_rel_transformers_stack),
+        )
+
+    def create_worker(self) -> "Dict2graph":
+        """Create a new `Dict2graph` instance with the options and transformers of the pipeline.
+        The transformers are not validated again; they are shared with all other workers of the pipeline.
+        The worker is an instance of the class of the compiled instance. The `__init__()` of a subclass is not called,
+        the public attributes it set are copied from the compiled instance like the options.
+
+        Returns:
+            Dict2graph: An instance with an empty cache and buffer
+        """
+        # imported here, `dict2graph.dict2graph` imports this module
+        from dict2graph.dict2graph import Dict2graph
+
+        worker = self.dict2graph_class.__new__(self.dict2graph_class)
+        Dict2graph.__init__(worker)
+        for key, val in self.options:
+            # mutable options like label lists must not be shared between workers
+            setattr(worker, key, copy.deepcopy(val))
+        worker.matcher_and_node_transformers_stack = self.node_stack.create_stack()
+        worker.matcher_and_rel_transformers_stack = self.rel_stack.create_stack()
+        return worker
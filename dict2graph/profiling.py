@@ -0,0 +1,206 @@
+"""
+Opt-in instrumentation of the flush steps of `Dict2graph`: the transformations per matcher container and the manifestation of nodes and relations.
+See `Dict2graph.enable_profiling()`. While profiling is disabled, the flush only checks for a missing profiler once per step.
+"""
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
+
+if TYPE_CHECKING:
+    from dict2graph.matcher_transformators_container import (
+        MatcherTransformersContainer,
+    )
+
+
+@dataclass
+class ContainerStats:
+    """Metrics of one matcher container (a matcher and the transformers bound to it), summed up over the flushes"""
+
+    # "node" or "relation"
+    kind: str
+    # position of the container in its `MatcherTransformersContainerStack`
+    index: int
+    matcher: str
+    transformers: List[str]
+    # number of passes the container ran in; one per flush and round (see `Dict2graph(transformer_rounds)`)
+    passes: int = 0
+    seconds: float = 0.0
+    # nodes/relations the container looked at
+    candidates: int = 0
+    # nodes/relations the container matched and transformed
+    matches: int = 0
+    nodes_created: int = 0
+    relations_created: int = 0
+    nodes_deleted: int = 0
+    relations_deleted: int = 0
+
+    @property
+    def selectivity(self) -> float:
+        """Share of the visited candidates that matched"""
+        return self.matches / self.candidates if self.candidates else 0.0
+
+    @property
+    def seconds_per_match(self) -> float:
+        return self.seconds / self.matches if self.matches else 0.0
+
+    def _add(self, other: "ContainerStats"):
+        self.passes += other.passes
+        self.seconds += other.seconds
+        self.candidates += other.candidates
+        self.matches += other.matches
+        self.nodes_created += other.nodes_created
+        self.relations_created += other.relations_created
+        self.nodes_deleted += other.nodes_deleted
+        self.relations_deleted += other.relations_deleted
+
+    def __str__(self):
+        return (
+            f"{self.kind} #{self.index} {self.matcher} -> {', '.join(self.transformers)}: "
+            f"{self.seconds:.4f}s, {self.matches}/{self.candidates} matched, "
+            f"+{self.nodes_created} nodes, +{self.relations_created} rels, "
+            f"-{self.nodes_deleted} nodes, -{self.relations_deleted} rels"
+        )
+
+
+@dataclass
+class ProfileStats:
+    """Metrics of the flushes of a `Dict2graph` instance. `Dict2graph.stats()` returns the sum of all flushes since profiling was enabled,
+    the callback of `Dict2graph.enable_profiling()` gets the metrics of every single flush.
+    Flat records are written to their NodeSet without a flush; their nodes only show up in the sum."""
+
+    flushes: int = 0
+    flush_seconds: float = 0.0
+    transformation_seconds: float = 0.0
+    manifested_nodes: int = 0
+    # manifested nodes that were combined with a buffered duplicate (see `Dict2graph(deduplicate_nodes)`)
+    deduplicated_nodes: int = 0
+    manifest_node_seconds: float = 0.0
+    manifested_relations: int = 0
+    manifest_relation_seconds: float = 0.0
+    # node containers first, then relation containers, each in stack order
+    containers: List[ContainerStats] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def _add(self, other: "ProfileStats"):
+        self.flushes += other.flushes
+        self.flush_seconds += other.flush_seconds
+        self.transformation_seconds += other.transformation_seconds
+        self.manifested_nodes += other.manifested_nodes
+        self.deduplicated_nodes += other.deduplicated_nodes
+        self.manifest_node_seconds += other.manifest_node_seconds
+        self.manifested_relations += other.manifested_relations
+        self.manifest_relation_seconds += other.manifest_relation_seconds
+        by_key = {(stats.kind, stats.index): stats for stats in self.containers}
+        for container_stats in other.containers:
+            stats = by_key.get((container_stats.kind, container_stats.index))
+            if stats is None:
+                stats = ContainerStats(
+                    kind=container_stats.kind,
+                    index=container_stats.index,
+                    matcher=container_stats.matcher,
+                    transformers=list(container_stats.transformers),
+                )
+                self.containers.append(stats)
+            stats._add(container_stats)
+        self.containers.sort(key=lambda stats: (stats.kind != "node", stats.index))
+
+    def __str__(self):
+        lines = [
+            f"{self.flushes} flushes in {self.flush_seconds:.4f}s, transformations {self.transformation_seconds:.4f}s, "
+            f"{self.manifested_nodes} nodes manifested ({self.deduplicated_nodes} duplicates) in {self.manifest_node_seconds:.4f}s, "
+            f"{self.manifested_relations} relations manifested in {self.manifest_relation_seconds:.4f}s"
+        ]
+        lines.extend(f"  {stats}" for stats in self.containers)
+        return "\n".join(lines)
+
+
+class DeletionCounter:
+    """Counts the nodes and relations deleted while it is set as `DELETION_COUNTER`. Updated by the `deleted` setters of `Node` and `Relation`."""
+
+    __slots__ = ("nodes", "relations")
+
+    def __init__(self):
+        self.nodes: int = 0
+        self.relations: int = 0
+
+
+# only set while a profiled container runs. context-local, as workers of one pipeline may run in threads
+DELETION_COUNTER: ContextVar[Optional[DeletionCounter]] = ContextVar(
+    "dict2graph_deletion_counter", default=None
+)
+
+
+class CountingIterable:
+    """Pass through an iterable and count the items"""
+
+    def __init__(self, iterable: Iterable):
+        self.iterable = iterable
+        self.count = 0
+
+    def __iter__(self) -> Iterator:
+        for item in self.iterable:
+            self.count += 1
+            yield item
+
+
+class Profiler:
+    def __init__(self, callback: Optional[Callable[[ProfileStats], None]] = None):
+        self.callback = callback
+        self.totals = ProfileStats()
+        self._flush: Optional[ProfileStats] = None
+        self._flush_containers: Dict[int, ContainerStats] = {}
+        self._flush_start: float = 0.0
+
+    def start_flush(self):
+        self._flush = ProfileStats(flushes=1)
+        self._flush_containers = {}
+        self._flush_start = time.perf_counter()
+
+    def end_flush(self):
+        flush = self._flush
+        flush.flush_seconds = time.perf_counter() - self._flush_start
+        flush.containers = list(self._flush_containers.values())
+        self._flush = None
+        self._flush_containers = {}
+        self.totals._add(flush)
+        if self.callback is not None:
+            self.callback(flush)
+
+    @property
+    def flush(self) -> ProfileStats:
+        return self._flush
+
+    def add_flat_record_node(self, seconds: float, deduplicated: bool):
+        """Count the node of a flat record. Flat records bypass the flushes (see `Dict2graph._parse_flat_record()`), so only the totals are updated."""
+        self.totals.manifested_nodes += 1
+        self.totals.manifest_node_seconds += seconds
+        if deduplicated:
+            self.totals.deduplicated_nodes += 1
+
+    def get_container_stats(
+        self, kind: str, index: int, container: "MatcherTransformersContainer"
+    ) -> ContainerStats:
+        stats = self._flush_containers.get(id(container))
+        if stats is None:
+            stats = self._flush_containers[id(container)] = ContainerStats(
+                kind=kind,
+                index=index,
+                matcher=repr(container.matcher),
+                transformers=[
+                    transformer.__class__.__name__
+                    for transformer in container.transformers
+                ],
+            )
+        return stats
@@ -0,0 +1,336 @@
+"""
+Incremental readers for large json and json lines (NDJSON) files.
+
+The readers yield one record at a time, so a file does not need to fit into memory.
+They are used by `Dict2graph.parse_json_file()` but can also be used on their own
+(e.g. in combination with `Dict2graph.parse_iter()`).
+"""
+import io
+import os
+import json
+import gzip
+import mmap
+import time
+import logging
+from dataclasses import dataclass
+from typing import Any, IO, Iterator, List, Union
+
+try:
+    # optional C accelerated streaming json parser
+    import ijson
+except ImportError:
+    ijson = None
+
+log = logging.getLogger(__name__)
+
+JSON_WHITESPACE = " \t\n\r"
+# chars that can follow a complete number
+JSON_NUMBER_DELIMITERS = JSON_WHITESPACE + ",]}"
+GZIP_MAGIC_NUMBER = b"\x1f\x8b"
+
+
+@dataclass
+class ReadStats:
+    """Throughput statistics of a reader. Updated while the records are consumed.
+    `seconds` is the time spent in the reader; the time the consumer spends on the records is not included."""
+
+    bytes_read: int = 0
+    records: int = 0
+    seconds: float = 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes_read / self.seconds if self.seconds else 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.records} records ({self.bytes_read} bytes) in {self.seconds:.2f}s: "
+            f"{self.records_per_second:.0f} records/s, {self.bytes_per_second / 1024 / 1024:.2f} MB/s"
+        )
+
+
+def iter_json_array(
+    file: Union[str, os.PathLike, IO],
+    json_path: Union[str, List[str]] = None,
+    chunk_size: int = 1024 * 1024,
+    use_accelerator: bool = True,
+) -> Iterator[Any]:
+    """Read a json array from a file, element by element.
+    Only one element (plus a read buffer) is held in memory at a time.
+
+    **usage**
+    ```python
+    from dict2graph.readers import iter_json_array
+
+    # file content: {"meta": {"version": 2}, "results": {"items": [{"id": 1}, {"id": 2}]}}
+    for item in iter_json_array("export.json", json_path="results.items"):
+        print(item)
+    ```
+
+    Args:
+        file (Union[str, os.PathLike, IO]): A path to a json file or an opened file object (text or binary).
+        json_path (Union[str, List[str]], optional): The path of object keys to the array, as list or dot separated string.
+            If None, the top-level value of the file must be the array. Defaults to None.
+        chunk_size (int, optional): Number of characters that are read from the file at once. Defaults to 1MB.
+        use_accelerator (bool, optional): Use the C accelerated `ijson` module, if it is installed. Defaults to True.
+
+    Raises:
+        ValueError: When the file is not valid json or the json path does not point to an array.
+
+    Yields:
+        Any: The elements of the array
+    """
+    if isinstance(json_path, str):
+        json_path = json_path.split(".") if json_path else []
+    elif json_path is None:
+        json_path = []
+    if use_accelerator and ijson is not None:
+        yield from _iter_json_array_ijson(file, json_path)
+        return
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "r", encoding="utf-8") as fp:
+            yield from _JsonArrayScanner(fp, chunk_size).iter_array(json_path)
+    else:
+        if isinstance(file, io.TextIOBase):
+            yield from _JsonArrayScanner(file, chunk_size).iter_array(json_path)
+            return
+        text_file = io.TextIOWrapper(file, encoding="utf-8")
+        try:
+            yield from _JsonArrayScanner(text_file, chunk_size).iter_array(json_path)
+        finally:
+            # the wrapper would close the binary file of the caller
+            text_file.detach()
+
+
+def iter_jsonl(
+    file: Union[str, os.PathLike],
+    chunk_size: int = 16 * 1024 * 1024,
+    stats: ReadStats = None,
+) -> Iterator[Any]:
+    """Read a json lines (NDJSON) file, record by record.
+    Plain files are memory-mapped and split into chunks on newline boundaries; the lines are decoded lazily.
+    Gzip compressed files (detected by their magic number) are decompressed as a stream.
+    Empty lines are skipped.
+
+    **usage**
+    ```python
+    from dict2graph.readers import iter_jsonl, ReadStats
+
+    stats = ReadStats()
+    for record in iter_jsonl("export.jsonl.gz", stats=stats):
+        print(record)
+    print(stats)
+    ```
+
+    Args:
+        file (Union[str, os.PathLike]): Path to a json lines file. Can be gzip compressed.
+        chunk_size (int, optional): Approximate number of (uncompressed) bytes that are split into lines at once. Defaults to 16MB.
+        stats (ReadStats, optional): Will be updated with the number of bytes and records read and the time spent reading. Defaults to None.
+
+    Raises:
+        ValueError: When a line is not valid json.
+
+    Yields:
+        Any: The decoded records
+    """
+    if stats is None:
+        stats = ReadStats()
+    with open(file, "rb") as fp:
+        is_gzip = fp.read(len(GZIP_MAGIC_NUMBER)) == GZIP_MAGIC_NUMBER
+        fp.seek(0)
+        if is_gzip:
+            chunks = _iter_gzip_line_chunks(fp, chunk_size)
+        else:
+            chunks = _iter_mmap_line_chunks(fp, chunk_size)
+        start_time = time.perf_counter()
+        # chunks end on newlines, so the lines can be counted per chunk
+        line_number = 0
+        for chunk in chunks:
+            stats.bytes_read += len(chunk)
+            for line in chunk.splitlines():
+                line_number += 1
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid json in line {line_number}: {e}") from e
+                stats.records += 1
+                # pause the clock while the consumer handles the record
+                stats.seconds += time.perf_counter() - start_time
+                yield record
+                start_time = time.perf_counter()
+        stats.seconds += time.perf_counter() - start_time
+
+
+def _iter_mmap_line_chunks(fp: IO[bytes], chunk_size: int) -> Iterator[bytes]:
+    if os.fstat(fp.fileno()).st_size == 0:
+        # empty files can not be memory-mapped
+        return
+    with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        size = len(mm)
+        while start < size:
+            end = mm.find(b"\n", min(start + chunk_size, size))
+            end = size if end == -1 else end + 1
+            yield mm[start:end]
+            start = end
+
+
+def _iter_gzip_line_chunks(fp: IO[bytes], chunk_size: int) -> Iterator[bytes]:
+    incomplete_line = b""
+    with gzip.GzipFile(fileobj=fp, mode="rb") as gz:
+        while True:
+            chunk = gz.read(chunk_size)
+            if not chunk:
+                break
+            chunk = incomplete_line + chunk
+            last_newline = chunk.rfind(b"\n")
+            if last_newline == -1:
+                incomplete_line = chunk
+                continue
+            incomplete_line = chunk[last_newline + 1 :]
+            yield chunk[: last_newline + 1]
+    if incomplete_line:
+        yield incomplete_line
+
+
+def _iter_json_array_ijson(
+    file: Union[str, os.PathLike, IO], json_path: List[str]
+) -> Iterator[Any]:
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as fp:
+            yield from _iter_ijson_items(fp, json_path)
+    else:
+        yield from _iter_ijson_items(file, json_path)
+
+
+def _iter_ijson_items(fp: IO, json_path: List[str]) -> Iterator[Any]:
+    """Same behaviour as `_JsonArrayScanner.iter_array()`, including the errors"""
+    array_prefix = ".".join(json_path)
+    array_found = False
+
+    def iter_events():
+        nonlocal array_found
+        for prefix, event, value in ijson.parse(fp, use_float=True):
+            if prefix == array_prefix and event == "start_array":
+                array_found = True
+            yield prefix, event, value
+
+    # ijson only yields the items below the prefix. a missing path or a value that is no array would silently yield nothing
+    item_prefix = ".".join(json_path + ["item"])
+    try:
+        yield from ijson.items(iter_events(), item_prefix, use_float=True)
+    except ijson.JSONError as e:
+        raise ValueError(f"Invalid json: {e}") from e
+    if not array_found:
+        raise ValueError(f"No array found at json path '{array_prefix}'")
+
+
+class _JsonArrayScanner:
+    """Minimal streaming json scanner based on `json.JSONDecoder.raw_decode`.
+    It navigates to an array and decodes the array elements one by one from a growing read buffer.
+    """
+
+    def __init__(self, fp: IO[str], chunk_size: int):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer: str = ""
+        self.pos: int = 0
+        self.eof: bool = False
+
+    def iter_array(self, json_path: List[str]) -> Iterator[Any]:
+        for key in json_path:
+            self._seek_object_key(key)
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self._decode_value()
+            char = self._peek()
+            self.pos += 1
+            if char == "]":
+                return
+            elif char != ",":
+                raise self._error(f"Expected ',' or ']' in array, got '{char}'")
+
+    def _seek_object_key(self, key: str):
+        self._expect("{")
+        if self._peek() == "}":
+            raise self._error(f"Key '{key}' of json path not found")
+        while True:
+            current_key = self._decode_value()
+            if not isinstance(current_key, str):
+                raise self._error(f"Expected object key, got '{current_key}'")
+            self._expect(":")
+            if current_key == key:
+                return
+            # skip the value of any other key
+            self._decode_value()
+            char = self._peek()
+            self.pos += 1
+            if char == "}":
+                raise self._error(f"Key '{key}' of json path not found")
+            elif char != ",":
+                raise self._error(f"Expected ',' or '}}' in object, got '{char}'")
+
+    def _read_more(self) -> bool:
+        if self.eof:
+            return False
+        # read at least as much as we already buffered, to keep re-decoding of large values linear
+        chunk = self.fp.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        # drop the consumed part of the buffer
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Skip whitespaces and return the next char without consuming it"""
+        while True:
+            while (
+                self.pos < len(self.buffer) and self.buffer[self.pos] in JSON_WHITESPACE
+            ):
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read_more():
+                raise self._error("Unexpected end of file")
+
+    def _expect(self, char: str):
+        next_char = self._peek()
+        if next_char != char:
+            raise self._error(f"Expected '{char}', got '{next_char}'")
+        self.pos += 1
+
+    def _decode_value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # a number may continue in the next chunk, e.g. `2.` of `2.5e3` decodes as `2`
+                if (
+                    not isinstance(value, (int, float))
+                    or isinstance(value, bool)
+                    or (
+                        end < len(self.buffer)
+                        and self.buffer[end] in JSON_NUMBER_DELIMITERS
+                    )
+                    or not self._read_more()
+                ):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if not self._read_more():
+                    raise ValueError(f"Invalid json: {e}") from e
+
+    def _error(self, message: str) -> ValueError:
+        return ValueError(f"{message} (buffer position {self.pos})")
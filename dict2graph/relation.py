@@ -1,14 +1,32 @@
 from dict2graph.node import Node
-from typing import Dict
+from dict2graph.profiling import DELETION_COUNTER
+from typing import TYPE_CHECKING, Dict
 
 from dict2graph.graph_object_transformer_meta_data import (
     TransformerMetaDataMixin,
 )
 
+if TYPE_CHECKING:
+    from dict2graph.cache_index import RelationTypeIndex
+
 
 class Relation(dict, TransformerMetaDataMixin):
     """Represantation of a property-graph relationship"""
 
+    # no instance `__dict__`. saves a lot of memory with millions of relations
+    __slots__ = (
+        "_relation_type",
+        "_relation_type_cache",
+        "_type_index",
+        "_type_index_seq",
+        "_start_node",
+        "_end_node",
+        "_origin_relation_type",
+        "_deleted",
+        "_transformer_meta_data",
+        "__weakref__",
+    )
+
     def __init__(
         self, start_node: Node, end_node: Node, relation_type: str = None, **kwargs
     ):
@@ -21,15 +39,19 @@ class Relation(dict, TransformerMetaDataMixin):
             **kwargs (Any, optional): Any further properties of this relationship. Defaults to None.
         """
         self._relation_type = relation_type
+        self._relation_type_cache: str = None
+        # set while the relation is part of the relation type index of a running transformation
+        self._type_index: RelationTypeIndex = None
+        self._type_index_seq: int = None
         self._start_node = None
         self._end_node = None
+        self._deleted = False
         self.start_node = start_node
         self.end_node = end_node
 
         self._origin_relation_type: str = relation_type
-        self.deleted = False
         self.update(**kwargs)
-        self._transformer_meta_data: Dict = {}
+        self._transformer_meta_data: Dict = None
 
     @property
     def relation_type(self) -> str:
@@ -40,12 +62,26 @@ class Relation(dict, TransformerMetaDataMixin):
 
         `<start node first label>_HAS_<end_node_first_label>`
 
+        The default type is cached. It is updated when the start or end node is replaced or relabeled.
+
         Returns:
             str: The relationship type as str
         """
         if self._relation_type:
             return self._relation_type
-        elif self.start_node is not None and self.end_node is not None:
+        if self._relation_type_cache is None:
+            self._relation_type_cache = self._get_default_relation_type()
+        return self._relation_type_cache
+
+    @relation_type.setter
+    def relation_type(self, value: str) -> str:
+        old_type = self.relation_type if self._type_index is not None else None
+        self._relation_type = value
+        if self._type_index is not None:
+            self._type_index._rekey(self, (old_type,))
+
+    def _get_default_relation_type(self) -> str:
+        if self.start_node is not None and self.end_node is not None:
             if (
                 self.start_node.is_list_list_hub
                 # and not self.start_node.is_root_node
@@ -58,9 +94,42 @@ class Relation(dict, TransformerMetaDataMixin):
         else:
             return "NON_NAMED_REL"
 
-    @relation_type.setter
-    def relation_type(self, value: str) -> str:
-        self._relation_type = value
+    def _invalidate_relation_type(self):
+        """The start or end node was replaced or relabeled. The default relation type must be computed again."""
+        old_type = self._relation_type_cache
+        self._relation_type_cache = None
+        if self._type_index is not None and not self._relation_type:
+            self._type_index._rekey(self, (old_type,))
+
+    @property
+    def deleted(self) -> bool:
+        """A deleted relationship will not be written to the database.
+        It is detached from its start and end node, so it is not listed in `Node.relations` anymore.
+
+        Returns:
+            bool: True if the relationship was deleted by a transformer
+        """
+        return self._deleted
+
+    @deleted.setter
+    def deleted(self, value: bool):
+        value = bool(value)
+        if value == self._deleted:
+            return
+        self._deleted = value
+        if value:
+            self._start_node._detach_relation(self, outgoing=True)
+            self._end_node._detach_relation(self, outgoing=False)
+            self._end_node._attach_deleted_incoming_relation(self)
+        else:
+            self._start_node._attach_relation(self, outgoing=True)
+            self._end_node._detach_deleted_incoming_relation(self)
+            self._end_node._attach_relation(self, outgoing=False)
+        if self._type_index is not None:
+            self._type_index._set_deleted(self, value)
+        counter = DELETION_COUNTER.get()
+        if counter is not None:
+            counter.relations += 1 if value else -1
 
     @property
     def start_node(self) -> Node:
@@ -73,11 +142,13 @@ class Relation(dict, TransformerMetaDataMixin):
 
     @start_node.setter
     def start_node(self, node: Node):
-        if self._start_node:
+        if self._start_node is not None:
             # relation changed. we need to remove the relation form the old node
-            self._start_node.relations.remove(self)
-        node.relations.append(self)
+            self._start_node._detach_relation(self, outgoing=True)
+        if not self._deleted:
+            node._attach_relation(self, outgoing=True)
         self._start_node = node
+        self._invalidate_relation_type()
 
     @property
     def end_node(self) -> Node:
@@ -90,10 +161,15 @@ class Relation(dict, TransformerMetaDataMixin):
 
     @end_node.setter
     def end_node(self, node: Node):
-        if self._end_node:
-            self._end_node.relations.remove(self)
-        node.relations.append(self)
+        if self._deleted:
+            self._end_node._detach_deleted_incoming_relation(self)
+            node._attach_deleted_incoming_relation(self)
+        else:
+            if self._end_node is not None:
+                self._end_node._detach_relation(self, outgoing=False)
+            node._attach_relation(self, outgoing=False)
         self._end_node = node
+        self._invalidate_relation_type()
 
     def __str__(self):
         return f"{self.start_node}-[{self.relation_type}]->{self.end_node}"
@@ -0,0 +1,122 @@
+"""
+Json serialization for the legacy hash ids, that works on data of any depth.
+
+`json.dumps()` encodes nested lists and dicts recursively and fails on data nested deeper than the python recursion limit.
+`dumps()` falls back to an encoder with an explicit stack, that produces the same text as `json.dumps()` with its default settings,
+so the hash ids of deep data are the ones `json.dumps()` would give without a recursion limit.
+"""
+import json
+from json.encoder import encode_basestring_ascii
+from typing import Any, List, Tuple
+
+_VALUE = 0
+_TEXT = 1
+_LEAVE = 2
+
+
+def dumps(obj: Any) -> str:
+    """Same as `json.dumps(obj)`, for data of any depth
+
+    Args:
+        obj (Any): json compatible data
+
+    Raises:
+        TypeError: When the data contains a value that is not json serializable
+        ValueError: When the data contains a circular reference
+
+    Returns:
+        str: The json text
+    """
+    try:
+        return json.dumps(obj)
+    except RecursionError:
+        return _dumps_iterative(obj)
+
+
+def _encode_float(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value == float("inf"):
+        return "Infinity"
+    if value == float("-inf"):
+        return "-Infinity"
+    return float.__repr__(value)
+
+
+def _encode_key(key: Any) -> str:
+    if isinstance(key, str):
+        return encode_basestring_ascii(key)
+    # the same key conversions as `json.dumps()`
+    if isinstance(key, float):
+        key = _encode_float(key)
+    elif key is True:
+        key = "true"
+    elif key is False:
+        key = "false"
+    elif key is None:
+        key = "null"
+    elif isinstance(key, int):
+        key = int.__repr__(key)
+    else:
+        raise TypeError(
+            f"keys must be str, int, float, bool or None, not {key.__class__.__name__}"
+        )
+    return encode_basestring_ascii(key)
+
+
+def _dumps_iterative(obj: Any) -> str:
+    chunks: List[str] = []
+    # work items: a value to encode, a text to emit or a container to leave
+    stack: List[Tuple[int, Any]] = [(_VALUE, obj)]
+    # ids of the containers that are currently encoded, to detect circular references
+    path = set()
+    while stack:
+        kind, item = stack.pop()
+        if kind == _TEXT:
+            chunks.append(item)
+            continue
+        if kind == _LEAVE:
+            path.discard(item)
+            continue
+        if isinstance(item, str):
+            chunks.append(encode_basestring_ascii(item))
+        elif item is None:
+            chunks.append("null")
+        elif item is True:
+            chunks.append("true")
+        elif item is False:
+            chunks.append("false")
+        elif isinstance(item, int):
+            chunks.append(int.__repr__(item))
+        elif isinstance(item, float):
+            chunks.append(_encode_float(item))
+        elif isinstance(item, (list, tuple, dict)):
+            if not item:
+                chunks.append("{}" if isinstance(item, dict) else "[]")
+                continue
+            if id(item) in path:
+                raise ValueError("Circular reference detected")
+            path.add(id(item))
+            stack.append((_LEAVE, id(item)))
+            if isinstance(item, dict):
+                chunks.append("{")
+                stack.append((_TEXT, "}"))
+                entries = list(item.items())
+                for index in reversed(range(len(entries))):
+                    key, value = entries[index]
+                    stack.append((_VALUE, value))
+                    stack.append(
+                        (_TEXT, (", " if index else "") + _encode_key(key) + ": ")
+                    )
+            else:
+                chunks.append("[")
+                stack.append((_TEXT, "]"))
+                for index in reversed(range(len(item))):
+                    stack.append((_VALUE, item[index]))
+                    if index:
+                        stack.append((_TEXT, ", "))
+        else:
+            raise TypeError(
+                f"Object of type {item.__class__.__name__} is not JSON serializable"
+            )
+    return "".join(chunks)
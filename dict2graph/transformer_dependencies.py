@@ -0,0 +1,139 @@
+"""
+Dependency analysis of the transformer containers of a `MatcherTransformersContainerStack`.
+
+Every container reads and writes parts of the cached graph: its matcher reads labels/relation types,
+its transformers read and write what they declare (see `dict2graph.transformers._base.TransformerAccess`).
+A container depends on an earlier container, if one of them writes something the other one reads or writes.
+Containers without a dependency between them commute, so every order of the containers that keeps the dependencies
+gives the same result as the order the transformers were added in.
+
+Containers that write nothing beyond the node/relation they are given can share a pass over the cache, in which every
+node/relation runs through all containers of the pass before the next one is visited (see `Dict2graph._run_node_transformations()`).
+This is equivalent to one pass per container, as long as no container of the pass reads other nodes/relations that another container of the pass changes.
+"""
+from typing import TYPE_CHECKING, FrozenSet, List, Set
+
+from dict2graph.transformers._base import TransformerAccess
+
+if TYPE_CHECKING:
+    from dict2graph.matcher_transformators_container import (
+        MatcherTransformersContainer,
+    )
+
+
+def depends_on(
+    later: "MatcherTransformersContainer", earlier: "MatcherTransformersContainer"
+) -> bool:
+    """Check if the result changes, when `later` runs before `earlier`.
+
+    Args:
+        later (MatcherTransformersContainer): The container that was added later
+        earlier (MatcherTransformersContainer): The container that was added earlier
+
+    Returns:
+        bool: True if the containers must keep their order
+    """
+    if (
+        TransformerAccess.TOPOLOGY in earlier.writes
+        or TransformerAccess.TOPOLOGY in later.writes
+    ):
+        # creating, deleting and rewiring changes which objects other containers visit
+        return True
+    return bool(
+        earlier.writes & (later.reads | later.writes) or earlier.reads & later.writes
+    )
+
+
+def build_dependency_graph(
+    containers: List["MatcherTransformersContainer"],
+) -> List[Set[int]]:
+    """Build the dependency DAG of the containers.
+
+    Args:
+        containers (List[MatcherTransformersContainer]): The containers in the order they were added
+
+    Returns:
+        List[Set[int]]: For every container the indexes of the earlier containers it depends on
+    """
+    return [
+        {
+            earlier_index
+            for earlier_index in range(index)
+            if depends_on(container, containers[earlier_index])
+        }
+        for index, container in enumerate(containers)
+    ]
+
+
+def can_share_pass(
+    members: List["MatcherTransformersContainer"],
+    container: "MatcherTransformersContainer",
+) -> bool:
+    """Check if `container` can join a pass of `members`, to run after them on every node/relation.
+
+    Args:
+        members (List[MatcherTransformersContainer]): The containers already in the pass
+        container (MatcherTransformersContainer): The candidate
+
+    Returns:
+        bool: True if the container can join the pass
+    """
+    if TransformerAccess.TOPOLOGY in container.writes:
+        return False
+    for member in members:
+        if TransformerAccess.TOPOLOGY in member.writes:
+            return False
+        # a container that reads other objects would see some of them before and some after the change of another container
+        if _reads_others(member) & container.writes:
+            return False
+        if _reads_others(container) & member.writes:
+            return False
+    return True
+
+
+def _reads_others(container: "MatcherTransformersContainer") -> FrozenSet[str]:
+    # the matcher only reads the labels of the given object
+    reads = frozenset().union(
+        *(transformer.get_reads() for transformer in container.transformers)
+    )
+    if TransformerAccess.TOPOLOGY in reads:
+        return reads
+    return frozenset()
+
+
+def schedule_passes(
+    containers: List["MatcherTransformersContainer"],
+) -> List[List["MatcherTransformersContainer"]]:
+    """Arrange the containers into passes over the cache. The result is the same as running every container in its own pass,
+    in the order they were added.
+
+    Every pass starts with the earliest container not scheduled yet. Later containers join the pass,
+    if all containers they depend on are scheduled or part of the pass, and `can_share_pass()` allows it.
+    This moves independent containers in front of containers they do not depend on, to fuse them with an earlier pass.
+
+    Args:
+        containers (List[MatcherTransformersContainer]): The containers in the order they were added
+
+    Returns:
+        List[List[MatcherTransformersContainer]]: The containers of every pass, in the order to run them
+    """
+    dependencies = build_dependency_graph(containers)
+    remaining: List[int] = list(range(len(containers)))
+    done: Set[int] = set()
+    passes: List[List["MatcherTransformersContainer"]] = []
+    while remaining:
+        # all earlier containers are scheduled already, so the first remaining one is ready
+        members: List[int] = [remaining.pop(0)]
+        for index in list(remaining):
+            container = containers[index]
+            if TransformerAccess.TOPOLOGY in container.writes:
+                # every later container depends on this one
+                break
+            if dependencies[index] <= done.union(members) and can_share_pass(
+                [containers[member] for member in members], container
+            ):
+                members.append(index)
+                remaining.remove(index)
+        done.update(members)
+        passes.append([containers[member] for member in members])
+    return passes
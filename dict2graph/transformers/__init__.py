@@ -1,2 +1,7 @@
-from dict2graph.transformers._base import Transformer, AnyLabel, AnyRelation
+from dict2graph.transformers._base import (
+    Transformer,
+    AnyLabel,
+    AnyRelation,
+    TransformerAccess,
+)
 from dict2graph.transformers._types import NodeTrans, RelTrans
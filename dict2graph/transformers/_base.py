@@ -1,29 +1,125 @@
-from typing import TYPE_CHECKING, Callable, Union, Dict, Type, Any, Tuple, Literal, List
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Union,
+    Dict,
+    Type,
+    Any,
+    Tuple,
+    Literal,
+    List,
+    Optional,
+    FrozenSet,
+)
+import functools
+import contextvars
 from dict2graph.node import Node
 from dict2graph.relation import Relation
+from dict2graph.label_vocabulary import LABEL_VOCABULARY
 
 if TYPE_CHECKING:
     from dict2graph import Dict2graph
 
 
+# the Dict2graph instance that runs the transformations in the current thread/context.
+# transformers do not store the instance on themselves, so they can be shared by multiple instances running concurrently
+_RUNNING_DICT2GRAPH: contextvars.ContextVar = contextvars.ContextVar(
+    "dict2graph_running_instance", default=None
+)
+
+
 class AnyLabel:
     pass
 
 
+@functools.lru_cache(maxsize=None)
+def _implements_batch(cls: Type, batch_method: str, single_methods: Tuple[str]) -> bool:
+    """Check if the transformer class `cls` has its own batch method, that is not overruled by a per object method of a subclass.
+    E.g. a subclass of `AddProperty` that only overrides `transform_node()` must not be run through `AddProperty.transform_nodes()`.
+    """
+
+    def defining_class(name: str) -> Type:
+        return next(c for c in cls.__mro__ if name in c.__dict__)
+
+    batch_cls = defining_class(batch_method)
+    if batch_cls in (_NodeTransformerBase, _RelationTransformerBase):
+        return False
+    return all(issubclass(batch_cls, defining_class(m)) for m in single_methods)
+
+
 class AnyRelation:
     pass
 
 
+class TransformerAccess:
+    """The parts of the cached graph a transformer reads or writes.
+    Transformers declare them in `reads`/`writes` (see `_NodeTransformerBase.reads`), so dict2graph can tell which transformers are independent of each other.
+    """
+
+    # the properties and merge property keys of the node/relation the transformer is given
+    PROPERTIES = "properties"
+    # the labels of the node or the type of the relation the transformer is given
+    LABELS = "labels"
+    # anything beyond the given node/relation: reading other nodes and relations (parents, children, neighbours)
+    # or creating, deleting and rewiring nodes and relations. Reading other objects includes the properties and labels
+    # declared in `reads`; e.g. a transformer that reads the properties of child nodes reads `{PROPERTIES, TOPOLOGY}`
+    TOPOLOGY = "topology"
+
+    LOCAL = frozenset({PROPERTIES, LABELS})
+    ALL = frozenset({PROPERTIES, LABELS, TOPOLOGY})
+
+
+def _get_declared_access(
+    declared: Optional[FrozenSet[str]], topology_neutral: bool
+) -> FrozenSet[str]:
+    if declared is not None:
+        return frozenset(declared)
+    return TransformerAccess.LOCAL if topology_neutral else TransformerAccess.ALL
+
+
 class _NodeTransformerBase:
+    # Declare a transformer class topology neutral, if it only reads and changes the node it is given (properties, labels, merge keys)
+    # and never creates, deletes or rewires nodes or relations. Short for `reads = writes = TransformerAccess.LOCAL`.
+    topology_neutral: bool = False
+    # What the transformer, including its `custom_node_match()`, reads and writes, as a set of `TransformerAccess` values.
+    # Undeclared (`None`) is `TransformerAccess.LOCAL` for topology neutral transformers and `TransformerAccess.ALL` for all others.
+    # dict2graph reorders and fuses the passes of independent transformers based on these declarations; a declaration that is too narrow changes the results.
+    # Subclasses inherit the declarations; extend them if the subclass touches more.
+    reads: Optional[FrozenSet[str]] = None
+    writes: Optional[FrozenSet[str]] = None
+
     def __init__(
         self,
         **kwargs,
     ):
         pass
 
+    # the instance the transformer was added to. only used outside of a run of `Dict2graph._run_transformations()`
+    _d2g: "Dict2graph" = None
+
     def _set_matcher(self, matcher: "Transformer.NodeTransformerMatcher"):
         self.matcher = matcher
-        self.d2g: "Dict2graph" = None
+        self.d2g = None
+
+    @property
+    def d2g(self) -> "Dict2graph":
+        """The Dict2graph instance that runs the transformer in the current thread/context.
+
+        Returns:
+            Dict2graph: The running instance, or the instance the transformer was added to last
+        """
+        d2g = _RUNNING_DICT2GRAPH.get()
+        return d2g if d2g is not None else self._d2g
+
+    @d2g.setter
+    def d2g(self, d2g: "Dict2graph"):
+        self._d2g = d2g
+
+    def __getstate__(self):
+        # the Dict2graph instance is not pickled with the transformer
+        state = self.__dict__.copy()
+        state.pop("_d2g", None)
+        return state
 
     def _run_custom_node_match_and_transform(self, node: Node):
         if self.custom_node_match(node):
@@ -33,14 +129,68 @@ class _NodeTransformerBase:
                 print(f"Transformation failed for node '{node}'")
                 raise
 
+    def get_reads(self) -> FrozenSet[str]:
+        """What the transformer reads. Override if it depends on the configuration of the transformer.
+
+        Returns:
+            FrozenSet[str]: `TransformerAccess` values
+        """
+        return _get_declared_access(self.reads, self.topology_neutral)
+
+    def get_writes(self) -> FrozenSet[str]:
+        """What the transformer writes. Override if it depends on the configuration of the transformer.
+
+        Returns:
+            FrozenSet[str]: `TransformerAccess` values
+        """
+        return _get_declared_access(self.writes, self.topology_neutral)
+
+    def _run_custom_nodes_match_and_transform(self, nodes: List[Node]):
+        try:
+            self.transform_nodes(nodes)
+        except:
+            print(
+                f"Transformation of {len(nodes)} nodes failed in '{self.__class__.__name__}'"
+            )
+            raise
+
+    @classmethod
+    def _implements_transform_nodes(cls) -> bool:
+        return _implements_batch(
+            cls, "transform_nodes", ("transform_node", "custom_node_match")
+        )
+
     def custom_node_match(self, node: Node) -> bool:
         return True
 
     def transform_node(self, node: Node):
-        raise NotImplementedError
+        if type(self).transform_nodes is _NodeTransformerBase.transform_nodes:
+            raise NotImplementedError
+        # a batch only transformer, run on a single node (e.g. when it shares its matcher with a per node transformer)
+        self.transform_nodes([node])
+
+    def transform_nodes(self, nodes: List[Node]):
+        """Optional batch protocol. Transform all nodes a matcher matched in one pass at once.
+        dict2graph calls this instead of `transform_node()` for every single node, if the transformer implements it.
+        The nodes are already matched by the matcher and are not deleted; `custom_node_match()` is not called by dict2graph,
+        a batch implementation has to apply it itself.
+
+        A batch transformer must only change the nodes it is given (e.g. properties). Topology and labels of other nodes must stay untouched,
+        as all nodes are matched before the first one is transformed.
+
+        The default implementation is an adapter, that runs `custom_node_match()` and `transform_node()` for every node.
+        """
+        for node in nodes:
+            self._run_custom_node_match_and_transform(node)
 
 
 class _RelationTransformerBase:
+    # Like `_NodeTransformerBase.topology_neutral`: the transformer only reads and changes the relation it is given (properties, type)
+    topology_neutral: bool = False
+    # Like `_NodeTransformerBase.reads`/`writes`. `TransformerAccess.LABELS` stands for the relation type
+    reads: Optional[FrozenSet[str]] = None
+    writes: Optional[FrozenSet[str]] = None
+
     def __init__(
         self,
         **kwargs,
@@ -62,20 +212,65 @@ class _RelationTransformerBase:
                 print(f"Transformation failed for rel '{rel}'")
                 raise
 
+    def get_reads(self) -> FrozenSet[str]:
+        """What the transformer reads. Override if it depends on the configuration of the transformer.
+
+        Returns:
+            FrozenSet[str]: `TransformerAccess` values
+        """
+        return _get_declared_access(self.reads, self.topology_neutral)
+
+    def get_writes(self) -> FrozenSet[str]:
+        """What the transformer writes. Override if it depends on the configuration of the transformer.
+
+        Returns:
+            FrozenSet[str]: `TransformerAccess` values
+        """
+        return _get_declared_access(self.writes, self.topology_neutral)
+
+    def _run_custom_rels_match_and_transform(self, rels: List[Relation]):
+        try:
+            self.transform_rels(rels)
+        except:
+            print(
+                f"Transformation of {len(rels)} rels failed in '{self.__class__.__name__}'"
+            )
+            raise
+
+    @classmethod
+    def _implements_transform_rels(cls) -> bool:
+        return _implements_batch(
+            cls, "transform_rels", ("transform_rel", "custom_rel_match")
+        )
+
     def custom_rel_match(self, rel: Relation) -> bool:
         return True
 
     def transform_rel(self, rel: Relation):
-        raise NotImplementedError
+        if type(self).transform_rels is _RelationTransformerBase.transform_rels:
+            raise NotImplementedError
+        self.transform_rels([rel])
+
+    def transform_rels(self, rels: List[Relation]):
+        """Optional batch protocol. Transform all relations a matcher matched in one pass at once.
+        Works like `_NodeTransformerBase.transform_nodes()`; `custom_rel_match()` has to be applied by the batch implementation.
+
+        The default implementation is an adapter, that runs `custom_rel_match()` and `transform_rel()` for every relation.
+        """
+        for rel in rels:
+            self._run_custom_rel_match_and_transform(rel)
 
 
 class Transformer:
     class NodeTransformerMatcher:
+        incremental: bool = False
+
         def _set_node_matcher(
             self,
             label_match: Union[str, List[str], AnyLabel],
             has_one_label_of: List[str] = None,
             has_none_label_of: List[str] = None,
+            incremental: bool = False,
         ):
             if isinstance(label_match, str):
                 label_match = [label_match]
@@ -83,25 +278,80 @@ class Transformer:
 
             self.has_one_label_of = has_one_label_of
             self.has_none_label_of = has_none_label_of
+            self.incremental = incremental
+            self._compiled = False
+
+        def __getstate__(self):
+            # the bitmasks depend on the label vocabulary of the process. recompile after unpickling
+            state = self.__dict__.copy()
+            state["_compiled"] = False
+            return state
+
+        def _compile(self):
+            """Turn the label conditions into bitmasks of the `LABEL_VOCABULARY`. Runs when the transformer is added to a Dict2graph instance,
+            or on the first match. Call again if the label conditions are changed afterwards."""
+            self._has_none_label_of_mask = LABEL_VOCABULARY.intern(
+                self.has_none_label_of or ()
+            )
+            self._has_one_label_of_mask = LABEL_VOCABULARY.intern(
+                self.has_one_label_of or ()
+            )
+            self._match_any_label = self.label_match == AnyLabel
+            self._label_match_mask = (
+                None
+                if self.label_match is None or self._match_any_label
+                else LABEL_VOCABULARY.intern(self.label_match)
+            )
+            self._compiled = True
 
         def _match(self, node: Node) -> bool:
             if node.deleted:
                 return False
-            if self.has_none_label_of is not None and not set(
-                self.has_none_label_of
-            ).isdisjoint(set(node.labels)):
+            if not self._compiled:
+                self._compile()
+            return self._match_mask(node.label_mask)
+
+        def _match_labels(self, labels: List[str]) -> bool:
+            if not self._compiled:
+                self._compile()
+            return self._match_mask(LABEL_VOCABULARY.mask(labels))
+
+        def __repr__(self):
+            args = []
+            if self.label_match not in (AnyLabel, None):
+                args.append(f"has_labels={self.label_match!r}")
+            if self.has_one_label_of:
+                args.append(f"has_one_label_of={self.has_one_label_of!r}")
+            if self.has_none_label_of:
+                args.append(f"has_none_label_of={self.has_none_label_of!r}")
+            if self.incremental:
+                args.append("incremental=True")
+            return f"match_nodes({', '.join(args)})"
+
+        def _match_mask(self, mask: int) -> bool:
+            if mask & self._has_none_label_of_mask:
                 return False
-            if self.has_one_label_of is not None and set(
-                self.has_one_label_of
-            ).intersection(set(node.labels)):
-                return True
-            if self.label_match == AnyLabel or (
-                self.label_match is not None
-                and set(self.label_match).issubset(set(node.labels))
-            ):
+            if mask & self._has_one_label_of_mask or self._match_any_label:
                 return True
+            return (
+                self._label_match_mask is not None
+                and mask & self._label_match_mask == self._label_match_mask
+            )
 
-            return False
+        def _get_reads(self) -> FrozenSet[str]:
+            if self.label_match == AnyLabel and not self.has_none_label_of:
+                return frozenset()
+            return frozenset({TransformerAccess.LABELS})
+
+        def _get_candidate_labels(
+            self,
+        ) -> Optional[Tuple[Optional[List[str]], Optional[List[str]]]]:
+            """The labels a node must have to be a candidate for this matcher, as `(any_of, all_of)` for `LabelIndex.iter_candidates()`.
+            `None` if any node can match.
+            """
+            if self.label_match == AnyLabel or self.label_match == []:
+                return None
+            return self.has_one_label_of, self.label_match
 
         def do(
             self, transform: Union[_NodeTransformerBase, List[_NodeTransformerBase]]
@@ -116,10 +366,13 @@ class Transformer:
             return transform
 
     class RelTransformerMatcher:
+        incremental: bool = False
+
         def _set_rel_matcher(
             self,
             relation_type_match: Union[str, List[str], AnyRelation],
             relation_type_is_not_in: List[str],
+            incremental: bool = False,
         ):
             if isinstance(relation_type_match, str):
                 self.relation_type_match = [relation_type_match]
@@ -131,14 +384,56 @@ class Transformer:
                 self.relation_type_is_not_in = relation_type_is_not_in
             else:
                 self.relation_type_is_not_in = []
+            self.incremental = incremental
+            self._compiled = False
+
+        def _compile(self):
+            """Turn the relation type conditions into sets for constant time lookups. Runs when the transformer is added to a Dict2graph instance,
+            or on the first match. Call again if the conditions are changed afterwards."""
+            self._match_any_type = self.relation_type_match in [None, AnyRelation]
+            # a plain string is kept; `in` is a substring test then
+            self._relation_type_match_set = (
+                self.relation_type_match
+                if self._match_any_type or isinstance(self.relation_type_match, str)
+                else frozenset(self.relation_type_match)
+            )
+            self._relation_type_is_not_in_set = (
+                self.relation_type_is_not_in
+                if isinstance(self.relation_type_is_not_in, str)
+                else frozenset(self.relation_type_is_not_in)
+            )
+            self._compiled = True
 
         def _match(self, rel: Relation) -> bool:
-            if (
-                self.relation_type_match in [None, AnyRelation]
-                or rel.relation_type in self.relation_type_match
-            ) and rel.relation_type not in self.relation_type_is_not_in:
-                return True
-            return False
+            return self._match_type(rel.relation_type)
+
+        def _match_type(self, relation_type: str) -> bool:
+            if not self._compiled:
+                self._compile()
+            return (
+                self._match_any_type or relation_type in self._relation_type_match_set
+            ) and relation_type not in self._relation_type_is_not_in_set
+
+        def __repr__(self):
+            args = []
+            if self.relation_type_match not in (AnyRelation, None):
+                args.append(f"relation_type={self.relation_type_match!r}")
+            if self.relation_type_is_not_in:
+                args.append(f"relation_type_is_not_in={self.relation_type_is_not_in!r}")
+            if self.incremental:
+                args.append("incremental=True")
+            return f"match_rels({', '.join(args)})"
+
+        def _matches_any_relation(self) -> bool:
+            """True if every relation type can match, so there is nothing to gain from looking up candidates by type"""
+            if not self._compiled:
+                self._compile()
+            return self._match_any_type and not self._relation_type_is_not_in_set
+
+        def _get_reads(self) -> FrozenSet[str]:
+            if self._matches_any_relation():
+                return frozenset()
+            return frozenset({TransformerAccess.LABELS})
 
         def do(
             self, transform: _RelationTransformerBase
@@ -158,6 +453,7 @@ class Transformer:
         has_labels: Union[str, List[str], AnyLabel] = AnyLabel,
         has_one_label_of: List[str] = None,
         has_none_label_of: List[str] = None,
+        incremental: bool = False,
     ) -> NodeTransformerMatcher:
         """Match nodes to apply tranformers
 
@@ -165,6 +461,9 @@ class Transformer:
             has_labels (Union[str, List[str], AnyLabel], optional): _description_. Defaults to AnyLabel.
             has_one_label_of (List[str], optional): _description_. Defaults to None.
             has_none_label_of (List[str], optional): _description_. Defaults to None.
+            incremental (bool, optional): When the transformers run in several rounds (see `Dict2graph(transformer_rounds)`), only match the nodes
+                that were added to the cache since the last run of the matcher. Nodes that were visited in an earlier round are not matched again,
+                even if later transformers changed their labels. Defaults to False.
 
         Returns:
             NodeTransformerMatcher: _description_
@@ -176,6 +475,7 @@ class Transformer:
             label_match=has_labels,
             has_one_label_of=has_one_label_of,
             has_none_label_of=has_none_label_of,
+            incremental=incremental,
         )
         return tm
 
@@ -184,12 +484,15 @@ class Transformer:
         cls,
         relation_type: Union[str, List[str], AnyRelation] = AnyRelation,
         relation_type_is_not_in: List[str] = None,
+        incremental: bool = False,
     ) -> RelTransformerMatcher:
         """Match relationships to apply tranformers
 
         Args:
             relation_type (Union[str, List[str], AnyRelation], optional): A relation type as string or mulitple relation types as list of string.. Defaults to AnyRelation.
             relation_type_is_not_in (List[str], optional): _description_. Defaults to None.
+            incremental (bool, optional): When the transformers run in several rounds (see `Dict2graph(transformer_rounds)`), only match the relations
+                that were added to the cache since the last run of the matcher. Defaults to False.
 
         Returns:
             RelTransformerMatcher: _description_
@@ -198,5 +501,6 @@ class Transformer:
         tm._set_rel_matcher(
             relation_type_match=relation_type,
             relation_type_is_not_in=relation_type_is_not_in,
+            incremental=incremental,
         )
         return tm
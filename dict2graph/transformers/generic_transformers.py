@@ -1,7 +1,11 @@
 from typing import TYPE_CHECKING, Callable, Union, Dict, Type, Any, Tuple, Literal, List
 from dict2graph.node import Node
 from dict2graph.relation import Relation
-from dict2graph.transformers._base import _NodeTransformerBase, _RelationTransformerBase
+from dict2graph.transformers._base import (
+    _NodeTransformerBase,
+    _RelationTransformerBase,
+    TransformerAccess,
+)
 import json
 import logging
 
@@ -33,6 +37,8 @@ class SanitizeInvalidNamesForNeo4JCompatibility(
     Results in a Neo4j node `(:Person{name:'Camina Drummer'})`
     """
 
+    topology_neutral = True
+
     def is_string_valid(self, val: str):
 
         if len(val) == 0:
@@ -99,6 +105,8 @@ class EscapeInvalidNamesForNeo4JCompatibility(
     # https://neo4j.com/docs/cypher-manual/current/syntax/naming/
     """
 
+    topology_neutral = True
+
     def __init__(self):
         warn_message = "`dict2graph.RelTrans.EscapeInvalidNamesForNeo4JCompatibility` will propably fail because of https://github.com/kaiserpreusse/graphio/issues/10. Use dict2graph.RelTrans.SanitizeInvalidNamesForNeo4JCompatibility as workaround"
         log.warning(warn_message)
@@ -162,6 +170,10 @@ class OverridePropertyName(_RelationTransformerBase, _NodeTransformerBase):
     Results in a Neo4j node `(:Person{fullname:'Camina Drummer'})`
     """
 
+    topology_neutral = True
+    reads = frozenset({TransformerAccess.PROPERTIES})
+    writes = frozenset({TransformerAccess.PROPERTIES})
+
     def __init__(self, source_property_name: str, target_property_name: str):
         """
         Args:
@@ -175,12 +187,25 @@ class OverridePropertyName(_RelationTransformerBase, _NodeTransformerBase):
         if self.source_property_name in obj:
             obj[self.target_property_name] = obj.pop(self.source_property_name)
 
+    def _transform_all(self, objs: List[Union[Node, Relation]]):
+        source = self.source_property_name
+        target = self.target_property_name
+        for obj in objs:
+            if source in obj:
+                obj[target] = obj.pop(source)
+
     def transform_node(self, node: Node):
         self._transform(node)
 
     def transform_rel(self, rel: Relation):
         self._transform(rel)
 
+    def transform_nodes(self, nodes: List[Node]):
+        self._transform_all(nodes)
+
+    def transform_rels(self, rels: List[Relation]):
+        self._transform_all(rels)
+
 
 class TypeCastProperty(_RelationTransformerBase, _NodeTransformerBase):
     """change the type of property values.
@@ -203,6 +228,10 @@ class TypeCastProperty(_RelationTransformerBase, _NodeTransformerBase):
     Results in a Neo4j node `(:Person{name:'Camina',captain:true,age:27})`
     """
 
+    topology_neutral = True
+    reads = frozenset({TransformerAccess.PROPERTIES})
+    writes = frozenset({TransformerAccess.PROPERTIES})
+
     def __init__(self, property_name: str, target_type: Union[str, int, float, bool]):
         """
         Args:
@@ -232,12 +261,29 @@ class TypeCastProperty(_RelationTransformerBase, _NodeTransformerBase):
             else:
                 obj[self.property_name] = self.target_type(obj[self.property_name])
 
+    def _transform_all(self, objs: List[Union[Node, Relation]]):
+        if self.target_type == bool:
+            for obj in objs:
+                self._transform(obj)
+            return
+        property_name = self.property_name
+        target_type = self.target_type
+        for obj in objs:
+            if property_name in obj:
+                obj[property_name] = target_type(obj[property_name])
+
     def transform_node(self, node: Node):
         self._transform(node)
 
     def transform_rel(self, rel: Relation):
         self._transform(rel)
 
+    def transform_nodes(self, nodes: List[Node]):
+        self._transform_all(nodes)
+
+    def transform_rels(self, rels: List[Relation]):
+        self._transform_all(rels)
+
 
 class RemoveProperty(_RelationTransformerBase, _NodeTransformerBase):
     """Remove a property from a node
@@ -259,6 +305,10 @@ class RemoveProperty(_RelationTransformerBase, _NodeTransformerBase):
     Results in a Neo4j node `(:Person{name:'Camina'})`. the `id` property will be thrown away.
     """
 
+    topology_neutral = True
+    reads = frozenset({TransformerAccess.PROPERTIES})
+    writes = frozenset({TransformerAccess.PROPERTIES})
+
     def __init__(self, property_keys: Union[str, List[str]]):
         """_summary_
 
@@ -279,6 +329,17 @@ class RemoveProperty(_RelationTransformerBase, _NodeTransformerBase):
     def transform_rel(self, rel: Relation):
         self._transform(rel)
 
+    def transform_nodes(self, nodes: List[Node]):
+        property_keys = frozenset(self.property_keys)
+        for node in nodes:
+            # the overlap check of `custom_node_match()`, without building two sets per node
+            if not property_keys.isdisjoint(node):
+                self._transform(node)
+
+    def transform_rels(self, rels: List[Relation]):
+        for rel in rels:
+            self._transform(rel)
+
     def _transform(self, obj: Union[Node, Relation]):
         for prop in self.property_keys:
             obj.pop(prop, None)
@@ -304,6 +365,10 @@ class AddProperty(_RelationTransformerBase, _NodeTransformerBase):
     Results in a Neo4j node `(:Person{name:'Camina',my_new_prop_key:"my_new_prop_value_1111"})`.
     """
 
+    topology_neutral = True
+    reads = frozenset()
+    writes = frozenset({TransformerAccess.PROPERTIES})
+
     def __init__(self, properties: Dict):
         """_summary_
 
@@ -322,5 +387,15 @@ class AddProperty(_RelationTransformerBase, _NodeTransformerBase):
     def transform_rel(self, rel: Relation):
         self._transform(rel)
 
+    def transform_nodes(self, nodes: List[Node]):
+        properties = self.properties
+        for node in nodes:
+            node.update(properties)
+
+    def transform_rels(self, rels: List[Relation]):
+        properties = self.properties
+        for rel in rels:
+            rel.update(properties)
+
     def _transform(self, obj: Union[Node, Relation]):
         obj.update(self.properties)
@@ -9,10 +9,16 @@ from typing import (
     Literal,
     List,
     Generator,
+    FrozenSet,
 )
 from dict2graph.node import Node
 from dict2graph.relation import Relation
-from dict2graph.transformers._base import _NodeTransformerBase, AnyLabel, AnyRelation
+from dict2graph.transformers._base import (
+    _NodeTransformerBase,
+    AnyLabel,
+    AnyRelation,
+    TransformerAccess,
+)
 import typing
 import hashlib
 from dataclasses import dataclass
@@ -40,6 +46,10 @@ class CapitalizeLabels(_NodeTransformerBase):
     Results in a Neo4j node `(:Person{name:'Camina Drummer'})`
     """
 
+    topology_neutral = True
+    reads = frozenset({TransformerAccess.LABELS})
+    writes = frozenset({TransformerAccess.LABELS})
+
     def transform_node(self, node: Node):
         node.labels = [label.capitalize() for label in node.labels]
 
@@ -65,6 +75,10 @@ class OverrideLabel(_NodeTransformerBase):
     Results in a Neo4j node `(:Character{name:'Camina Drummer'})`
     """
 
+    topology_neutral = True
+    reads = frozenset({TransformerAccess.LABELS})
+    writes = frozenset({TransformerAccess.LABELS})
+
     def __init__(self, value: str, target_label: str = None):
         """_summary_
 
@@ -116,6 +130,10 @@ class RemoveLabel(_NodeTransformerBase):
     Results in removing the `:ListItem` label from `:Person` nodes
     """
 
+    topology_neutral = True
+    reads = frozenset({TransformerAccess.LABELS})
+    writes = frozenset({TransformerAccess.LABELS})
+
     def __init__(
         self,
         target_labels: Union[None, str, List[str], AnyLabel] = None,
@@ -206,6 +224,10 @@ class ConvertLabelToProp(_NodeTransformerBase):
     This removes the `:person` labels nad add a new property `type` with the value `person`
     """
 
+    topology_neutral = True
+    reads = frozenset({TransformerAccess.LABELS})
+    writes = frozenset({TransformerAccess.LABELS, TransformerAccess.PROPERTIES})
+
     def __init__(
         self,
         prop_key: str,
@@ -284,6 +306,10 @@ class AddLabel(_NodeTransformerBase):
     Results in a Neo4j node `(:person:Character{name:'Camina Drummer'})`
     """
 
+    topology_neutral = True
+    reads = frozenset({TransformerAccess.LABELS})
+    writes = frozenset({TransformerAccess.LABELS})
+
     def __init__(self, labels: Union[str, List[str]]):
         """
 
@@ -329,6 +355,10 @@ class SetMergeProperties(_NodeTransformerBase):
     Will result in one Node `(:book)` because we only compare by the property `title` when mergin nodes together.
     """
 
+    topology_neutral = True
+    reads = frozenset()
+    writes = frozenset({TransformerAccess.PROPERTIES})
+
     def __init__(self, props: List[str]):
         """
         Args:
@@ -467,6 +497,18 @@ class CreateNewMergePropertyFromHash(_NodeTransformerBase):
         )
         self.new_merge_property_name = new_merge_property_name
 
+    writes = frozenset({TransformerAccess.PROPERTIES})
+
+    def get_reads(self) -> FrozenSet[str]:
+        if (
+            self.hash_includes_parent_merge_properties
+            or self.hash_includes_children_nodes_merge_properties
+            or self.hash_includes_children_data
+        ):
+            # the legacy child lookup compares the properties of neighbours
+            return frozenset({TransformerAccess.PROPERTIES, TransformerAccess.TOPOLOGY})
+        return frozenset({TransformerAccess.PROPERTIES})
+
     def transform_node(self, node: Node):
         if self.hash_includes_properties:
             node.merge_property_keys = list(
@@ -479,6 +521,7 @@ class CreateNewMergePropertyFromHash(_NodeTransformerBase):
             include_parent_properties=self.hash_includes_parent_merge_properties,
             include_children_properties=self.hash_includes_children_nodes_merge_properties,
             include_children_data=self.hash_includes_children_data,
+            use_source_data_digests=self.d2g.merkle_hash_ids,
         )
         node.merge_property_keys = [self.new_merge_property_name]
 
@@ -549,6 +592,10 @@ class RemoveListItemLabels(_NodeTransformerBase):
     The "Filip Inaros"-`children`-node will not have an extra label `ListItem`.
     """
 
+    topology_neutral = True
+    reads = frozenset({TransformerAccess.LABELS})
+    writes = frozenset({TransformerAccess.LABELS})
+
     def custom_node_match(self, node: Node) -> bool:
         return node.is_list_list_item
 
@@ -785,11 +832,14 @@ class CreateHubbing(_NodeTransformerBase):
 
     def transform_node(self, node: Node):
         start_node: Node = node
-        self.sub_graph_nodes: List[CreateHubbing.ToBeHubbedNode] = []
-        self._get_to_be_hubbed_sub_graph(start_node=start_node)
+        # local to the call, the transformer instance may be shared by multiple Dict2graph instances
+        sub_graph_nodes: List[CreateHubbing.ToBeHubbedNode] = []
+        self._get_to_be_hubbed_sub_graph(
+            start_node=start_node, sub_graph_nodes=sub_graph_nodes
+        )
 
         end_nodes: List[CreateHubbing.ToBeHubbedNode] = [
-            n for n in self.sub_graph_nodes if n.is_end_node
+            n for n in sub_graph_nodes if n.is_end_node
         ]
         for end_node in end_nodes:
             hub, fill_nodes = self._hub_upstream_subgraph_branch(
@@ -845,6 +895,7 @@ class CreateHubbing(_NodeTransformerBase):
     def _get_to_be_hubbed_sub_graph(
         self,
         start_node: Node,
+        sub_graph_nodes: List["CreateHubbing.ToBeHubbedNode"],
         parent_node: "CreateHubbing.ToBeHubbedNode" = None,
         parent_rel: Relation = None,
         depth: int = 0,
@@ -853,7 +904,7 @@ class CreateHubbing(_NodeTransformerBase):
         if depth > len(self.follow_nodes_labels):
             return
         if depth == 0 or self.follow_nodes_labels[depth - 1] in start_node.labels:
-            for allready_checked_node in self.sub_graph_nodes:
+            for allready_checked_node in sub_graph_nodes:
                 if (
                     allready_checked_node.node is start_node
                     and allready_checked_node.depth_level == depth
@@ -881,7 +932,7 @@ class CreateHubbing(_NodeTransformerBase):
                     is_end_node=is_end_node,
                     incomplete_chain=incomplete_chain,
                 )
-                self.sub_graph_nodes.append(current_node)
+                sub_graph_nodes.append(current_node)
 
             if parent_node is not None:
                 current_node.parent_nodes.append(parent_node)
@@ -891,6 +942,7 @@ class CreateHubbing(_NodeTransformerBase):
                 child_node = outgoing_rel.end_node
                 self._get_to_be_hubbed_sub_graph(
                     start_node=child_node,
+                    sub_graph_nodes=sub_graph_nodes,
                     parent_node=current_node,
                     parent_rel=outgoing_rel,
                     depth=depth + 1,
@@ -5,6 +5,7 @@ from dict2graph.transformers._base import (
     _RelationTransformerBase,
     AnyLabel,
     AnyRelation,
+    TransformerAccess,
 )
 import typing
 
@@ -12,6 +13,10 @@ import typing
 class OverrideReliationType(_RelationTransformerBase):
     """_summary_"""
 
+    topology_neutral = True
+    reads = frozenset()
+    writes = frozenset({TransformerAccess.LABELS})
+
     def __init__(self, value: str = None):
         if not value:
             raise ValueError(f"Value must be a string. Got '{value}'")
@@ -38,5 +43,9 @@ class FlipNodes(_RelationTransformerBase):
 class UppercaseRelationType(_RelationTransformerBase):
     """_summary_"""
 
+    topology_neutral = True
+    reads = frozenset({TransformerAccess.LABELS})
+    writes = frozenset({TransformerAccess.LABELS})
+
     def transform_rel(self, rel: Relation):
         rel.relation_type = rel.relation_type.upper()
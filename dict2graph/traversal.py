@@ -0,0 +1,41 @@
+from typing import TYPE_CHECKING, Any, List, Tuple, Union, Dict
+
+if TYPE_CHECKING:
+    from dict2graph.node import Node
+
+# Kinds of work items emitted while splitting dict/list fragments
+TASK_DICT = 0
+TASK_LIST = 1
+TASK_BASIC = 2
+
+# (kind, labels, data, relation_type)
+ParseTask = Tuple[int, List[str], Any, str]
+
+
+class _DictFragmentFrame:
+    """State of a dict fragment on the explicit stack of the iterative traversal engine"""
+
+    __slots__ = ("node", "tasks", "index", "children", "pending_relation_type")
+
+    def __init__(self, node: "Node", tasks: List[ParseTask]):
+        self.node = node
+        self.tasks = tasks
+        self.index: int = 0
+        self.children: List[Tuple["Node", str]] = []
+        self.pending_relation_type: str = None
+
+
+class _ListFragmentFrame:
+    """State of a list fragment on the explicit stack of the iterative traversal engine"""
+
+    __slots__ = ("node", "labels", "data", "index", "children")
+
+    def __init__(self, node: "Node", labels: List[str], data: List):
+        self.node = node
+        self.labels = labels
+        self.data = data
+        self.index: int = 0
+        self.children: List["Node"] = []
+
+
+ParseFrame = Union[_DictFragmentFrame, _ListFragmentFrame]
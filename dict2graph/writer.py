@@ -0,0 +1,234 @@
+"""
+Native writer for the buffered `NodeSet`s/`RelationshipSet`s of a `Dict2graph` instance, as an alternative to the graphio `merge()`/`create()` methods.
+See `Dict2graph.merge(writer=...)`.
+
+Every set is written with one parameterized `UNWIND $rows ...` statement. The statements are built once per set fingerprint and writer,
+so the database can reuse its query plan for every batch and every flush. The rows are the buffered node/relationship dicts themselves;
+they are handed to the neo4j driver in batches of `UnwindWriter.rows_per_transaction`, without converting them into another layout.
+"""
+import logging
+from typing import Dict, Hashable, Iterator, List, Literal, Sequence, Tuple
+
+from graphio import NodeSet, RelationshipSet
+from neo4j import Driver, ManagedTransaction, Session
+
+log = logging.getLogger(__name__)
+
+
+def quote_name(name: str) -> str:
+    """Quote a label, relationship type or property key for a Cypher statement"""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def _get_label_pattern(labels: List[str]) -> str:
+    return "".join(f":{quote_name(label)}" for label in labels)
+
+
+def _get_property_pattern(keys: List[str], row: str) -> str:
+    if not keys:
+        return ""
+    return (
+        " {"
+        + ", ".join(f"{quote_name(key)}: {row}.{quote_name(key)}" for key in keys)
+        + "}"
+    )
+
+
+def build_node_query(
+    labels: List[str], merge_keys: List[str], mode: Literal["merge", "create"]
+) -> str:
+    """Build the statement for the rows of a `NodeSet`. Every row is a dict of the node properties.
+
+    Args:
+        labels (List[str]): The labels of the nodes
+        merge_keys (List[str]): The properties to merge the nodes on
+        mode (Literal["merge", "create"]): Merge or create the nodes
+
+    Raises:
+        ValueError: When merging without merge keys
+
+    Returns:
+        str: The Cypher statement, with the rows as parameter `$rows`
+    """
+    if mode == "create":
+        return "\n".join(
+            [
+                "UNWIND $rows AS row",
+                f"CREATE (n{_get_label_pattern(labels)})",
+                "SET n = row",
+            ]
+        )
+    if not merge_keys:
+        raise ValueError("Merge keys are empty, MERGE requires merge keys.")
+    return "\n".join(
+        [
+            "UNWIND $rows AS row",
+            f"MERGE (n{_get_label_pattern(labels)}{_get_property_pattern(merge_keys, 'row')})",
+            "ON CREATE SET n = row",
+            "ON MATCH SET n += row",
+        ]
+    )
+
+
+def build_rel_query(
+    rel_type: str,
+    start_node_labels: List[str],
+    start_node_properties: List[str],
+    end_node_labels: List[str],
+    end_node_properties: List[str],
+    mode: Literal["merge", "create"],
+) -> str:
+    """Build the statement for the rows of a `RelationshipSet`. Every row is a `(start node properties, end node properties, relationship properties)` tuple.
+
+    Args:
+        rel_type (str): The type of the relationships
+        start_node_labels (List[str]): The labels to match the start nodes on
+        start_node_properties (List[str]): The properties to match the start nodes on
+        end_node_labels (List[str]): The labels to match the end nodes on
+        end_node_properties (List[str]): The properties to match the end nodes on
+        mode (Literal["merge", "create"]): Merge or create the relationships
+
+    Returns:
+        str: The Cypher statement, with the rows as parameter `$rows`
+    """
+    lines = [
+        "UNWIND $rows AS row",
+        f"MATCH (a{_get_label_pattern(start_node_labels)}{_get_property_pattern(start_node_properties, 'row[0]')})",
+        f"MATCH (b{_get_label_pattern(end_node_labels)}{_get_property_pattern(end_node_properties, 'row[1]')})",
+    ]
+    if mode == "create":
+        lines.append(f"CREATE (a)-[r:{quote_name(rel_type)}]->(b)")
+        lines.append("SET r = row[2]")
+    else:
+        lines.append(f"MERGE (a)-[r:{quote_name(rel_type)}]->(b)")
+        lines.append("ON CREATE SET r = row[2]")
+        lines.append("ON MATCH SET r += row[2]")
+    return "\n".join(lines)
+
+
+def _run_rows(tx: ManagedTransaction, query: str, rows: Sequence):
+    tx.run(query, rows=rows).consume()
+
+
+class UnwindWriter:
+    """Write the buffered sets of a `Dict2graph` instance with the neo4j driver, instead of graphio.
+
+    **usage**
+    ```python
+    from dict2graph import Dict2graph, UnwindWriter
+    from neo4j import GraphDatabase
+
+    writer = UnwindWriter(rows_per_transaction=5000)
+    d2g = Dict2graph()
+    d2g.parse(data)
+    d2g.merge(GraphDatabase.driver("neo4j://localhost"), writer=writer)
+    ```
+
+    Pass `writer="unwind"` to `Dict2graph.merge()`/`Dict2graph.create()` to use a writer with the default settings.
+    """
+
+    def __init__(self, rows_per_transaction: int = 10000):
+        """
+        Args:
+            rows_per_transaction (int, optional): Number of nodes/relationships written in one transaction. Defaults to 10000.
+        """
+        self.rows_per_transaction = rows_per_transaction
+        # statements by mode and set fingerprint
+        self._queries: Dict[Tuple[str, str, Hashable], str] = {}
+
+    def merge(
+        self,
+        graph: Driver,
+        node_sets: Dict[Hashable, NodeSet],
+        rel_sets: Dict[Hashable, RelationshipSet],
+        database: str = None,
+    ):
+        """Merge the node sets and then the relationship sets.
+
+        Args:
+            graph (Driver): A neo4j driver
+            node_sets (Dict[Hashable, NodeSet]): The node sets by fingerprint, like `Dict2graph._nodeSets`
+            rel_sets (Dict[Hashable, RelationshipSet]): The relationship sets by fingerprint, like `Dict2graph._relSets`
+            database (str, optional): Name of the Neo4j database. Defaults to None which will be the default "neo4j" db.
+        """
+        self._write(graph, node_sets, rel_sets, "merge", database)
+
+    def create(
+        self,
+        graph: Driver,
+        node_sets: Dict[Hashable, NodeSet],
+        rel_sets: Dict[Hashable, RelationshipSet],
+        database: str = None,
+    ):
+        """Create the node sets and then the relationship sets. See `UnwindWriter.merge()`"""
+        self._write(graph, node_sets, rel_sets, "create", database)
+
+    def _write(
+        self,
+        graph: Driver,
+        node_sets: Dict[Hashable, NodeSet],
+        rel_sets: Dict[Hashable, RelationshipSet],
+        mode: Literal["merge", "create"],
+        database: str,
+    ):
+        with graph.session(database=database) as session:
+            for fingerprint, node_set in node_sets.items():
+                self._write_rows(
+                    session,
+                    self._get_node_query(fingerprint, node_set, mode),
+                    node_set.nodes,
+                )
+            for fingerprint, rel_set in rel_sets.items():
+                self._write_rows(
+                    session,
+                    self._get_rel_query(fingerprint, rel_set, mode),
+                    rel_set.relationships,
+                )
+
+    def _get_node_query(
+        self,
+        fingerprint: Hashable,
+        node_set: NodeSet,
+        mode: Literal["merge", "create"],
+    ) -> str:
+        key = ("node", mode, fingerprint)
+        query = self._queries.get(key)
+        if query is None:
+            query = self._queries[key] = build_node_query(
+                node_set.labels, node_set.merge_keys, mode
+            )
+            log.debug(f"Prepared statement for {node_set.labels}:\n{query}")
+        return query
+
+    def _get_rel_query(
+        self,
+        fingerprint: Hashable,
+        rel_set: RelationshipSet,
+        mode: Literal["merge", "create"],
+    ) -> str:
+        key = ("relation", mode, fingerprint)
+        query = self._queries.get(key)
+        if query is None:
+            query = self._queries[key] = build_rel_query(
+                rel_set.rel_type,
+                rel_set.start_node_labels,
+                rel_set.start_node_properties,
+                rel_set.end_node_labels,
+                rel_set.end_node_properties,
+                mode,
+            )
+            log.debug(f"Prepared statement for {rel_set.rel_type}:\n{query}")
+        return query
+
+    def _write_rows(self, session: Session, query: str, rows: List):
+        for batch in self._iter_batches(rows):
+            session.execute_write(_run_rows, query, batch)
+
+    def _iter_batches(self, rows: List) -> Iterator[List]:
+        if len(rows) <= self.rows_per_transaction:
+            # the common case of a flush smaller than a transaction needs no copy of the row list
+            if rows:
+                yield rows
+            return
+        for start in range(0, len(rows), self.rows_per_transaction):
+            yield rows[start : start + self.rows_per_transaction]
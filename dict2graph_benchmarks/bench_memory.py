@@ -0,0 +1,73 @@
+"""
+Measure the peak memory (max RSS) of buffering a large generated dataset with and without `Dict2graph(release_source_data=True)`.
+Every mode runs in a fresh subprocess. The records are generated one by one and are not referenced by the benchmark itself,
+so all input data that is still alive at the end is kept alive by dict2graph.
+
+Run with `python dict2graph_benchmarks/bench_memory.py [NUMBER_OF_RECORDS]`
+"""
+import os, sys
+import json
+import resource
+import subprocess
+
+if __name__ == "__main__":
+    SCRIPT_DIR = os.path.dirname(
+        os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__)))
+    )
+    MODULE_ROOT_DIR = os.path.join(SCRIPT_DIR, "..")
+    sys.path.insert(0, os.path.normpath(MODULE_ROOT_DIR))
+from dict2graph import Dict2graph
+
+
+def records(count: int):
+    for i in range(count):
+        yield {
+            "article": {
+                "id": i,
+                "title": f"Article {i}",
+                "abstract": "Lorem ipsum dolor sit amet, consetetur sadipscing elitr. "
+                * 10,
+                "authors": [
+                    {"name": f"Author {i % 100}", "affiliation": {"name": "DZD"}},
+                    {"name": f"Author {i % 7}", "affiliation": {"name": "HMGU"}},
+                ],
+                "journal": {"name": f"Journal {i % 10}", "issn": f"{i % 10:04d}"},
+                "keywords": ["diabetes", "graph", f"keyword {i % 50}"],
+            }
+        }
+
+
+def measure(record_count: int, options: dict) -> int:
+    d2g = Dict2graph(**options)
+    # buffer everything, nothing is written
+    d2g.parse_iter(records(record_count))
+    # max RSS in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+if __name__ == "__main__":
+    record_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    if len(sys.argv) > 2:
+        # child process
+        print(measure(record_count, json.loads(sys.argv[2])))
+        sys.exit()
+    print(f"{record_count} records")
+    results = {}
+    for name, options in [
+        ("default", {}),
+        ("release_source_data", {"release_source_data": True}),
+        (
+            "release_source_data + merkle_hash_ids",
+            {"release_source_data": True, "merkle_hash_ids": True},
+        ),
+    ]:
+        out = subprocess.run(
+            [sys.executable, __file__, str(record_count), json.dumps(options)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results[name] = int(out.stdout.strip())
+        print(
+            f"{name}: peak RSS {results[name] / 1024:.0f} MB ({results[name] / results['default'] * 100:.0f}% of default)"
+        )
@@ -0,0 +1,57 @@
+"""
+Measure the memory used per `Node` and per `Relation` object, including the instance attributes (`__dict__`/slots)
+and the empty containers every object carries, but excluding the property values.
+
+Run with `python dict2graph_benchmarks/bench_object_size.py`
+"""
+import os, sys
+import gc
+import tracemalloc
+
+if __name__ == "__main__":
+    SCRIPT_DIR = os.path.dirname(
+        os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__)))
+    )
+    MODULE_ROOT_DIR = os.path.join(SCRIPT_DIR, "..")
+    sys.path.insert(0, os.path.normpath(MODULE_ROOT_DIR))
+from dict2graph import Node, Relation
+
+OBJECT_COUNT = 100000
+LABELS = ["Person"]
+SOURCE_DATA = {"name": "Holden", "age": 35}
+
+
+def create_nodes():
+    nodes = []
+    for i in range(OBJECT_COUNT):
+        node = Node(labels=LABELS, source_data=SOURCE_DATA, parent_node=None)
+        node["name"] = "Holden"
+        node["age"] = 35
+        nodes.append(node)
+    return nodes
+
+
+def create_relations(nodes):
+    return [
+        Relation(start_node=nodes[i], end_node=nodes[i + 1])
+        for i in range(len(nodes) - 1)
+    ]
+
+
+def measure(func, *args) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    objects = func(*args)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (after - before) / len(objects), objects
+
+
+if __name__ == "__main__":
+    bytes_per_node, nodes = measure(create_nodes)
+    print(f"Node: {bytes_per_node:.0f} bytes per object (with 2 properties)")
+    bytes_per_rel, rels = measure(create_relations, nodes)
+    print(
+        f"Relation: {bytes_per_rel:.0f} bytes per object (including the growth of the relation lists of its nodes)"
+    )
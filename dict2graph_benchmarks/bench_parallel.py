@@ -0,0 +1,69 @@
+"""
+Measure the parse throughput of `Dict2graph.parse_parallel()` with an increasing number of worker processes,
+compared to the single process `Dict2graph.parse_iter()`.
+Nothing is written to a database.
+
+Run with `python dict2graph_benchmarks/bench_parallel.py [NUMBER_OF_RECORDS]`
+"""
+import os, sys
+import time
+
+if __name__ == "__main__":
+    SCRIPT_DIR = os.path.dirname(
+        os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__)))
+    )
+    MODULE_ROOT_DIR = os.path.join(SCRIPT_DIR, "..")
+    sys.path.insert(0, os.path.normpath(MODULE_ROOT_DIR))
+from dict2graph import Dict2graph, Transformer, NodeTrans
+
+
+def records(count: int):
+    for i in range(count):
+        yield {
+            "article": {
+                "id": i,
+                "title": f"Article {i}",
+                "authors": [{"name": f"Author {i % 100}"}, {"name": f"Author {i % 7}"}],
+                "journal": {"name": f"Journal {i % 10}", "issn": f"{i % 10:04d}"},
+            }
+        }
+
+
+def configured_d2g() -> Dict2graph:
+    d2g = Dict2graph()
+    d2g.add_transformation(
+        [
+            Transformer.match_nodes("article").do(
+                NodeTrans.CreateNewMergePropertyFromHash()
+            ),
+            Transformer.match_nodes("authors").do(NodeTrans.RemoveListItemLabels()),
+        ]
+    )
+    return d2g
+
+
+def measure(record_count: int, workers: int) -> float:
+    d2g = configured_d2g()
+    start = time.perf_counter()
+    if workers == 0:
+        d2g.parse_iter(records(record_count))
+    else:
+        d2g.parse_parallel(records(record_count), workers=workers)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    record_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{os.cpu_count()} CPUs, {record_count} records")
+    baseline = measure(record_count, 0)
+    print(f"parse_iter: {baseline:.2f}s ({record_count / baseline:.0f} records/s)")
+    for workers in range(2, (os.cpu_count() or 1) + 1):
+        duration = measure(record_count, workers)
+        print(
+            f"parse_parallel(workers={workers}): {duration:.2f}s ({record_count / duration:.0f} records/s, speedup {baseline / duration:.2f}x)"
+        )
+    if (os.cpu_count() or 1) < 2:
+        duration = measure(record_count, 2)
+        print(
+            f"parse_parallel(workers=2) on a single CPU (overhead only): {duration:.2f}s ({record_count / duration:.0f} records/s)"
+        )
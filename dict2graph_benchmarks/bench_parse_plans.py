@@ -0,0 +1,71 @@
+"""
+Compare the parsing of homogeneous records with and without the parse plan cache (`Dict2graph(cache_parse_plans=True)`).
+Measured are the creation of the nodes from the dicts (the part the plans replace) and the whole traversal.
+Transformations and the NodeSet/RelationshipSet creation are not part of the benchmark.
+
+Run with `python dict2graph_benchmarks/bench_parse_plans.py`
+"""
+import os, sys
+import timeit
+
+if __name__ == "__main__":
+    SCRIPT_DIR = os.path.dirname(
+        os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__)))
+    )
+    MODULE_ROOT_DIR = os.path.join(SCRIPT_DIR, "..")
+    sys.path.insert(0, os.path.normpath(MODULE_ROOT_DIR))
+from dict2graph import Dict2graph
+
+
+def flat_records(count: int):
+    return [
+        {f"prop_{j}": i * j if j % 3 else f"value {j}" for j in range(30)}
+        for i in range(count)
+    ]
+
+
+def nested_records(count: int):
+    return [
+        {
+            "article": {
+                "id": i,
+                "title": f"Article {i}",
+                "year": 2000 + i % 20,
+                "journal": {"name": f"Journal {i % 10}", "issn": f"{i % 10:04d}"},
+                "keywords": ["a", "b"],
+            }
+        }
+        for i in range(count)
+    ]
+
+
+def create_nodes(records, cache_parse_plans: bool):
+    d2g = Dict2graph(cache_parse_plans=cache_parse_plans)
+    for record in records:
+        d2g._create_dict_fragment_node(labels=["Record"], data=record, parent_node=None)
+
+
+def traverse(records, cache_parse_plans: bool):
+    d2g = Dict2graph(cache_parse_plans=cache_parse_plans)
+    for record in records:
+        d2g._parse_traverse_iterative(labels=["Record"], data=record)
+        d2g._node_cache = []
+        d2g._rel_cache = []
+
+
+if __name__ == "__main__":
+    for name, records in [
+        ("flat", flat_records(20000)),
+        ("nested", nested_records(20000)),
+    ]:
+        for stage, func in [("node creation", create_nodes), ("traversal", traverse)]:
+            durations = {}
+            for cache_parse_plans in [False, True]:
+                durations[cache_parse_plans] = min(
+                    timeit.repeat(
+                        lambda: func(records, cache_parse_plans), number=1, repeat=5
+                    )
+                )
+            print(
+                f"{name} records, {stage}: without plans {durations[False]:.3f}s, with plans {durations[True]:.3f}s, speedup {durations[False] / durations[True]:.2f}x"
+            )
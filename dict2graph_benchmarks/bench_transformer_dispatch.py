@@ -0,0 +1,84 @@
+"""
+Measure the time spent in `Dict2graph._run_transformations()` with a growing number of node and relationship transformers,
+that each match only a small part of the nodes/relationships. Without dispatching by label and relationship type,
+every transformer container has to check every cached node or relationship.
+Nothing is written to a database.
+
+Run with `python dict2graph_benchmarks/bench_transformer_dispatch.py [NUMBER_OF_RECORDS]`
+"""
+import os, sys
+import time
+
+if __name__ == "__main__":
+    SCRIPT_DIR = os.path.dirname(
+        os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__)))
+    )
+    MODULE_ROOT_DIR = os.path.join(SCRIPT_DIR, "..")
+    sys.path.insert(0, os.path.normpath(MODULE_ROOT_DIR))
+from dict2graph import Dict2graph, Transformer, NodeTrans, RelTrans
+
+ENTITY_COUNT = 40
+
+
+def record(i: int):
+    # every record has nodes of a handful of the entity labels
+    return {
+        "article": {
+            "id": i,
+            "authors": [{"name": f"Author {i % 100}"}, {"name": f"Author {i % 7}"}],
+            **{
+                f"entity_{(i + j) % ENTITY_COUNT}": {"value": f"{i}_{j}"}
+                for j in range(5)
+            },
+        }
+    }
+
+
+def configured_d2g(transformer_count: int, kind: str) -> Dict2graph:
+    d2g = Dict2graph()
+    if kind == "node":
+        d2g.add_transformation(
+            [
+                Transformer.match_nodes(f"entity_{i}").do(
+                    NodeTrans.AddLabel(f"Entity{i}")
+                )
+                for i in range(transformer_count)
+            ]
+        )
+    else:
+        d2g.add_transformation(
+            [
+                Transformer.match_rels(f"article_HAS_entity_{i}").do(
+                    RelTrans.AddProperty({"weight": i})
+                )
+                for i in range(transformer_count)
+            ]
+        )
+    return d2g
+
+
+def measure(record_count: int, transformer_count: int, kind: str) -> float:
+    d2g = configured_d2g(transformer_count, kind)
+    run_transformations = d2g._run_transformations
+    duration = 0
+
+    def timed_run_transformations():
+        nonlocal duration
+        start = time.perf_counter()
+        run_transformations()
+        duration += time.perf_counter() - start
+
+    d2g._run_transformations = timed_run_transformations
+    d2g.parse_iter(record(i) for i in range(record_count))
+    return duration
+
+
+if __name__ == "__main__":
+    record_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f"{record_count} records")
+    for kind in ["node", "relationship"]:
+        for transformer_count in [1, 5, 10, 20, 40]:
+            duration = measure(record_count, transformer_count, kind)
+            print(
+                f"{transformer_count} {kind} transformers: {duration:.2f}s in _run_transformations ({duration / transformer_count * 1000:.1f}ms per transformer)"
+            )
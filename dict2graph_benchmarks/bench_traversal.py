@@ -0,0 +1,60 @@
+"""
+Compare the recursive and the iterative (explicit stack) traversal engine of dict2graph
+on synthetic deep and wide documents.
+
+Run with `python dict2graph_benchmarks/bench_traversal.py`
+"""
+import os, sys
+import timeit
+
+if __name__ == "__main__":
+    SCRIPT_DIR = os.path.dirname(
+        os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__)))
+    )
+    MODULE_ROOT_DIR = os.path.join(SCRIPT_DIR, "..")
+    sys.path.insert(0, os.path.normpath(MODULE_ROOT_DIR))
+from dict2graph import Dict2graph
+
+
+def deep_document(depth: int):
+    # {"level": {"depth": 0, "level": {"depth": 1, "level": ...}}}
+    doc = {"depth": depth}
+    for i in reversed(range(depth)):
+        doc = {"depth": i, "level": doc}
+    return doc
+
+
+def wide_document(width: int):
+    return {
+        "items": [
+            {"index": i, "name": f"item {i}", "tags": ["a", "b"], "owner": {"id": i}}
+            for i in range(width)
+        ]
+    }
+
+
+def traverse(data, iterative: bool):
+    d2g = Dict2graph(iterative_traversal=iterative)
+    if iterative:
+        d2g._parse_traverse_iterative(labels=["Root"], data=data)
+    else:
+        d2g._parse_traverse_dict_fragment(labels=["Root"], data=data, parent_node=None)
+
+
+def run_case(name: str, data, repeat: int = 5):
+    for engine, iterative in [("recursive", False), ("iterative", True)]:
+        try:
+            seconds = min(
+                timeit.repeat(
+                    lambda: traverse(data, iterative), number=1, repeat=repeat
+                )
+            )
+            print(f"{name:<20} {engine:<10} {seconds * 1000:10.2f} ms")
+        except RecursionError:
+            print(f"{name:<20} {engine:<10} {'RecursionError':>13}")
+
+
+if __name__ == "__main__":
+    run_case("deep (500 levels)", deep_document(500))
+    run_case("deep (2000 levels)", deep_document(2000))
+    run_case("wide (20000 items)", wide_document(20000))
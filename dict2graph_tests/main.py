@@ -13,4 +13,5 @@ from dict2graph_tests import (
     test_node_trans,
     test_rel_trans,
     test_integration_tests,
+    test_ingest,
 )
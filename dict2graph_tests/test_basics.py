@@ -7,7 +7,9 @@ if __name__ == "__main__":
     )
     MODULE_ROOT_DIR = os.path.join(SCRIPT_DIR, "..")
     sys.path.insert(0, os.path.normpath(MODULE_ROOT_DIR))
-from dict2graph import Dict2graph, Transformer, NodeTrans, RelTrans
+from dict2graph import Dict2graph, Transformer, NodeTrans, RelTrans, Node, Relation
+from dict2graph import serialization
+from dict2graph.cache_index import LabelIndex
 from dict2graph_tests._test_tools import (
     wipe_all_neo4j_data,
     DRIVER,
@@ -653,6 +655,29 @@ def test_empty_obj02():
     assert_result(result, expected_result_nodes)
 
 
+def test_empty_obj03():
+    data = {"ship": {"name": "Rocinante", "cargo": {"crates": None}}}
+    d2g = Dict2graph()
+    d2g.parse(data)
+    # without deduplication, the node set of an empty child node keeps the merge keys of the still empty node
+    node_set = d2g._nodeSets[(frozenset(["cargo"]), frozenset())]
+    assert node_set.merge_keys == []
+    assert list(node_set.nodes[0].keys()) == ["id"]
+    # deduplication finds duplicates by the merge key values. the node set merges on the generated id, like the relationships to it
+    d2g = Dict2graph(deduplicate_nodes="first")
+    d2g.parse(data)
+    d2g.parse(data)
+    node_set = d2g._nodeSets[(frozenset(["cargo"]), frozenset(["id"]))]
+    assert node_set.merge_keys == ["id"]
+    assert len(node_set.nodes) == 1
+    wipe_all_neo4j_data(DRIVER)
+    d2g.merge(DRIVER)
+    d2g.merge(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    assert len(result) == 2
+
+
 def test_error_case_list_01():
     wipe_all_neo4j_data(DRIVER)
     data = {
@@ -802,6 +827,965 @@ def test_list_trans():
     assert_result(result, expected_result_nodes)
 
 
+def test_deep_nested_obj():
+    wipe_all_neo4j_data(DRIVER)
+    # deeper than the python recursion limit
+    depth = 2000
+    data = {"depth": depth}
+    for i in reversed(range(depth)):
+        data = {"depth": i, "level": data}
+
+    d2g = Dict2graph()
+    d2g.parse(data, root_node_labels="level")
+    d2g.create(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    assert len(result) == depth + 1
+    for node in result:
+        assert node["labels"] == ["level"]
+        if node["props"]["depth"] == depth:
+            assert node["outgoing_rels"] == []
+        else:
+            assert len(node["outgoing_rels"]) == 1
+            assert (
+                node["outgoing_rels"][0]["rel_target_node"]["props"]["depth"]
+                == node["props"]["depth"] + 1
+            )
+
+
+def test_deep_nested_list():
+    wipe_all_neo4j_data(DRIVER)
+    # deeper than the python recursion limit. the legacy hash ids serialize the whole child tree of every list hub
+    depth = 2000
+    data = ["bottom"]
+    for i in range(depth - 1):
+        data = [data]
+
+    d2g = Dict2graph()
+    d2g.parse({"level": data})
+    d2g.create(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # the hubs of all list levels and the item of the innermost list
+    assert len(result) == depth + 1
+    assert (
+        len({node["props"]["id"] for node in result if "id" in node["props"]}) == depth
+    )
+    # the ids are the ones `json.dumps()` would give without a recursion limit
+    recursion_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(depth * 5)
+    try:
+        assert serialization.dumps(data) == json.dumps(data)
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+
+
+def test_merkle_hash_ids():
+    wipe_all_neo4j_data(DRIVER)
+    data = {
+        "bookshelf": {
+            "books": [{"title": "Leviathan Wakes"}, {"title": "Caliban's War"}]
+        }
+    }
+
+    d2g = Dict2graph(merkle_hash_ids=True)
+    d2g.parse(data)
+    d2g.parse(data)
+    d2g.merge(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    expected_result_nodes: dict = [
+        {
+            "labels": ["ListHub", "books"],
+            "props": {"id": "3dd576b07454bc9a26fd2e35e8853b08"},
+            "outgoing_rels": [
+                {
+                    "rel_type": "books_LIST_HAS_books",
+                    "rel_props": {"_list_item_index": 0},
+                    "rel_target_node": {
+                        "labels": ["ListItem", "books"],
+                        "props": {"title": "Leviathan Wakes"},
+                    },
+                },
+                {
+                    "rel_type": "books_LIST_HAS_books",
+                    "rel_props": {"_list_item_index": 1},
+                    "rel_target_node": {
+                        "labels": ["ListItem", "books"],
+                        "props": {"title": "Caliban's War"},
+                    },
+                },
+            ],
+        },
+        {
+            "labels": ["ListItem", "books"],
+            "props": {"title": "Leviathan Wakes"},
+            "outgoing_rels": [],
+        },
+        {
+            "labels": ["ListItem", "books"],
+            "props": {"title": "Caliban's War"},
+            "outgoing_rels": [],
+        },
+        {
+            "labels": ["bookshelf"],
+            "props": {"id": "42bc540fd1ca2fe176f804c70fbf4e42"},
+            "outgoing_rels": [
+                {
+                    "rel_type": "bookshelf_HAS_books",
+                    "rel_props": {},
+                    "rel_target_node": {
+                        "labels": ["ListHub", "books"],
+                        "props": {"id": "3dd576b07454bc9a26fd2e35e8853b08"},
+                    },
+                }
+            ],
+        },
+    ]
+    assert_result(result, expected_result_nodes)
+
+
+def test_parse_plan_cache():
+    wipe_all_neo4j_data(DRIVER)
+    records = [
+        {
+            "ship": {
+                "name": "Rocinante",
+                "class": "Corvette",
+                "crew_size": 4,
+                "captain": {"person": {"name": "Holden"}},
+                "tags": ["gunship"],
+                "registry": None,
+            }
+        },
+        {
+            "ship": {
+                "name": "Tachi",
+                "class": "Corvette",
+                "crew_size": 4,
+                "captain": {"person": {"name": "Holden"}},
+                "tags": ["gunship"],
+                "registry": None,
+            }
+        },
+    ]
+    d2g = Dict2graph()
+    for record in records:
+        d2g.parse(record)
+    d2g.create(DRIVER)
+    expected_result_nodes = get_all_neo4j_nodes_with_rels(DRIVER)
+
+    wipe_all_neo4j_data(DRIVER)
+    d2g = Dict2graph(cache_parse_plans=True)
+    for record in records:
+        d2g.parse(record)
+    # the second ship was parsed with the plan of the first one
+    assert len(d2g._parse_plan_cache) == 1
+    d2g.create(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    assert_result(result, expected_result_nodes)
+
+
+def test_flat_records():
+    wipe_all_neo4j_data(DRIVER)
+    d2g = Dict2graph()
+    d2g.add_transformation(
+        Transformer.match_nodes("animal").do(NodeTrans.OverrideLabel("Animal"))
+    )
+    # flat records without any matching transformer take a shortcut. the result must be the same
+    d2g.parse(
+        {"name": "Holden", "age": 35, "callsign": None}, root_node_labels="person"
+    )
+    d2g.parse({"name": "Naomi", "age": 34}, root_node_labels="person")
+    # a transformer matches this label
+    d2g.parse({"name": "Buster"}, root_node_labels="animal")
+    d2g.create(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    expected_result_nodes: dict = [
+        {
+            "labels": ["person"],
+            "props": {"name": "Holden", "age": 35},
+            "outgoing_rels": [],
+        },
+        {
+            "labels": ["person"],
+            "props": {"name": "Naomi", "age": 34},
+            "outgoing_rels": [],
+        },
+        {"labels": ["Animal"], "props": {"name": "Buster"}, "outgoing_rels": []},
+    ]
+    assert_result(result, expected_result_nodes)
+
+
+def test_release_source_data():
+    wipe_all_neo4j_data(DRIVER)
+    data = {
+        "bookshelf": {
+            "name": "Sci-Fi",
+            "books": [
+                {"title": "Leviathan Wakes", "author": {"name": "James S. A. Corey"}},
+                {"title": "Caliban's War", "author": {"name": "James S. A. Corey"}},
+            ],
+            "tags": [],
+        }
+    }
+    d2g = Dict2graph()
+    d2g.parse(data)
+    d2g.merge(DRIVER)
+    expected_result_nodes = get_all_neo4j_nodes_with_rels(DRIVER)
+
+    wipe_all_neo4j_data(DRIVER)
+    d2g = Dict2graph(release_source_data=True)
+    d2g.parse(data)
+    # the buffer only holds plain dicts, no references to the parsed nodes
+    for node_set in d2g._nodeSets.values():
+        assert all(type(node) == dict for node in node_set.nodes)
+    d2g.merge(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    assert_result(result, expected_result_nodes)
+
+
+def test_relation_rewiring():
+    # nodes and relations with equal content must still be distinguished when rewiring
+    hub = Node(labels=["Hub"], source_data={}, parent_node=None)
+    new_parent = Node(labels=["Parent"], source_data={}, parent_node=None)
+    items = [Node(labels=["Item"], source_data={}, parent_node=hub) for i in range(3)]
+    rels = [Relation(start_node=hub, end_node=item) for item in items]
+    assert hub.child_nodes == items
+    rels[1].start_node = new_parent
+    assert [rel is rels[1] for rel in new_parent.outgoing_relations] == [True]
+    assert [id(rel) for rel in hub.outgoing_relations] == [id(rels[0]), id(rels[2])]
+    assert [id(rel) for rel in items[1].incoming_relations] == [id(rels[1])]
+    items[2].deleted = True
+    assert [id(rel) for rel in hub.outgoing_relations] == [id(rels[0])]
+    # in-place changes of the relations are applied to the node
+    hub.relations.remove(rels[0])
+    assert hub.outgoing_relations == []
+    hub.relations.append(rels[0])
+    assert [id(rel) for rel in hub.outgoing_relations] == [id(rels[0])]
+    assert len(hub.relations + [rels[1]]) == 3
+    hub.relations.clear()
+    assert hub.relations == []
+
+
+def test_node_id_cache():
+    # the cached id and merge keys must follow every change of the node
+    node = Node(labels=["Person"], source_data={}, parent_node=None)
+    assert node.id is None
+    node["name"] = "Holden"
+    assert node.id == "Holden"
+    assert node.merge_property_keys == ["name"]
+    node.update({"age": 35})
+    assert node.merge_property_keys == ["name", "age"]
+    # a copy of the cached keys, usable like the list it always was
+    assert node.merge_property_keys + ["ship"] == ["name", "age", "ship"]
+    two_props_id = node.id
+    node.setdefault("ship", "Rocinante")
+    assert node.id != two_props_id
+    node.pop("ship")
+    assert node.id == two_props_id
+    node.merge_property_keys = ["age"]
+    assert node.id == 35
+    node["age"] = 36
+    assert node.id == 36
+    del node["age"]
+    assert node.id is None
+    node.merge_property_keys = None
+    assert node.id == "Holden"
+    node.clear()
+    assert node.id is None
+    assert node.merge_property_keys == []
+
+
+def test_label_dispatch():
+    wipe_all_neo4j_data(DRIVER)
+    from dict2graph.transformers._base import _NodeTransformerBase
+
+    class TrackParentNode(_NodeTransformerBase):
+        def transform_node(self, node: Node):
+            if node.parent_node is not None:
+                node.parent_node.labels = node.parent_node.labels + ["Tracked"]
+
+    data = {
+        "fleet": {
+            "name": "MCRN",
+            "ship": {"name": "Donnager", "shuttle": {"name": "Knight"}},
+        }
+    }
+    d2g = Dict2graph()
+    d2g.add_transformation(
+        [
+            Transformer.match_nodes("shuttle").do(NodeTrans.AddLabel("Tracked")),
+            # parent nodes are cached after their children. labels added while a transformer runs
+            # must be seen by the same transformer for the nodes it did not visit yet
+            Transformer.match_nodes("Tracked").do(TrackParentNode()),
+        ]
+    )
+    d2g.parse(data)
+    d2g.create(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    expected_result_nodes: dict = [
+        {
+            "labels": ["fleet", "Tracked"],
+            "props": {"name": "MCRN"},
+            "outgoing_rels": [
+                {
+                    "rel_props": {},
+                    "rel_type": "fleet_HAS_ship",
+                    "rel_target_node": {
+                        "labels": ["ship", "Tracked"],
+                        "props": {"name": "Donnager"},
+                    },
+                }
+            ],
+        },
+        {
+            "labels": ["ship", "Tracked"],
+            "props": {"name": "Donnager"},
+            "outgoing_rels": [
+                {
+                    "rel_props": {},
+                    "rel_type": "ship_HAS_shuttle",
+                    "rel_target_node": {
+                        "labels": ["shuttle", "Tracked"],
+                        "props": {"name": "Knight"},
+                    },
+                }
+            ],
+        },
+        {
+            "labels": ["shuttle", "Tracked"],
+            "props": {"name": "Knight"},
+            "outgoing_rels": [],
+        },
+    ]
+    assert_result(result, expected_result_nodes)
+
+
+def test_in_place_label_changes():
+    from dict2graph.transformers._base import _NodeTransformerBase
+
+    class AppendLabel(_NodeTransformerBase):
+        def transform_node(self, node: Node):
+            node.labels.append("Extra")
+
+    class RenameToNaomi(_NodeTransformerBase):
+        def transform_node(self, node: Node):
+            node["name"] = "Naomi"
+
+    for schedule_transformers in [True, False]:
+        d2g = Dict2graph(schedule_transformers=schedule_transformers)
+        d2g.add_transformation(
+            [
+                Transformer.match_nodes("person").do(AppendLabel()),
+                Transformer.match_nodes("Extra").do(RenameToNaomi()),
+            ]
+        )
+        d2g.parse({"person": {"name": "Amos"}})
+        rows = [
+            (list(node_set.labels), dict(row))
+            for node_set in d2g._nodeSets.values()
+            for row in node_set.nodes
+        ]
+        assert rows == [(["person", "Extra"], {"name": "Naomi"})]
+    # in place changes are picked up like replaced labels
+    node = Node(labels=["Ship"], source_data={}, parent_node=None)
+    crew = Node(labels=["Crew"], source_data={}, parent_node=node)
+    rel = Relation(start_node=node, end_node=crew)
+    node.labels.insert(0, "Gunship")
+    assert rel.relation_type == "Gunship_HAS_Crew"
+    node.labels.remove("Gunship")
+    assert rel.relation_type == "Ship_HAS_Crew"
+
+
+def test_compiled_matchers():
+    node = Node(labels=["Ship", "Gunship"], source_data={}, parent_node=None)
+    assert Transformer.match_nodes("Ship")._match(node)
+    # the label mask of the node was computed before these labels were known to any matcher
+    assert Transformer.match_nodes(["Ship", "Gunship"])._match(node)
+    assert not Transformer.match_nodes(["Ship", "Frigate"])._match(node)
+    assert Transformer.match_nodes(has_one_label_of=["Frigate", "Gunship"])._match(node)
+    assert not Transformer.match_nodes(
+        has_one_label_of=["Ship"], has_none_label_of=["Gunship"]
+    )._match(node)
+    assert Transformer.match_nodes()._match(node)
+    # replaced labels are picked up
+    node.labels = ["Ship", "Frigate"]
+    assert Transformer.match_nodes(["Ship", "Frigate"])._match(node)
+    assert not Transformer.match_nodes(has_one_label_of=["Gunship"])._match(node)
+    # so are labels changed in place
+    matcher = Transformer.match_nodes(
+        has_one_label_of=["Ship", "Corvette"], has_none_label_of=["Extra"]
+    )
+    assert matcher._match(node)
+    node.labels.append("Extra")
+    assert not matcher._match(node)
+    node.labels.remove("Extra")
+    assert matcher._match(node)
+    node.deleted = True
+    assert not Transformer.match_nodes()._match(node)
+
+
+def test_relation_type_cache():
+    ship = Node(labels=["Ship"], source_data={}, parent_node=None)
+    crew = Node(labels=["Crew"], source_data={}, parent_node=ship)
+    captain = Node(labels=["Captain"], source_data={}, parent_node=ship)
+    rel = Relation(start_node=ship, end_node=crew)
+    assert rel.relation_type == "Ship_HAS_Crew"
+    ship.labels = ["Gunship", "Ship"]
+    assert rel.relation_type == "Gunship_HAS_Crew"
+    crew.primary_label = "Pilot"
+    assert rel.relation_type == "Gunship_HAS_Pilot"
+    rel.end_node = captain
+    assert rel.relation_type == "Gunship_HAS_Captain"
+    rel.relation_type = "COMMANDED_BY"
+    ship.labels = ["Ship"]
+    assert rel.relation_type == "COMMANDED_BY"
+    rel.relation_type = None
+    assert rel.relation_type == "Ship_HAS_Captain"
+
+
+def test_batch_transformers():
+    wipe_all_neo4j_data(DRIVER)
+    from dict2graph.transformers._base import _NodeTransformerBase
+
+    batches = []
+
+    class CountBatches(_NodeTransformerBase):
+        def transform_nodes(self, nodes):
+            batches.append(len(nodes))
+
+    class AddRank(NodeTrans.AddProperty):
+        # overrides the per node method. must not be run through the batch method of `AddProperty`
+        def transform_node(self, node: Node):
+            node["rank"] = "Chief Engineer" if node["age"] < 30 else "Mechanic"
+
+    assert NodeTrans.AddProperty._implements_transform_nodes()
+    assert CountBatches._implements_transform_nodes()
+    assert not AddRank._implements_transform_nodes()
+    assert not NodeTrans.CapitalizeLabels._implements_transform_nodes()
+
+    data = {
+        "crew": [
+            {"name": "Naomi", "age": "29", "pin": "1234"},
+            {"name": "Amos", "age": "37"},
+        ]
+    }
+    d2g = Dict2graph()
+    d2g.add_transformation(
+        Transformer.match_nodes(["crew", "ListItem"]).do(
+            [
+                NodeTrans.TypeCastProperty("age", int),
+                NodeTrans.RemoveProperty("pin"),
+                NodeTrans.OverridePropertyName("name", "fullname"),
+                NodeTrans.AddProperty({"ship": "Rocinante"}),
+                CountBatches(),
+            ]
+        )
+    )
+    d2g.parse(data)
+    # all transformers of the container support batches. every transformer got both nodes at once
+    assert batches == [2]
+    d2g.create(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    naomi = {"age": 29, "fullname": "Naomi", "ship": "Rocinante"}
+    amos = {"age": 37, "fullname": "Amos", "ship": "Rocinante"}
+    expected_result_nodes: dict = [
+        {
+            "labels": ["ListHub", "crew"],
+            "props": {"id": "8ca73057403968b88188401f16848bb4"},
+            "outgoing_rels": [
+                {
+                    "rel_props": {"_list_item_index": 0},
+                    "rel_type": "crew_LIST_HAS_crew",
+                    "rel_target_node": {"labels": ["ListItem", "crew"], "props": naomi},
+                },
+                {
+                    "rel_props": {"_list_item_index": 1},
+                    "rel_type": "crew_LIST_HAS_crew",
+                    "rel_target_node": {"labels": ["ListItem", "crew"], "props": amos},
+                },
+            ],
+        },
+        {"labels": ["ListItem", "crew"], "props": naomi, "outgoing_rels": []},
+        {"labels": ["ListItem", "crew"], "props": amos, "outgoing_rels": []},
+    ]
+    assert_result(result, expected_result_nodes)
+
+    # a container with a per node transformer runs its batch transformers node by node
+    batches.clear()
+    d2g = Dict2graph()
+    d2g.add_transformation(
+        Transformer.match_nodes(["crew", "ListItem"]).do(
+            [NodeTrans.TypeCastProperty("age", int), CountBatches(), AddRank({})]
+        )
+    )
+    d2g.parse(data)
+    assert batches == [1, 1]
+
+
+def test_fused_topology_neutral_containers():
+    wipe_all_neo4j_data(DRIVER)
+    data = {"person": {"name": "Camina", "age": "39", "ship": {"name": "Behemoth"}}}
+    d2g = Dict2graph()
+    d2g.add_transformation(
+        [
+            Transformer.match_nodes("person").do(NodeTrans.AddLabel("captain")),
+            # matches a label added by the container before, in the same pass
+            Transformer.match_nodes("captain").do(
+                NodeTrans.TypeCastProperty("age", int)
+            ),
+            Transformer.match_nodes().do(NodeTrans.CapitalizeLabels()),
+            Transformer.match_nodes("Ship").do(NodeTrans.RemoveNode()),
+            Transformer.match_nodes("Person").do(NodeTrans.RemoveProperty("name")),
+        ]
+    )
+    passes = d2g.matcher_and_node_transformers_stack.get_passes()
+    assert [len(containers) for containers in passes] == [3, 1, 1]
+    d2g.parse(data)
+    d2g.create(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    expected_result_nodes: dict = [
+        {
+            "labels": ["Person", "Captain"],
+            "props": {"age": 39},
+            "outgoing_rels": [],
+        },
+    ]
+    assert_result(result, expected_result_nodes)
+
+
+def test_transformer_scheduling():
+    data = {"person": {"name": "Camina", "age": "39", "ship": {"name": "Behemoth"}}}
+
+    def parse(schedule_transformers: bool):
+        d2g = Dict2graph(schedule_transformers=schedule_transformers)
+        d2g.add_transformation(
+            [
+                Transformer.match_nodes("person").do(NodeTrans.AddLabel("Captain")),
+                # reads the properties of the child nodes
+                Transformer.match_nodes("person").do(
+                    NodeTrans.CreateNewMergePropertyFromHash(
+                        hash_includes_existing_other_props=True,
+                        hash_includes_children_nodes_merge_properties=True,
+                    )
+                ),
+                # changes the properties of the child nodes. must run after the hash
+                Transformer.match_nodes().do(NodeTrans.AddProperty({"faction": "OPA"})),
+                # independent of the `AddProperty`. can share the pass of the hash
+                Transformer.match_nodes("ship").do(NodeTrans.AddLabel("Flagship")),
+            ]
+        )
+        d2g.parse(data)
+        return d2g
+
+    d2g = parse(schedule_transformers=True)
+    containers = d2g.matcher_and_node_transformers_stack.containers
+    assert d2g.matcher_and_node_transformers_stack.get_passes() == [
+        [containers[0], containers[1], containers[3]],
+        [containers[2]],
+    ]
+    wipe_all_neo4j_data(DRIVER)
+    d2g.create(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    ship = {
+        "labels": ["ship", "Flagship"],
+        "props": {"name": "Behemoth", "faction": "OPA"},
+    }
+    expected_result_nodes: dict = [
+        {
+            "labels": ["person", "Captain"],
+            "props": {
+                "name": "Camina",
+                "age": "39",
+                "_id": "d751713988987e9331980363e24189ce",
+                "faction": "OPA",
+            },
+            "outgoing_rels": [
+                {
+                    "rel_props": {},
+                    "rel_type": "person_HAS_ship",
+                    "rel_target_node": ship,
+                }
+            ],
+        },
+        dict(ship, outgoing_rels=[]),
+    ]
+    assert_result(result, expected_result_nodes)
+    # same result as one pass per transformer, in the order they were added
+    wipe_all_neo4j_data(DRIVER)
+    parse(schedule_transformers=False).create(DRIVER)
+    assert_result(get_all_neo4j_nodes_with_rels(DRIVER), result)
+
+
+def test_profiling():
+    flushes = []
+    d2g = Dict2graph()
+    d2g.add_transformation(
+        [
+            Transformer.match_nodes("ship").do(
+                NodeTrans.OutsourcePropertiesToNewNode(["class"], ["ShipClass"])
+            ),
+            Transformer.match_nodes(["crew", "ListHub"]).do(NodeTrans.RemoveNode()),
+        ]
+    )
+    d2g.enable_profiling(callback=flushes.append)
+    d2g.parse(
+        {
+            "ship": {
+                "name": "Rocinante",
+                "class": "Corvette",
+                "crew": [{"name": "Holden"}, {"name": "Naomi"}],
+            }
+        }
+    )
+    d2g.parse({"ship": {"name": "Razorback", "class": "Racer"}})
+    assert len(flushes) == 2
+    stats = d2g.stats()
+    assert stats.flushes == 2
+    outsource, remove_hub = stats.containers
+    assert outsource.matcher == "match_nodes(has_labels=['ship'])"
+    assert outsource.transformers == ["OutsourcePropertiesToNewNode"]
+    assert (outsource.candidates, outsource.matches) == (2, 2)
+    assert (outsource.nodes_created, outsource.relations_created) == (2, 2)
+    assert (remove_hub.passes, remove_hub.matches) == (2, 1)
+    # the relations from the hub to the crew members
+    assert (remove_hub.nodes_deleted, remove_hub.relations_deleted) == (1, 2)
+    # 2 ships, 2 ship classes and 2 crew members
+    assert stats.manifested_nodes == 6
+    assert flushes[1].manifested_nodes == 2
+    d2g.disable_profiling()
+    d2g.parse({"ship": {"name": "Tachi", "class": "Corvette"}})
+    assert d2g.stats().flushes == 2
+    wipe_all_neo4j_data(DRIVER)
+    d2g.create(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    # profiling does not change the result
+    assert len(result) == 8
+
+
+def test_profiling_flat_records():
+    flushes = []
+    d2g = Dict2graph(deduplicate_nodes="first")
+    d2g.enable_profiling(callback=flushes.append)
+    d2g.parse({"name": "Holden", "ship": "Rocinante"}, root_node_labels="crew")
+    d2g.parse({"name": "Naomi", "ship": "Rocinante"}, root_node_labels="crew")
+    d2g.parse({"name": "Naomi", "ship": "Rocinante"}, root_node_labels="crew")
+    # flat records take the fast path. they are written to their node set without a flush
+    (node_set,) = d2g._nodeSets.values()
+    assert len(node_set.nodes) == 2
+    assert flushes == []
+    stats = d2g.stats()
+    assert (stats.flushes, stats.manifested_nodes, stats.deduplicated_nodes) == (
+        0,
+        3,
+        1,
+    )
+    assert stats.manifest_node_seconds > 0
+
+
+def test_profiling_fused_pass():
+    d2g = Dict2graph()
+    d2g.add_transformation(
+        [
+            Transformer.match_nodes("ship").do(NodeTrans.AddProperty({"armed": True})),
+            Transformer.match_nodes("crew").do(NodeTrans.AddProperty({"human": True})),
+        ]
+    )
+    # both containers only change the node they are given and run in one pass
+    assert (
+        len(list(d2g._get_transformer_passes(d2g.matcher_and_node_transformers_stack)))
+        == 1
+    )
+    d2g.enable_profiling()
+    d2g.parse(
+        {"ship": {"name": "Rocinante", "crew": [{"name": "Holden"}, {"name": "Amos"}]}}
+    )
+    ships, crew = d2g.stats().containers
+    # every container counts its own candidates, not the candidates of the whole pass
+    assert (ships.passes, ships.candidates, ships.matches) == (1, 1, 1)
+    # 2 crew members and their list hub
+    assert (crew.passes, crew.candidates, crew.matches) == (1, 3, 3)
+
+
+def test_explain():
+    d2g = Dict2graph()
+    d2g.add_transformation(
+        [
+            Transformer.match_nodes("ship").do(NodeTrans.AddLabel("Vessel")),
+            Transformer.match_nodes(["crew", "ListHub"]).do(NodeTrans.RemoveNode()),
+            Transformer.match_nodes(
+                has_one_label_of=["crew"], has_none_label_of=["ListHub"]
+            ).do(NodeTrans.CapitalizeLabels()),
+            Transformer.match_rels("ship_HAS_crew").do(
+                RelTrans.UppercaseRelationType()
+            ),
+        ]
+    )
+    records = [
+        {"ship": {"name": "Rocinante", "crew": [{"name": "Holden"}, {"name": "Amos"}]}},
+        {"ship": {"name": "Razorback"}},
+    ]
+    explanation = d2g.explain(records, total_records=1000)
+    # print(explanation)
+    assert explanation.sample_records == 2
+    assert explanation.estimated_seconds == explanation.sample_seconds * 500
+    add_label, remove_hub, capitalize, uppercase = explanation.containers
+    assert [container.pass_number for container in explanation.containers] == [
+        0,
+        1,
+        2,
+        0,
+    ]
+    assert add_label.matcher == "match_nodes(has_labels=['ship'])"
+    assert add_label.matches_labels == "all labels of ['ship']"
+    assert (add_label.sample_candidates, add_label.sample_matches) == (2, 2)
+    assert remove_hub.transformers == ["RemoveNode"]
+    assert remove_hub.selectivity == 1.0
+    assert capitalize.matches_labels == "one label of ['crew'], but none of ['ListHub']"
+    # the hub was removed by the previous container
+    assert (capitalize.sample_candidates, capitalize.sample_matches) == (3, 2)
+    assert uppercase.kind == "relation"
+    assert uppercase.matches_labels == "relation type 'ship_HAS_crew'"
+    assert uppercase.sample_matches == 1
+    # the sample is parsed by a scratch copy
+    assert d2g._nodeSets == {}
+    wipe_all_neo4j_data(DRIVER)
+    d2g.parse(records[0])
+    d2g.create(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    assert len(result) == 3
+
+
+def test_batch_container_drops_deleted_nodes_from_index():
+    d2g = Dict2graph()
+    d2g.add_transformation(
+        Transformer.match_nodes("book").do(NodeTrans.AddProperty({"checked": True}))
+    )
+    (container,) = d2g.matcher_and_node_transformers_stack.containers
+    assert container.transformers[0]._implements_transform_nodes()
+    books = [Node(labels=["book"], source_data={}, parent_node=None) for _ in range(3)]
+    label_index = LabelIndex()
+    for book in books:
+        label_index.add(book)
+    books[1].deleted = True
+    matches = d2g._run_node_container(
+        container, label_index.iter_candidates(None, ["book"]), label_index
+    )
+    assert matches == 2
+    assert [book.get("checked") for book in books] == [True, None, True]
+    # the batch path drops visited deleted nodes from the index, like the per node path
+    assert (len(label_index), label_index.tombstones) == (2, 0)
+
+
+def test_tombstone_compaction():
+    data = {
+        "bookshelf": {
+            "name": "Tycho",
+            "book": [{"title": "Leviathan Wakes"}, {"title": "Caliban's War"}],
+        }
+    }
+
+    def parse(tombstone_compaction_threshold):
+        d2g = Dict2graph()
+        d2g.tombstone_compaction_threshold = tombstone_compaction_threshold
+        d2g.add_transformation(
+            [
+                Transformer.match_nodes("ListHub").do(NodeTrans.PopListHubNodes()),
+                Transformer.match_nodes().do(NodeTrans.AddProperty({"checked": True})),
+            ]
+        )
+        d2g.enable_profiling()
+        d2g.parse(data)
+        return d2g
+
+    d2g = parse(tombstone_compaction_threshold=0.2)
+    # the popped hub was dropped from the cache and is not visited anymore
+    assert d2g.stats().containers[1].candidates == 3
+    assert (
+        parse(tombstone_compaction_threshold=None).stats().containers[1].candidates == 4
+    )
+    # the deleted relation to the hub is detached from the bookshelf
+    bookshelf = next(
+        node
+        for node_set in d2g._nodeSets.values()
+        for node in node_set.nodes
+        if "bookshelf" in node.labels
+    )
+    assert len(bookshelf.relations) == 2
+    assert all(rel.end_node["checked"] for rel in bookshelf.outgoing_relations)
+    wipe_all_neo4j_data(DRIVER)
+    d2g.create(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    books = [
+        {"labels": ["book", "ListItem"], "props": {"title": title, "checked": True}}
+        for title in ["Leviathan Wakes", "Caliban's War"]
+    ]
+    expected_result_nodes: dict = [
+        {
+            "labels": ["bookshelf"],
+            "props": {"name": "Tycho", "checked": True},
+            "outgoing_rels": [
+                {
+                    "rel_props": {"_list_item_index": index},
+                    "rel_type": "bookshelf_HAS_book",
+                    "rel_target_node": book,
+                }
+                for index, book in enumerate(books)
+            ],
+        },
+    ] + [dict(book, outgoing_rels=[]) for book in books]
+    assert_result(result, expected_result_nodes)
+
+
+def test_transformer_rounds():
+    data = {"person": {"name": "Naomi", "city": "Tycho", "region": "Belt"}}
+
+    def parse(transformer_rounds):
+        d2g = Dict2graph(transformer_rounds=transformer_rounds)
+        d2g.add_transformation(
+            [
+                # only matches nodes created by the next transformer
+                Transformer.match_nodes("City", incremental=True).do(
+                    NodeTrans.OutsourcePropertiesToNewNode(
+                        property_keys=["region"], new_node_labels=["Region"]
+                    )
+                ),
+                Transformer.match_nodes("person", incremental=True).do(
+                    NodeTrans.OutsourcePropertiesToNewNode(
+                        property_keys=["city", "region"], new_node_labels=["City"]
+                    )
+                ),
+            ]
+        )
+        d2g.enable_profiling()
+        d2g.parse(data)
+        return d2g
+
+    assert not any(
+        "Region" in node_set.labels
+        for node_set in parse(transformer_rounds=1)._nodeSets.values()
+    )
+    d2g = parse(transformer_rounds=5)
+    # the third round created nothing new
+    city_stats, person_stats = d2g.stats().containers
+    assert city_stats.passes == person_stats.passes == 3
+    # the incremental containers only visited the new nodes in later rounds
+    assert person_stats.candidates == 3
+    wipe_all_neo4j_data(DRIVER)
+    d2g.create(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    region = {"labels": ["Region"], "props": {"region": "Belt"}}
+    city = {"labels": ["City"], "props": {"city": "Tycho"}}
+    expected_result_nodes: dict = [
+        {
+            "labels": ["person"],
+            "props": {"name": "Naomi"},
+            "outgoing_rels": [
+                {
+                    "rel_type": "person_HAS_City",
+                    "rel_props": {},
+                    "rel_target_node": city,
+                }
+            ],
+        },
+        dict(
+            city,
+            outgoing_rels=[
+                {
+                    "rel_type": "City_HAS_Region",
+                    "rel_props": {},
+                    "rel_target_node": region,
+                }
+            ],
+        ),
+        dict(region, outgoing_rels=[]),
+    ]
+    assert_result(result, expected_result_nodes)
+
+
+def test_deduplicate_nodes():
+    records = [
+        {
+            "article": {
+                "title": "Leviathan Wakes",
+                "author": {"name": "Corey", "born": 1969},
+            }
+        },
+        {"article": {"title": "Caliban's War", "author": {"name": "Corey"}}},
+        {
+            "article": {
+                "title": "Abaddon's Gate",
+                "author": {"name": "Corey", "born": 1970},
+            }
+        },
+    ]
+    expected_author_props = {
+        "first": {"name": "Corey", "born": 1969},
+        "last": {"name": "Corey", "born": 1970},
+        "union": {"name": "Corey", "born": 1970},
+    }
+    for policy, expected_props in expected_author_props.items():
+        d2g = Dict2graph(deduplicate_nodes=policy)
+        d2g.add_transformation(
+            Transformer.match_nodes("author").do(NodeTrans.SetMergeProperties(["name"]))
+        )
+        for record in records:
+            d2g.parse(record)
+        author_rows = [
+            dict(row)
+            for node_set in d2g._nodeSets.values()
+            if node_set.labels == ["author"]
+            for row in node_set.nodes
+        ]
+        assert author_rows == [expected_props]
+        assert d2g.removed_duplicate_nodes == 2
+        wipe_all_neo4j_data(DRIVER)
+        d2g.merge(DRIVER)
+        result = get_all_neo4j_nodes_with_rels(DRIVER)
+        # print(json.dumps(result, indent=2))
+        # the same graph as without deduplication, one author with three articles
+        assert len(result) == 4
+    # "union" keeps properties that only earlier duplicates have
+    d2g = Dict2graph(deduplicate_nodes="union")
+    d2g.add_transformation(
+        Transformer.match_nodes("author").do(NodeTrans.SetMergeProperties(["name"]))
+    )
+    d2g.parse(records[0])
+    d2g.parse(
+        {
+            "article": {
+                "title": "Cibola Burn",
+                "author": {"name": "Corey", "city": "Albuquerque"},
+            }
+        }
+    )
+    author_rows = [
+        row
+        for node_set in d2g._nodeSets.values()
+        if node_set.labels == ["author"]
+        for row in node_set.nodes
+    ]
+    assert author_rows == [{"name": "Corey", "born": 1969, "city": "Albuquerque"}]
+    # values that are equal in python but of different types are not duplicates
+    d2g = Dict2graph(deduplicate_nodes="first")
+    for value in [1, 1.0, True, 1]:
+        d2g.parse({"crate": {"number": value}})
+    assert [
+        row["number"] for node_set in d2g._nodeSets.values() for row in node_set.nodes
+    ] == [1, 1.0, True]
+    assert d2g.removed_duplicate_nodes == 1
+
+
 if __name__ == "__main__" or os.getenv("DICT2GRAPH_RUN_ALL_TESTS", None) == "true":
     test_create_simple_obj()
     test_create_simple_graph()
@@ -814,6 +1798,30 @@ if __name__ == "__main__" or os.getenv("DICT2GRAPH_RUN_ALL_TESTS", None) == "tru
     test_merge_two_dicts()
     test_empty_obj01()
     test_empty_obj02()
+    test_empty_obj03()
     test_error_case_list_01()
     test_match_filter_rel()
     test_list_trans()
+    test_deep_nested_obj()
+    test_deep_nested_list()
+    test_merkle_hash_ids()
+    test_parse_plan_cache()
+    test_flat_records()
+    test_release_source_data()
+    test_relation_rewiring()
+    test_node_id_cache()
+    test_label_dispatch()
+    test_in_place_label_changes()
+    test_compiled_matchers()
+    test_relation_type_cache()
+    test_batch_transformers()
+    test_fused_topology_neutral_containers()
+    test_transformer_scheduling()
+    test_profiling()
+    test_profiling_flat_records()
+    test_profiling_fused_pass()
+    test_explain()
+    test_batch_container_drops_deleted_nodes_from_index()
+    test_tombstone_compaction()
+    test_transformer_rounds()
+    test_deduplicate_nodes()
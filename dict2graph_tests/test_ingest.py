@@ -0,0 +1,429 @@
+import json
+import io
+import gzip
+import pickle
+import tempfile
+import time
+import os, sys
+from concurrent.futures import ThreadPoolExecutor
+
+if __name__ == "__main__":
+    SCRIPT_DIR = os.path.dirname(
+        os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__)))
+    )
+    MODULE_ROOT_DIR = os.path.join(SCRIPT_DIR, "..")
+    sys.path.insert(0, os.path.normpath(MODULE_ROOT_DIR))
+from dict2graph import Dict2graph, Transformer, NodeTrans, RelTrans, UnwindWriter
+from dict2graph import readers
+from dict2graph.readers import iter_json_array, iter_jsonl, ReadStats
+from dict2graph_tests._test_tools import (
+    wipe_all_neo4j_data,
+    DRIVER,
+    get_all_neo4j_nodes_with_rels,
+    assert_result,
+)
+
+
+def test_parse_iter_flush_every():
+    wipe_all_neo4j_data(DRIVER)
+
+    def records():
+        for name in ["Naomi", "Amos", "Alex", "Jim", "Clarissa"]:
+            yield {"crew": {"name": name}}
+
+    d2g = Dict2graph()
+    d2g.parse_iter(records(), graph=DRIVER, flush_every=2)
+    # all buffered data must be written and released after the last flush
+    assert d2g._nodeSets == {}
+    assert d2g._relSets == {}
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    expected_result_nodes: dict = [
+        {"labels": ["crew"], "props": {"name": "Naomi"}, "outgoing_rels": []},
+        {"labels": ["crew"], "props": {"name": "Amos"}, "outgoing_rels": []},
+        {"labels": ["crew"], "props": {"name": "Alex"}, "outgoing_rels": []},
+        {"labels": ["crew"], "props": {"name": "Jim"}, "outgoing_rels": []},
+        {"labels": ["crew"], "props": {"name": "Clarissa"}, "outgoing_rels": []},
+    ]
+    assert_result(result, expected_result_nodes)
+
+
+def test_parse_iter_flush_every_objects():
+    wipe_all_neo4j_data(DRIVER)
+    records = [
+        {"ship": {"name": "Rocinante", "captain": {"name": "Holden"}}},
+        {"ship": {"name": "Rocinante", "captain": {"name": "Holden"}}},
+        {"ship": {"name": "Tachi", "captain": {"name": "Holden"}}},
+    ]
+    d2g = Dict2graph()
+    d2g.parse_iter(
+        records,
+        graph=DRIVER,
+        flush_every=None,
+        flush_every_objects=3,
+        write_mode="merge",
+    )
+    assert d2g._nodeSets == {}
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    expected_result_nodes: dict = [
+        {"labels": ["captain"], "props": {"name": "Holden"}, "outgoing_rels": []},
+        {
+            "labels": ["ship"],
+            "props": {"name": "Rocinante"},
+            "outgoing_rels": [
+                {
+                    "rel_props": {},
+                    "rel_type": "ship_HAS_captain",
+                    "rel_target_node": {
+                        "labels": ["captain"],
+                        "props": {"name": "Holden"},
+                    },
+                }
+            ],
+        },
+        {
+            "labels": ["ship"],
+            "props": {"name": "Tachi"},
+            "outgoing_rels": [
+                {
+                    "rel_props": {},
+                    "rel_type": "ship_HAS_captain",
+                    "rel_target_node": {
+                        "labels": ["captain"],
+                        "props": {"name": "Holden"},
+                    },
+                }
+            ],
+        },
+    ]
+    assert_result(result, expected_result_nodes)
+
+
+def test_iter_json_array_chunk_boundaries():
+    data = {
+        "meta": {"version": 2, "tags": ["a", "b"]},
+        "results": {
+            "count": 4,
+            "items": [
+                {"id": 1, "value": 1.5e10, "name": 'Bobbie "Gunny" Draper'},
+                {"id": 22222, "nested": {"list": [1, 2, [3, 4]]}, "flag": True},
+                12345678,
+                None,
+            ],
+        },
+    }
+    text = json.dumps(data, indent=2)
+    # every chunk size must result in the same items, no matter where the chunk boundaries cut the values
+    for chunk_size in range(1, 40):
+        items = list(
+            iter_json_array(
+                io.StringIO(text),
+                json_path="results.items",
+                chunk_size=chunk_size,
+                use_accelerator=False,
+            )
+        )
+        assert items == data["results"]["items"]
+    assert (
+        list(iter_json_array(io.StringIO(" [ ] "), chunk_size=1, use_accelerator=False))
+        == []
+    )
+    # numbers cut right after "." or "e" must be read on in the next chunk, also when skipped on the json path
+    text = '{"version": 2.5e3, "ratio": -0.125, "items": [1, 2.5e3, -0.125, 7E-2, 10]}'
+    for chunk_size in range(1, 20):
+        items = list(
+            iter_json_array(
+                io.StringIO(text),
+                json_path="items",
+                chunk_size=chunk_size,
+                use_accelerator=False,
+            )
+        )
+        assert items == [1, 2500.0, -0.125, 0.07, 10]
+    floats = [index / 7 for index in range(20000)]
+    assert (
+        list(
+            iter_json_array(
+                io.StringIO(json.dumps(floats)), chunk_size=4096, use_accelerator=False
+            )
+        )
+        == floats
+    )
+    # a binary file of the caller stays open
+    binary_file = io.BytesIO(b"[1, 2]")
+    assert list(iter_json_array(binary_file, use_accelerator=False)) == [1, 2]
+    assert not binary_file.closed
+
+
+def test_iter_json_array_backends():
+    # the stdlib scanner and, if installed, the ijson accelerator must behave the same
+    accelerator_options = [False] if readers.ijson is None else [False, True]
+    text = '{"version": 2.5e3, "crew": {"items": [1, 2.5e3, {"name": "Amos"}, null]}}'
+    for use_accelerator in accelerator_options:
+
+        def read(text: str, json_path: str = None):
+            return list(
+                iter_json_array(
+                    io.BytesIO(text.encode("utf-8")),
+                    json_path=json_path,
+                    use_accelerator=use_accelerator,
+                )
+            )
+
+        assert read(text, "crew.items") == [1, 2500.0, {"name": "Amos"}, None]
+        assert read(" [ ] ") == []
+        binary_file = io.BytesIO(b"[1, 2]")
+        assert list(iter_json_array(binary_file, use_accelerator=use_accelerator)) == [
+            1,
+            2,
+        ]
+        assert not binary_file.closed
+        # a missing json path, a json path to a value that is no array and invalid json fail
+        for invalid_text, json_path in [
+            (text, "crew.names"),
+            (text, "version"),
+            (text, "crew"),
+            ("[1, 2", None),
+            ('{"crew": [1, }', "crew"),
+        ]:
+            try:
+                read(invalid_text, json_path)
+                assert False, f"{invalid_text!r} at {json_path!r} must fail"
+            except ValueError:
+                pass
+
+
+def test_parse_json_file():
+    wipe_all_neo4j_data(DRIVER)
+    data = {
+        "meta": {"exported": "2023-01-01"},
+        "crew": [
+            {"crew": {"name": "Naomi"}},
+            {"crew": {"name": "Amos"}},
+            {"crew": {"name": "Alex"}},
+        ],
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "crew.json")
+        with open(file_path, "w") as f:
+            json.dump(data, f)
+        d2g = Dict2graph()
+        d2g.parse_json_file(file_path, json_path="crew", graph=DRIVER, flush_every=2)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    expected_result_nodes: dict = [
+        {"labels": ["crew"], "props": {"name": "Naomi"}, "outgoing_rels": []},
+        {"labels": ["crew"], "props": {"name": "Amos"}, "outgoing_rels": []},
+        {"labels": ["crew"], "props": {"name": "Alex"}, "outgoing_rels": []},
+    ]
+    assert_result(result, expected_result_nodes)
+
+
+def test_parse_jsonl():
+    wipe_all_neo4j_data(DRIVER)
+    lines = [
+        '{"crew": {"name": "Naomi"}}',
+        "",
+        '{"crew": {"name": "Amos"}}',
+        '{"crew": {"name": "Alex"}}',
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "crew.jsonl.gz")
+        with gzip.open(file_path, "wt") as f:
+            f.write("\n".join(lines))
+        d2g = Dict2graph()
+        d2g.parse_jsonl(file_path, graph=DRIVER, flush_every=2)
+    assert d2g.last_read_stats.records == 3
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    expected_result_nodes: dict = [
+        {"labels": ["crew"], "props": {"name": "Naomi"}, "outgoing_rels": []},
+        {"labels": ["crew"], "props": {"name": "Amos"}, "outgoing_rels": []},
+        {"labels": ["crew"], "props": {"name": "Alex"}, "outgoing_rels": []},
+    ]
+    assert_result(result, expected_result_nodes)
+    # errors name the line in the file, blank lines included
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "crew.jsonl")
+        with open(file_path, "w") as f:
+            f.write("\n".join(lines + ["", '{"crew": ']))
+        try:
+            list(iter_jsonl(file_path, chunk_size=8))
+            assert False, "Invalid json must raise a ValueError"
+        except ValueError as e:
+            assert str(e).startswith("Invalid json in line 6:")
+    # the read time does not include the time the consumer spends on the records
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "crew.jsonl")
+        with open(file_path, "w") as f:
+            f.write("\n".join(lines))
+        stats = ReadStats()
+        for record in iter_jsonl(file_path, stats=stats):
+            time.sleep(0.05)
+    assert stats.records == 3
+    assert stats.seconds < 0.05
+
+
+def test_parse_parallel():
+    wipe_all_neo4j_data(DRIVER)
+    records = [
+        {"ship": {"name": "Rocinante", "crew": [{"name": "Naomi"}, {"name": "Amos"}]}},
+        {"ship": {"name": "Canterbury", "crew": [{"name": "Holden"}]}},
+        {"ship": {"name": "Razorback", "crew": []}},
+    ]
+    d2g = Dict2graph()
+    d2g.add_transformation(
+        [
+            Transformer.match_nodes("ship").do(NodeTrans.OverrideLabel("Ship")),
+            Transformer.match_nodes("crew").do(NodeTrans.RemoveListItemLabels()),
+            Transformer.match_rels().do(RelTrans.UppercaseRelationType()),
+        ]
+    )
+    d2g.parse_parallel(records, workers=2, records_per_shard=1, graph=DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # the result must be the same as parsing the records in a single process
+    wipe_all_neo4j_data(DRIVER)
+    d2g.parse_iter(records, graph=DRIVER)
+    expected_result_nodes = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    assert_result(result, expected_result_nodes)
+
+
+def test_compiled_pipeline_workers():
+    records = [
+        {
+            "article": {
+                "title": f"Article {index}",
+                "journal": "Nature" if index % 2 else "Science",
+                "author": {
+                    "name": f"Author {index % 3}",
+                    "affiliation": {"name": f"University {index % 2}"},
+                },
+            }
+        }
+        for index in range(12)
+    ]
+    d2g = Dict2graph()
+    d2g.add_transformation(
+        [
+            Transformer.match_nodes("article").do(
+                NodeTrans.CreateHubbing(
+                    follow_nodes_labels=["author", "affiliation"],
+                    merge_mode="edge",
+                    hub_labels=["Contribution"],
+                )
+            ),
+            Transformer.match_nodes("article").do(
+                NodeTrans.OutsourcePropertiesToNewNode(["journal"], ["Journal"])
+            ),
+        ]
+    )
+    pipeline = d2g.compile()
+    # workers created in another process share the same definition
+    pipeline = pickle.loads(pickle.dumps(pipeline))
+
+    def parse_shard(shard):
+        worker = pipeline.create_worker()
+        for record in shard:
+            worker.parse(record)
+        return worker
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        workers = list(
+            executor.map(parse_shard, [records[index::4] for index in range(4)])
+        )
+    wipe_all_neo4j_data(DRIVER)
+    for worker in workers:
+        worker.merge(DRIVER)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    # the same result as one instance parsing all records
+    wipe_all_neo4j_data(DRIVER)
+    for record in records:
+        d2g.parse(record)
+    d2g.merge(DRIVER)
+    assert_result(result, get_all_neo4j_nodes_with_rels(DRIVER))
+    # adding transformers to a worker does not change the pipeline
+    worker = pipeline.create_worker()
+    worker.add_transformation(
+        Transformer.match_nodes("Journal").do(NodeTrans.AddLabel("Publisher"))
+    )
+    assert (
+        len(pipeline.create_worker().matcher_and_node_transformers_stack.containers)
+        == 2
+    )
+    # changes to the transformers of the compiled instance do not affect the pipeline
+    d2g = Dict2graph()
+    add_property = NodeTrans.AddProperty({"fleet": "MCRN"})
+    d2g.add_transformation(Transformer.match_nodes("ship").do(add_property))
+    pipeline = d2g.compile()
+    add_property.properties = {"fleet": "UNN"}
+    worker = pipeline.create_worker()
+    worker.parse({"ship": {"name": "Donnager"}})
+    assert [
+        dict(row) for node_set in worker._nodeSets.values() for row in node_set.nodes
+    ] == [{"name": "Donnager", "fleet": "MCRN"}]
+
+    # workers of subclasses with required init arguments
+    class FleetDict2graph(Dict2graph):
+        def __init__(self, fleet: str):
+            super().__init__()
+            self.fleet = fleet
+
+    worker = FleetDict2graph("MCRN").compile().create_worker()
+    assert isinstance(worker, FleetDict2graph)
+    assert worker.fleet == "MCRN"
+
+
+def test_unwind_writer():
+    records = [
+        {
+            "article": {
+                "title": f"Article {index}",
+                "authors": [{"name": "Holden"}, {"name": f"Author {index % 3}"}],
+            }
+        }
+        for index in range(7)
+    ]
+    d2g = Dict2graph()
+    wipe_all_neo4j_data(DRIVER)
+    for record in records:
+        d2g.parse(record)
+    d2g.merge(DRIVER)
+    expected_result_nodes = get_all_neo4j_nodes_with_rels(DRIVER)
+
+    wipe_all_neo4j_data(DRIVER)
+    # a small transaction size splits every set into several batches
+    writer = UnwindWriter(rows_per_transaction=2)
+    d2g = Dict2graph()
+    d2g.parse_iter(records, graph=DRIVER, flush_every=3, writer=writer)
+    result = get_all_neo4j_nodes_with_rels(DRIVER)
+    # print(json.dumps(result, indent=2))
+    assert_result(result, expected_result_nodes)
+    # the statements were prepared once per set, not once per flush
+    prepared_queries = len(writer._queries)
+    d2g.parse_iter(records, graph=DRIVER, flush_every=3, writer=writer)
+    assert len(writer._queries) == prepared_queries
+    assert_result(get_all_neo4j_nodes_with_rels(DRIVER), expected_result_nodes)
+
+    wipe_all_neo4j_data(DRIVER)
+    d2g = Dict2graph()
+    for record in records:
+        d2g.parse(record)
+    d2g.create(DRIVER, writer="unwind")
+    assert len(get_all_neo4j_nodes_with_rels(DRIVER)) == sum(
+        len(node_set.nodes) for node_set in d2g._nodeSets.values()
+    )
+
+
+if __name__ == "__main__" or os.getenv("DICT2GRAPH_RUN_ALL_TESTS", None) == "true":
+    test_parse_iter_flush_every()
+    test_parse_iter_flush_every_objects()
+    test_iter_json_array_chunk_boundaries()
+    test_iter_json_array_backends()
+    test_parse_json_file()
+    test_parse_jsonl()
+    test_parse_parallel()
+    test_compiled_pipeline_workers()
+    test_unwind_writer()
@@ -26,6 +26,7 @@ setup(
     ],
     extras_require={
         "tests": ["pytest", "deepdiff"],
+        "fast": ["ijson"],
         "docs": [
             "mkdocs",
             "mkdocstrings[python]",